@@ -1,55 +1,129 @@
+from typing import Optional
+
 import streamlit as st
 from phi.agent import Agent
 from phi.model.mistral import MistralChat
-from phi.model.anthropic import Claude
-from phi.model.openai import OpenAIChat
-from phi.tools.email import EmailTools
-from tools import CustomZoomTool
-
-
-def get_the_model():
-    mdoel_provider = st.session_state.model_provider
-    model_function_map = {
-        "OpenAI": OpenAIChat(id="gpt-4o", api_key=st.session_state.api_key),
-        "Mistral": MistralChat(
-            id="mistral-large-latest", api_key=st.session_state.api_key
-        ),
-        "Claude": Claude(
-            id="claude-3-5-sonnet-latest", api_key=st.session_state.api_key
-        ),
-    }
-    return model_function_map[mdoel_provider]
-
-
-def create_resume_analyzer_agent() -> Agent:
-    """Creates and returns a resume analysis agent."""
-    if not st.session_state.api_key:
+
+from client_pool import client_pool
+from prompt_cache import CachingOpenAIChat
+from structured_output import StructuredClaude, structured_model_params
+from telemetry import record_llm_response
+from tools import CustomZoomTool, PooledEmailTools
+
+
+MODEL_IDS = {
+    "OpenAI": "gpt-4o",
+    "Mistral": "mistral-large-latest",
+    "Claude": "claude-3-5-sonnet-latest",
+}
+
+ANALYZER_DESCRIPTION = "You are an expert technical recruiter who analyzes resumes."
+ANALYZER_INSTRUCTIONS = [
+    "Analyze the resume against the provided job requirements",
+    "Be lenient with AI/ML candidates who show strong potential",
+    "Consider project experience as valid experience",
+    "Value hands-on experience with key technologies",
+    "Return a JSON response with selection decision and feedback",
+]
+
+
+class InstrumentedMistralChat(MistralChat):
+    # Streamed Mistral responses bypass this hook and are not reported.
+    def _update_usage_metrics(self, assistant_message, response, response_timer):
+        super()._update_usage_metrics(assistant_message, response, response_timer)
+        record_llm_response(
+            "Mistral",
+            self.id,
+            response_timer.elapsed,
+            response.usage.prompt_tokens,
+            response.usage.completion_tokens,
+        )
+
+
+# Every model reports its latency and tokens to telemetry; the OpenAI and
+# Claude models also record prompt cache hits.
+MODEL_CLASSES = {
+    "OpenAI": CachingOpenAIChat,
+    "Mistral": InstrumentedMistralChat,
+    "Claude": StructuredClaude,
+}
+
+
+def get_the_model(
+    model_provider: Optional[str] = None, api_key: Optional[str] = None, **kwargs
+):
+    """Returns the model for the given provider, defaulting to the session settings.
+
+    Only the chosen model is built, on top of SDK clients shared through
+    ``client_pool`` so HTTP connections are reused across requests. Extra
+    ``kwargs`` are passed to the model class.
+    """
+    mdoel_provider = model_provider or st.session_state.model_provider
+    api_key = api_key or st.session_state.api_key
+    kwargs.setdefault("id", MODEL_IDS[mdoel_provider])
+    return MODEL_CLASSES[mdoel_provider](
+        api_key=api_key,
+        **client_pool.get(mdoel_provider, api_key),
+        **kwargs,
+    )
+
+
+def analyzer_system_prompt() -> str:
+    """The analyzer agent's system prompt, for callers that bypass ``Agent``."""
+    instructions = "\n".join(f"- {line}" for line in ANALYZER_INSTRUCTIONS)
+    return f"{ANALYZER_DESCRIPTION}\n\n## Instructions\n{instructions}"
+
+
+def create_resume_analyzer_agent(
+    model_provider: Optional[str] = None,
+    api_key: Optional[str] = None,
+    structured: bool = True,
+    output: str = "resume_analysis",
+    max_tokens: Optional[int] = None,
+    model_id: Optional[str] = None,
+) -> Agent:
+    """Creates and returns a resume analysis agent.
+
+    When ``model_provider`` and ``api_key`` are given the agent is built without
+    touching ``st.session_state``, which lets it run outside Streamlit. With
+    ``structured`` the model is asked for output matching the ``output``
+    schema in ``structured_output.OUTPUT_SCHEMAS``. ``model_id`` overrides the
+    provider's default model in ``MODEL_IDS``.
+    """
+    if model_provider is None and not st.session_state.api_key:
         st.error("Please enter your API Key first.")
         return None
 
+    model_provider = model_provider or st.session_state.model_provider
+    model_kwargs = structured_model_params(model_provider, output) if structured else {}
+    if max_tokens is not None:
+        model_kwargs["max_tokens"] = max_tokens
+    if model_id is not None:
+        model_kwargs["id"] = model_id
     return Agent(
-        model=get_the_model(),
-        description="You are an expert technical recruiter who analyzes resumes.",
-        instructions=[
-            "Analyze the resume against the provided job requirements",
-            "Be lenient with AI/ML candidates who show strong potential",
-            "Consider project experience as valid experience",
-            "Value hands-on experience with key technologies",
-            "Return a JSON response with selection decision and feedback",
-        ],
-        markdown=True,
+        model=get_the_model(model_provider, api_key, **model_kwargs),
+        description=ANALYZER_DESCRIPTION,
+        instructions=ANALYZER_INSTRUCTIONS,
+        # Markdown formatting would contradict the JSON-only output format.
+        markdown=not structured,
     )
 
 
-def create_email_agent() -> Agent:
+def _settings(settings: Optional[dict]):
+    """Explicit settings (e.g. from a queued job) or the current session's."""
+    return settings if settings is not None else st.session_state
+
+
+def create_email_agent(settings: Optional[dict] = None) -> Agent:
+    settings = _settings(settings)
     return Agent(
-        model=get_the_model(),
+        model=get_the_model(settings["model_provider"], settings["api_key"]),
         tools=[
-            EmailTools(
-                receiver_email=st.session_state.candidate_email,
-                sender_email=st.session_state.email_sender,
-                sender_name=st.session_state.company_name,
-                sender_passkey=st.session_state.email_passkey,
+            PooledEmailTools(
+                receiver_email=settings["candidate_email"],
+                sender_email=settings["email_sender"],
+                sender_name=settings["company_name"],
+                sender_passkey=settings["email_passkey"],
             )
         ],
         description="You are a professional recruitment coordinator handling email communications.",
@@ -60,23 +134,24 @@ def create_email_agent() -> Agent:
             "Maintain a friendly yet professional tone",
             "Always end emails with exactly: 'best,\nthe ai recruiting team'",
             "Never include the sender's or receiver's name in the signature",
-            f"The name of the company is '{st.session_state.company_name}'",
+            f"The name of the company is '{settings['company_name']}'",
         ],
         markdown=False,
         show_tool_calls=False,
     )
 
 
-def create_scheduler_agent() -> Agent:
+def create_scheduler_agent(settings: Optional[dict] = None) -> Agent:
+    settings = _settings(settings)
     zoom_tools = CustomZoomTool(
-        account_id=st.session_state.zoom_account_id,
-        client_id=st.session_state.zoom_client_id,
-        client_secret=st.session_state.zoom_client_secret,
+        account_id=settings["zoom_account_id"],
+        client_id=settings["zoom_client_id"],
+        client_secret=settings["zoom_client_secret"],
     )
 
     return Agent(
         name="Interview Scheduler",
-        model=get_the_model(),
+        model=get_the_model(settings["model_provider"], settings["api_key"]),
         tools=[zoom_tools],
         description="You are an interview scheduling coordinator.",
         instructions=[
@@ -90,4 +165,3 @@ def create_scheduler_agent() -> Agent:
         markdown=False,
         show_tool_calls=False,
     )
-
@@ -0,0 +1,144 @@
+"""Persistent cache of parsed resume analysis verdicts.
+
+Entries are keyed on a hash of everything that affects the verdict: the resume
+text, the role requirements, the model, the prompt version and the kind of
+prompt (one resume for one role, several roles or several resumes). The cache is
+bounded to ``max_entries`` and evicts the least recently used entries first.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from phi.utils.log import logger
+
+ANALYSIS_CACHE_PATH = "data/analysis_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+def make_cache_key(
+    resume_text: str,
+    role: str,
+    role_requirements: dict,
+    model_provider: str,
+    model_id: str,
+    prompt_version: str,
+    prompt_kind: str = "single",
+) -> str:
+    payload = json.dumps(
+        [
+            prompt_version,
+            prompt_kind,
+            model_provider,
+            model_id,
+            role,
+            role_requirements.get("job_description", ""),
+            role_requirements.get("additional_instructions", ""),
+            resume_text,
+        ]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    def __init__(
+        self, path: str = ANALYSIS_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                role TEXT NOT NULL,
+                verdict TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_used "
+            "ON analysis_cache (last_used)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_cache_role ON analysis_cache (role)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT verdict FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE analysis_cache SET last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, role: str, verdict: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, role, verdict, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, role, json.dumps(verdict), time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE key IN ("
+                "SELECT key FROM analysis_cache ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def invalidate_role(self, role: str) -> int:
+        """Drop every cached verdict for ``role``, returning how many were removed."""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM analysis_cache WHERE role = ?", (role,)
+            ).rowcount
+            self._conn.commit()
+        if removed:
+            logger.info(f"Invalidated {removed} cached analyses for role '{role}'")
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute(
+                "SELECT COUNT(*) FROM analysis_cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache: Optional[AnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Return the process-wide cache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache()
+        return _cache
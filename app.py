@@ -1,25 +1,123 @@
-import json
+from datetime import datetime
+
 import streamlit as st
 from phi.utils.log import logger
 from streamlit_pdf_viewer import pdf_viewer
 from tasks import (
     init_session_state,
-    schedule_interview,
     extract_text_from_pdf,
     analyze_resume,
-    send_selection_email,
-    send_rejection_email,
+    deliver_email,
     add_job_details,
+    load_job_descriptions,
 )
-from agents import (
-    create_resume_analyzer_agent,
-    create_scheduler_agent,
-    create_email_agent,
+from job_queue import (
+    PIPELINE_SETTINGS,
+    enqueue_post_selection,
+    get_job_queue,
+    idempotency_key,
+    start_worker_threads,
 )
+from agents import create_resume_analyzer_agent
+from analysis_cache import get_analysis_cache
+from multi_match import match_roles
+from results_store import ResultFilter, get_results_store
+from upload_store import evict_session_upload, session_upload
+import telemetry
+
+JOB_STATUS_LABELS = {
+    "pending": "queued",
+    "running": "in progress",
+    "done": "done ✅",
+    "dead": "failed, our team will follow up",
+}
+RESULTS_PAGE_SIZE = 25
+
+
+def render_partial_verdict(placeholder, fields: dict) -> None:
+    """Show a verdict while it streams in: decision, skills, then feedback."""
+    with placeholder.container():
+        if fields.get("escalated") and "selected" not in fields:
+            st.info("Double-checking with the larger model...")
+            return
+        if "selected" not in fields:
+            st.info("Analyzing your resume...")
+            return
+        if fields["selected"]:
+            st.success("Looking like a match")
+        else:
+            st.warning("Looking like a poor match")
+        if fields.get("matching_skills"):
+            st.write("Matching skills: " + ", ".join(fields["matching_skills"]))
+        if fields.get("missing_skills"):
+            st.write("Missing skills: " + ", ".join(fields["missing_skills"]))
+        if fields.get("feedback"):
+            st.caption(fields["feedback"])
+
+
+def _skill_list(text: str) -> tuple:
+    return tuple(skill.strip() for skill in text.split(",") if skill.strip())
+
+
+def render_results_dashboard(roles) -> None:
+    """Recorded verdicts, filtered in the store and read one page at a time."""
+    col1, col2, col3 = st.columns(3)
+    role = col1.selectbox("Role", ["All roles", *roles], key="results_role")
+    level = col2.selectbox(
+        "Experience", ["Any", "junior", "mid", "senior"], key="results_level"
+    )
+    decision = col3.selectbox(
+        "Decision", ["Any", "Selected", "Rejected"], key="results_decision"
+    )
+    col1, col2 = st.columns(2)
+    has_skills = col1.text_input("Has skills (comma-separated)", key="results_has")
+    missing_skills = col2.text_input(
+        "Missing skills (comma-separated)", key="results_missing"
+    )
+    filters = ResultFilter(
+        role=None if role == "All roles" else role,
+        experience_level=None if level == "Any" else level,
+        selected={"Any": None, "Selected": True, "Rejected": False}[decision],
+        has_skills=_skill_list(has_skills),
+        missing_skills=_skill_list(missing_skills),
+    )
+    # Page cursors for going back; start over whenever the filters change.
+    if st.session_state.get("results_filters") != filters:
+        st.session_state.results_filters = filters
+        st.session_state.results_cursors = [None]
+    cursors = st.session_state.results_cursors
+
+    store = get_results_store()
+    page = store.query(filters, after=cursors[-1], limit=RESULTS_PAGE_SIZE)
+    st.caption(f"{store.count(filters)} results, page {len(cursors)}")
+    st.dataframe(
+        [
+            {
+                "Candidate": result["candidate"],
+                "Role": result["role"],
+                "Selected": "✅" if result["selected"] else "❌",
+                "Level": result["experience_level"],
+                "Confidence": result["confidence"],
+                "Missing skills": ", ".join(result["missing_skills"]),
+                "Recorded": datetime.fromtimestamp(result["created"]),
+            }
+            for result in page.results
+        ],
+        width="stretch",
+    )
+    col1, col2 = st.columns(2)
+    if col1.button("← Previous", disabled=len(cursors) == 1, key="results_previous"):
+        cursors.pop()
+        st.rerun()
+    if col2.button("Next →", disabled=page.next_cursor is None, key="results_next"):
+        cursors.append(page.next_cursor)
+        st.rerun()
 
 
 def main() -> None:
     st.title("AI Recruitment System")
+    telemetry.configure()
+    start_worker_threads()
 
     init_session_state()
     with st.sidebar:
@@ -38,6 +136,11 @@ def main() -> None:
             st.session_state.model_provider = model_provider
         if api_key:
             st.session_state.api_key = api_key
+        st.session_state.analysis_cascade = st.checkbox(
+            "Screen with a smaller model first",
+            value=st.session_state.analysis_cascade,
+            help="Only uncertain or borderline verdicts go to the large model.",
+        )
 
         st.subheader("Zoom Settings")
         zoom_account_id = st.text_input(
@@ -52,6 +155,12 @@ def main() -> None:
             value=st.session_state.zoom_client_secret,
         )
 
+        st.session_state.llm_meeting_descriptions = st.checkbox(
+            "Write meeting agendas with the LLM",
+            value=st.session_state.llm_meeting_descriptions,
+            help="Interview slots are always assigned without the LLM.",
+        )
+
         st.subheader("Email Settings")
         email_sender = st.text_input(
             "Sender Email",
@@ -70,6 +179,18 @@ def main() -> None:
             help="Name to use in email communications",
         )
 
+        email_mode = st.radio(
+            "Email Writing",
+            ["template", "llm"],
+            format_func={
+                "template": "Role templates (fast)",
+                "llm": "LLM per email",
+            }.get,
+            index=0 if st.session_state.email_mode == "template" else 1,
+            help="Templates are written once per role by the LLM and reused.",
+        )
+        st.session_state.email_mode = email_mode
+
         if zoom_account_id:
             st.session_state.zoom_account_id = zoom_account_id
         if zoom_client_id:
@@ -123,8 +244,10 @@ def main() -> None:
                 st.error(
                     "Error occurred while storing the data. Make sure to provide Job Role and Job Description."
                 )
-    with open("data/job_descriptions.json", "r") as f:
-        json_descriptions_data = json.load(f)
+    json_descriptions_data = load_job_descriptions()
+
+    with st.expander("Candidate Results", expanded=False):
+        render_results_dashboard(list(json_descriptions_data))
 
     role = st.selectbox(
         "Select the role you're applying for:",
@@ -153,10 +276,14 @@ def main() -> None:
         for key in keys_to_clear:
             if key in st.session_state:
                 st.session_state[key] = None if key == "current_pdf" else ""
+        evict_session_upload()
+        st.session_state.upload_generation += 1
         st.rerun()
 
     resume_file = st.file_uploader(
-        "Upload your resume (PDF)", type=["pdf"], key="resume_uploader"
+        "Upload your resume (PDF)",
+        type=["pdf"],
+        key=f"resume_uploader_{st.session_state.upload_generation}",
     )
     if resume_file is not None and resume_file != st.session_state.get("current_pdf"):
         st.session_state.current_pdf = resume_file
@@ -166,38 +293,56 @@ def main() -> None:
         st.rerun()
 
     if resume_file:
+        upload = session_upload(resume_file)
         st.subheader("Uploaded Resume")
         col1, col2 = st.columns([4, 1])
 
         with col1:
-            import tempfile, os
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(resume_file.read())
-                tmp_file_path = tmp_file.name
-            resume_file.seek(0)
-            try:
-                pdf_viewer(tmp_file_path)
-            finally:
-                os.unlink(tmp_file_path)
+            pdf_viewer(upload.data, key=f"pdf_viewer_{upload.digest}")
 
         with col2:
             st.download_button(
                 label="📥 Download",
-                data=resume_file,
-                file_name=resume_file.name,
+                data=upload.data,
+                file_name=upload.name,
                 mime="application/pdf",
             )
         # Process the resume text
         if not st.session_state.resume_text:
             with st.spinner("Processing your resume..."):
-                resume_text = extract_text_from_pdf(resume_file)
+                resume_text = extract_text_from_pdf(upload)
                 if resume_text:
                     st.session_state.resume_text = resume_text
                     st.success("Resume processed successfully!")
                 else:
                     st.error("Could not process the PDF. Please try again.")
 
+    if st.session_state.resume_text and len(json_descriptions_data) > 1:
+        with st.expander("Other roles"):
+            if st.button("🔀 Match against all roles"):
+                with st.spinner("Matching the resume against every role..."):
+                    matches = match_roles(
+                        st.session_state.candidate_email or "candidate",
+                        st.session_state.resume_text,
+                        json_descriptions_data,
+                        st.session_state.model_provider,
+                        st.session_state.api_key,
+                        cache=get_analysis_cache(),
+                    )
+                if st.session_state.candidate_email:
+                    get_results_store().add_records(matches, source="multi_match")
+                st.table(
+                    [
+                        {
+                            "Role": match["role"],
+                            "Selected": "✅" if match.get("selected") else "❌",
+                            "Level": match.get("experience_level", ""),
+                            "Feedback": match.get("feedback") or match["error"],
+                        }
+                        for match in matches
+                    ]
+                )
+
     # Email input with session state
     email = st.text_input(
         "Candidate's email address",
@@ -214,20 +359,30 @@ def main() -> None:
     ):
         if st.button("Analyze Resume"):
             with st.spinner("Analyzing your resume..."):
+                progress = st.empty()
                 resume_analyzer = create_resume_analyzer_agent()
-                email_agent = create_email_agent()  # Create email agent here
 
-                if resume_analyzer and email_agent:
-                    print("DEBUG: Starting resume analysis")
-                    is_selected, feedback = analyze_resume(
-                        resume_text=st.session_state.resume_text,
-                        role_requirements=json_descriptions_data[role],
+                if resume_analyzer:
+                    with telemetry.span(
+                        "analysis",
                         role=role,
-                        analyzer=resume_analyzer,
-                    )
-                    print(
-                        f"DEBUG: Analysis complete - Selected: {is_selected}, Feedback: {feedback}"
-                    )
+                        provider=st.session_state.model_provider,
+                        cascade=st.session_state.analysis_cascade,
+                    ) as stage:
+                        is_selected, feedback = analyze_resume(
+                            resume_text=st.session_state.resume_text,
+                            role_requirements=json_descriptions_data[role],
+                            role=role,
+                            analyzer=resume_analyzer,
+                            cascade=st.session_state.analysis_cascade,
+                            on_update=lambda fields: render_partial_verdict(
+                                progress, fields
+                            ),
+                            candidate=st.session_state.candidate_email,
+                        )
+                        stage.set(selected=is_selected)
+                    progress.empty()
+                    logger.debug(f"Analysis for {role}: selected={is_selected}")
 
                     if is_selected:
                         st.success(
@@ -245,10 +400,10 @@ def main() -> None:
                         # Send rejection email
                         with st.spinner("Sending feedback email..."):
                             try:
-                                send_rejection_email(
-                                    email_agent=email_agent,
-                                    to_email=email,
-                                    role=role,
+                                deliver_email(
+                                    "rejection",
+                                    st.session_state,
+                                    role,
                                     feedback=feedback,
                                 )
                                 st.info(
@@ -269,68 +424,40 @@ def main() -> None:
         )
 
         if st.button("Proceed with Application", key="proceed_button"):
-            print("DEBUG: Proceed button clicked")  # Debug
-            with st.spinner("🔄 Processing your application..."):
-                try:
-                    print("DEBUG: Creating email agent")  # Debug
-                    email_agent = create_email_agent()
-                    print(f"DEBUG: Email agent created: {email_agent}")  # Debug
-
-                    print("DEBUG: Creating scheduler agent")  # Debug
-                    scheduler_agent = create_scheduler_agent()
-                    print(f"DEBUG: Scheduler agent created: {scheduler_agent}")  # Debug
-
-                    # 3. Send selection email
-                    with st.status(
-                        "📧 Sending confirmation email...", expanded=True
-                    ) as status:
-                        print(
-                            f"DEBUG: Attempting to send email to {st.session_state.candidate_email}"
-                        )  # Debug
-                        send_selection_email(
-                            email_agent, st.session_state.candidate_email, role
-                        )
-                        print("DEBUG: Email sent successfully")  # Debug
-                        status.update(label="✅ Confirmation email sent!")
-
-                    # 4. Schedule interview
-                    with st.status(
-                        "📅 Scheduling interview...", expanded=True
-                    ) as status:
-                        print("DEBUG: Attempting to schedule interview")  # Debug
-                        schedule_interview(
-                            scheduler_agent,
-                            st.session_state.candidate_email,
-                            email_agent,
-                            role,
-                        )
-                        print("DEBUG: Interview scheduled successfully")  # Debug
-                        status.update(label="✅ Interview scheduled!")
-
-                    print("DEBUG: All processes completed successfully")  # Debug
-                    st.success(
-                        """
-                        🎉 Application Successfully Processed!
-                        
-                        Please check your email for:
-                        1. Selection confirmation ✅
-                        2. Interview details with Zoom link 🔗
-                        
-                        Next steps:
-                        1. Review the role requirements
-                        2. Prepare for your technical interview
-                        3. Join the interview 5 minutes early
+            try:
+                enqueue_post_selection(
+                    {key: st.session_state[key] for key in PIPELINE_SETTINGS}, role
+                )
+                st.success(
                     """
-                    )
-
-                except Exception as e:
-                    print(f"DEBUG: Error occurred: {str(e)}")  # Debug
-                    print(f"DEBUG: Error type: {type(e)}")  # Debug
-                    import traceback
-
-                    print(f"DEBUG: Full traceback: {traceback.format_exc()}")  # Debug
-                    st.error(f"An error occurred: {str(e)}")
-                    st.error("Please try again or contact support.")
+                    🎉 Application Successfully Processed!
+                    
+                    Please check your email shortly for:
+                    1. Selection confirmation ✅
+                    2. Interview details with Zoom link 🔗
+                    
+                    Next steps:
+                    1. Review the role requirements
+                    2. Prepare for your technical interview
+                    3. Join the interview 5 minutes early
+                """
+                )
+            except Exception as e:
+                logger.error(f"Error queueing application steps: {e}")
+                st.error(f"An error occurred: {str(e)}")
+                st.error("Please try again or contact support.")
+
+        queue = get_job_queue()
+        for kind, label in (
+            ("selection_email", "📧 Confirmation email"),
+            ("schedule_interview", "📅 Interview scheduling"),
+            ("interview_confirmation", "🔗 Interview details email"),
+        ):
+            job = queue.find(
+                idempotency_key(kind, st.session_state.candidate_email, role)
+            )
+            if job is not None:
+                st.caption(f"{label}: {JOB_STATUS_LABELS[job['status']]}")
 
     # Reset button
     if st.sidebar.button("Reset Application"):
@@ -0,0 +1,479 @@
+"""Headless batch screening of a whole folder (or archive) of resumes.
+
+Usage:
+    python batch.py --role "Senior AI ML Engineer" --provider OpenAI \\
+        --input resumes/ --output results.jsonl --concurrency 8
+
+The API key is read from ``--api-key`` or the provider's environment variable.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+from phi.utils.log import logger
+
+from agents import create_resume_analyzer_agent
+from analysis_cache import get_analysis_cache
+from llm_scheduler import analyze_resume_async, get_scheduler
+from model_cascade import (
+    CascadeConfig,
+    analyze_with_cascade,
+    analyze_with_cascade_async,
+    describe_cascade_usage,
+)
+from near_duplicates import DuplicateCheck, DuplicateIndex, get_duplicate_index
+from pdf_extraction import PdfExtractor
+from prefilter import PreFilter
+from prompt_cache import describe_cache_usage
+from results_store import ResultsStore, get_results_store
+from structured_output import parse_metrics
+import telemetry
+from tasks import load_job_descriptions, run_analysis
+from vector_index import VectorIndex
+
+API_KEY_ENV_VARS = {
+    "OpenAI": "OPENAI_API_KEY",
+    "Claude": "ANTHROPIC_API_KEY",
+    "Mistral": "MISTRAL_API_KEY",
+}
+
+
+@dataclass
+class BatchSummary:
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    duplicates: int = 0
+    llm_calls_saved: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def resumes_per_minute(self) -> float:
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.total * 60 / self.elapsed_seconds
+
+    def add(self, record: dict) -> None:
+        self.total += 1
+        if record["error"]:
+            self.failed += 1
+        else:
+            self.succeeded += 1
+        self.duplicates += "duplicate_of" in record
+        self.llm_calls_saved += bool(record.get("reused_verdict"))
+
+
+def iter_resumes(source: str) -> Iterator[Tuple[str, bytes]]:
+    """Yield ``(candidate_id, pdf_bytes)`` for every PDF in a directory or archive.
+
+    Files are read lazily so only the resumes currently in flight are held in
+    memory.
+    """
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    path = os.path.join(root, name)
+                    with open(path, "rb") as f:
+                        yield os.path.relpath(path, source), f.read()
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(".pdf"):
+                    yield info.filename, archive.read(info)
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith(".pdf"):
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        raise ValueError(f"{source} is neither a directory nor a zip/tar archive")
+
+
+@dataclass
+class BatchContext:
+    """Everything a worker needs to screen one resume for the batch's role."""
+
+    role: str
+    role_requirements: dict
+    model_provider: str
+    api_key: str
+    extractor: PdfExtractor
+    pre_filter: Optional[PreFilter] = None
+    index: Optional[VectorIndex] = None
+    cascade: Optional[CascadeConfig] = None
+    duplicates: Optional[DuplicateIndex] = None
+    results: Optional[ResultsStore] = None
+    _duplicate_checks: Dict[str, DuplicateCheck] = field(
+        default_factory=dict, repr=False
+    )
+
+    def prepare(self, candidate_id: str, resume_text: str) -> Optional[dict]:
+        """Index the resume and return the verdict that stands in for the LLM's
+        (a near-duplicate's, or the pre-filter's rejection), or None when the
+        resume should go on to the LLM.
+        """
+        if not resume_text.strip():
+            raise ValueError("No text could be extracted from the PDF")
+        if self.index is not None:
+            self.index.add(candidate_id, resume_text)
+        if self.duplicates is not None:
+            with telemetry.span("duplicate_check") as stage:
+                check = self.duplicates.add(candidate_id, resume_text, self.role)
+                stage.set(
+                    duplicate=check.match is not None,
+                    reused=check.verdict is not None,
+                )
+            self._duplicate_checks[candidate_id] = check
+            if check.verdict is not None:
+                return {**check.verdict, "reused_verdict": True}
+        if self.pre_filter is None:
+            return None
+        forward, verdict = self.pre_filter.screen(resume_text)
+        if forward:
+            return None
+        return {**verdict, "prefiltered": True}
+
+    def remember(self, candidate_id: str, record: dict) -> None:
+        """Flag a near-duplicate's record, store a fresh LLM verdict so later
+        copies of the resume can reuse it, and record the verdict for queries.
+        """
+        check = self._duplicate_checks.pop(candidate_id, None)
+        if check is not None:
+            if not (
+                record["error"]
+                or record.get("prefiltered")
+                or record.get("reused_verdict")
+            ):
+                verdict = {
+                    key: value
+                    for key, value in record.items()
+                    if key not in ("candidate", "role", "error")
+                }
+                self.duplicates.record_verdict(check.resume_id, self.role, verdict)
+            if check.match is not None:
+                record["duplicate_of"] = check.match.candidate
+                record["duplicate_similarity"] = round(check.match.similarity, 3)
+        if self.results is not None:
+            self.results.add_records([record], source="batch")
+
+
+def screen_resume(candidate_id: str, pdf_bytes: bytes, ctx: BatchContext) -> dict:
+    """Extract and analyze a single resume, returning its result record."""
+    started = time.perf_counter()
+    record = {"candidate": candidate_id, "role": ctx.role, "error": None}
+    with telemetry.span(
+        "screen_resume", candidate=candidate_id, role=ctx.role
+    ) as stage:
+        try:
+            with telemetry.span("extraction"):
+                resume_text = ctx.extractor.extract(pdf_bytes)
+            rejection = ctx.prepare(candidate_id, resume_text)
+            if rejection:
+                record.update(rejection)
+            elif ctx.cascade is not None:
+                record.update(
+                    analyze_with_cascade(
+                        resume_text,
+                        ctx.role_requirements,
+                        ctx.role,
+                        ctx.model_provider,
+                        ctx.api_key,
+                        ctx.cascade,
+                        cache=get_analysis_cache(),
+                    )
+                )
+            else:
+                # Agents keep per-run state, so each candidate gets its own.
+                analyzer = create_resume_analyzer_agent(ctx.model_provider, ctx.api_key)
+                record.update(
+                    run_analysis(
+                        resume_text,
+                        ctx.role_requirements,
+                        ctx.role,
+                        analyzer,
+                        cache=get_analysis_cache(),
+                    )
+                )
+        except Exception as e:
+            logger.error(f"Error screening {candidate_id}: {e}")
+            record["error"] = str(e)
+            stage.set(error=str(e))
+    ctx.remember(candidate_id, record)
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+async def screen_resume_async(
+    candidate_id: str, pdf_bytes: bytes, ctx: BatchContext
+) -> dict:
+    """Like :func:`screen_resume`, but analyzes through the provider's rate limiter."""
+    started = time.perf_counter()
+    record = {"candidate": candidate_id, "role": ctx.role, "error": None}
+    with telemetry.span(
+        "screen_resume", candidate=candidate_id, role=ctx.role
+    ) as stage:
+        try:
+            with telemetry.span("extraction"):
+                resume_text = await ctx.extractor.extract_async(pdf_bytes)
+            rejection = ctx.prepare(candidate_id, resume_text)
+            if rejection:
+                record.update(rejection)
+            elif ctx.cascade is not None:
+                record.update(
+                    await analyze_with_cascade_async(
+                        resume_text,
+                        ctx.role_requirements,
+                        ctx.role,
+                        ctx.model_provider,
+                        ctx.api_key,
+                        ctx.cascade,
+                        cache=get_analysis_cache(),
+                    )
+                )
+            else:
+                analyzer = create_resume_analyzer_agent(ctx.model_provider, ctx.api_key)
+                record.update(
+                    await analyze_resume_async(
+                        resume_text,
+                        ctx.role_requirements,
+                        ctx.role,
+                        analyzer,
+                        get_scheduler(ctx.model_provider),
+                        cache=get_analysis_cache(),
+                    )
+                )
+        except Exception as e:
+            logger.error(f"Error screening {candidate_id}: {e}")
+            record["error"] = str(e)
+            stage.set(error=str(e))
+    ctx.remember(candidate_id, record)
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+async def _screen_all_async(
+    source: str, out, summary: BatchSummary, max_in_flight: int, ctx: BatchContext
+) -> None:
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def one(candidate_id: str, pdf_bytes: bytes) -> None:
+        try:
+            record = await screen_resume_async(candidate_id, pdf_bytes, ctx)
+        finally:
+            semaphore.release()
+        out.write(json.dumps(record) + "\n")
+        summary.add(record)
+
+    tasks = []
+    for candidate_id, pdf_bytes in iter_resumes(source):
+        # Only read the next PDF once a slot is free.
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(one(candidate_id, pdf_bytes)))
+    await asyncio.gather(*tasks)
+
+
+def _screen_all(
+    source: str, out, summary: BatchSummary, concurrency: int, ctx: BatchContext
+) -> None:
+    with ThreadPoolExecutor(concurrency) as pool:
+        pending = set()
+
+        def drain(return_when):
+            nonlocal pending
+            done, pending = wait(pending, return_when=return_when)
+            for future in done:
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                summary.add(record)
+
+        for candidate_id, pdf_bytes in iter_resumes(source):
+            if len(pending) >= concurrency:
+                drain(FIRST_COMPLETED)
+            pending.add(pool.submit(screen_resume, candidate_id, pdf_bytes, ctx))
+        if pending:
+            drain(ALL_COMPLETED)
+
+
+def run_batch(
+    source: str,
+    role: str,
+    model_provider: str,
+    api_key: str,
+    output_path: str,
+    concurrency: int = 4,
+    use_async: bool = False,
+    max_pages: Optional[int] = None,
+    min_score: Optional[float] = None,
+    index_dir: Optional[str] = None,
+    cascade: Optional[CascadeConfig] = None,
+    dedup: bool = False,
+    store_results: bool = True,
+) -> BatchSummary:
+    """Screen every resume in ``source`` against ``role`` and write JSONL records.
+
+    At most ``concurrency`` resumes are extracted and analyzed at once. With
+    ``use_async`` the analyses run on the event loop behind the provider's
+    rate-limit scheduler instead of in a thread pool. PDFs are parsed in a
+    process pool and only the first ``max_pages`` pages are read. With
+    ``min_score`` set, resumes covering less than that fraction of the role's
+    required skills are rejected by the local pre-filter without an LLM call.
+    With ``index_dir`` set, every extracted resume is also added to the
+    similarity index there, for ranking the pool later. With ``cascade`` set,
+    each resume goes to a small model first and only uncertain verdicts are
+    escalated to the large one. With ``dedup`` set, near-duplicates of resumes
+    seen before (in this or earlier batches) are flagged, and reuse the
+    earlier verdict instead of being analyzed when there is one for the role.
+    Unless ``store_results`` is off, verdicts are also recorded in the
+    results store for recruiter queries.
+    """
+    job_descriptions = load_job_descriptions()
+    if role not in job_descriptions:
+        raise KeyError(f"Unknown role '{role}'")
+    role_requirements = job_descriptions[role]
+
+    summary = BatchSummary()
+    started = time.perf_counter()
+    ctx = BatchContext(
+        role=role,
+        role_requirements=role_requirements,
+        model_provider=model_provider,
+        api_key=api_key,
+        extractor=PdfExtractor(max_pages=max_pages),
+        pre_filter=(
+            PreFilter(role_requirements, threshold=min_score)
+            if min_score is not None
+            else None
+        ),
+        index=VectorIndex(index_dir) if index_dir else None,
+        cascade=cascade,
+        duplicates=get_duplicate_index() if dedup else None,
+        results=get_results_store() if store_results else None,
+    )
+    with open(output_path, "w") as out, ctx.extractor:
+        if use_async:
+            asyncio.run(_screen_all_async(source, out, summary, concurrency, ctx))
+        else:
+            _screen_all(source, out, summary, concurrency, ctx)
+
+    summary.elapsed_seconds = time.perf_counter() - started
+    cache_stats = get_analysis_cache().stats()
+    logger.info(
+        f"Analysis cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses"
+    )
+    logger.info(
+        f"Screened {summary.total} resumes ({summary.failed} failed) in "
+        f"{summary.elapsed_seconds:.1f}s: "
+        f"{summary.resumes_per_minute:.1f} resumes/minute"
+    )
+    if ctx.duplicates is not None:
+        logger.info(
+            f"Found {summary.duplicates} near-duplicate resumes, "
+            f"{summary.llm_calls_saved} reusing an earlier verdict"
+        )
+    if ctx.pre_filter is not None:
+        summary.llm_calls_saved += ctx.pre_filter.llm_calls_saved
+        logger.info(f"Pre-filter saved {ctx.pre_filter.llm_calls_saved} LLM calls")
+    return summary
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Screen a folder of resumes.")
+    parser.add_argument("--input", required=True, help="Directory or zip/tar of PDFs")
+    parser.add_argument("--role", required=True, help="Key in job_descriptions.json")
+    parser.add_argument("--provider", choices=list(API_KEY_ENV_VARS), default="OpenAI")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--output", default="results.jsonl")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run analyses on an event loop behind the provider rate limiter",
+    )
+    parser.add_argument(
+        "--max-pages", type=int, default=None, help="Only read the first N pages"
+    )
+    parser.add_argument(
+        "--min-score",
+        type=float,
+        default=None,
+        help="Reject without an LLM call below this required-skill coverage (0-1)",
+    )
+    parser.add_argument(
+        "--index", default=None, help="Also add resumes to the similarity index here"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Flag near-duplicate resumes and reuse their earlier verdicts",
+    )
+    parser.add_argument(
+        "--no-store",
+        dest="store_results",
+        action="store_false",
+        help="Do not record verdicts in the results store",
+    )
+    parser.add_argument(
+        "--cascade",
+        action="store_true",
+        help="Analyze with a small model first and escalate uncertain verdicts",
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=CascadeConfig.min_confidence,
+        help="Cascade: escalate verdicts with a lower confidence than this",
+    )
+    args = parser.parse_args(argv)
+    telemetry.configure()
+
+    api_key = args.api_key or os.environ.get(API_KEY_ENV_VARS[args.provider])
+    if not api_key:
+        parser.error(
+            f"Pass --api-key or set {API_KEY_ENV_VARS[args.provider]} for {args.provider}"
+        )
+
+    summary = run_batch(
+        args.input,
+        args.role,
+        args.provider,
+        api_key,
+        args.output,
+        concurrency=args.concurrency,
+        use_async=args.use_async,
+        max_pages=args.max_pages,
+        min_score=args.min_score,
+        index_dir=args.index,
+        cascade=(
+            CascadeConfig(min_confidence=args.min_confidence) if args.cascade else None
+        ),
+        dedup=args.dedup,
+        store_results=args.store_results,
+    )
+    print(
+        f"{summary.total} resumes, {summary.succeeded} analyzed, "
+        f"{summary.failed} failed, {summary.duplicates} near-duplicates, "
+        f"{summary.llm_calls_saved} LLM calls saved, "
+        f"{summary.resumes_per_minute:.1f} resumes/minute"
+    )
+    for line in describe_cache_usage() + describe_cascade_usage():
+        print(line)
+    parsing = parse_metrics.stats()
+    print(
+        f"Parsing: {parsing['tolerant']} needed cleanup, {parsing['repaired']} "
+        f"repaired with {parsing['repair_calls']} repair calls, "
+        f"{parsing['failed']} failed ({parsing['failure_rate']:.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
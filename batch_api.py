@@ -0,0 +1,460 @@
+"""Overnight bulk screening through the providers' asynchronous batch APIs.
+
+OpenAI and Anthropic process batch jobs within 24 hours at a discount and
+outside the regular rate limits. ``submit`` serializes one analysis request
+per resume, uploads them as as many batches as the providers' per-batch
+limits require and records a job manifest; ``collect`` polls the batches and
+maps results back to candidates, validating each verdict exactly like
+``analyze_resume`` does, and records the verdicts in the results store.
+Resumes whose text cannot be extracted are skipped at submission and
+reported with an error by ``collect``.
+
+Usage:
+    python batch_api.py submit --input resumes/ --role "Senior AI ML Engineer" \\
+        --provider OpenAI
+    python batch_api.py collect --job data/batch_jobs/<batch id>.json \\
+        --output results.jsonl --wait
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from anthropic import Anthropic
+from openai import OpenAI
+from phi.utils.log import logger
+
+from agents import MODEL_IDS, analyzer_system_prompt
+from batch import API_KEY_ENV_VARS, iter_resumes
+from pdf_extraction import PdfExtractor
+from results_store import get_results_store
+from resume_compaction import compaction_metrics
+from prompt_cache import (
+    cacheable_content,
+    describe_cache_usage,
+    record_anthropic_usage,
+    record_openai_usage,
+)
+from structured_output import parse_metrics, structured_model_params
+from tasks import (
+    build_analysis_prefix,
+    build_analysis_suffix,
+    load_job_descriptions,
+    parse_analysis_content,
+)
+
+BATCH_JOBS_DIR = "data/batch_jobs"
+BATCH_PROVIDERS = ("OpenAI", "Claude")
+MAX_OUTPUT_TOKENS = 1024
+OPENAI_DONE_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# (requests, bytes) per batch: OpenAI's input file limit and Anthropic's
+# request size limit, with room for the file and JSON envelopes.
+BATCH_LIMITS: Dict[str, Tuple[int, int]] = {
+    "OpenAI": (50_000, 190 * 1024 * 1024),
+    "Claude": (100_000, 250 * 1024 * 1024),
+}
+
+
+@dataclass
+class BatchJob:
+    """What is needed to collect a submitted batch, possibly after a restart."""
+
+    model_provider: str
+    batch_ids: List[str]
+    role: str
+    # custom_id -> candidate id; providers restrict the characters in custom ids.
+    candidates: Dict[str, str] = field(default_factory=dict)
+    base_url: Optional[str] = None
+    submitted_at: float = 0.0
+    # candidate id -> why the resume was not submitted.
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def batch_id(self) -> str:
+        """The first batch, which names the job."""
+        return self.batch_ids[0]
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(BATCH_JOBS_DIR, f"{self.batch_id}.json")
+
+    def save(self) -> str:
+        os.makedirs(BATCH_JOBS_DIR, exist_ok=True)
+        with open(self.manifest_path, "w") as f:
+            json.dump(asdict(self), f, indent=4)
+        return self.manifest_path
+
+    @classmethod
+    def load(cls, path: str) -> "BatchJob":
+        with open(path, "r") as f:
+            manifest = json.load(f)
+        # Manifests written before jobs were split into several batches.
+        if "batch_id" in manifest:
+            manifest["batch_ids"] = [manifest.pop("batch_id")]
+        return cls(**manifest)
+
+
+def build_batch_request(
+    custom_id: str,
+    resume_text: str,
+    role: str,
+    role_requirements: dict,
+    model_provider: str,
+) -> dict:
+    """One batch line carrying the same prompt ``analyze_resume`` sends."""
+    # The role prefix is identical across the batch, so it is cached after the
+    # first request (automatically for OpenAI, via cache_control for Claude).
+    prefix = build_analysis_prefix(role_requirements, role)
+    suffix = build_analysis_suffix(resume_text, model_provider)
+    if model_provider == "OpenAI":
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": MODEL_IDS["OpenAI"],
+                "max_tokens": MAX_OUTPUT_TOKENS,
+                "messages": [
+                    {"role": "system", "content": analyzer_system_prompt()},
+                    {"role": "user", "content": prefix + suffix},
+                ],
+                **structured_model_params("OpenAI"),
+            },
+        }
+    if model_provider == "Claude":
+        return {
+            "custom_id": custom_id,
+            "params": {
+                "model": MODEL_IDS["Claude"],
+                "max_tokens": MAX_OUTPUT_TOKENS,
+                "system": analyzer_system_prompt(),
+                "messages": [
+                    {"role": "user", "content": cacheable_content(prefix, suffix)}
+                ],
+                **structured_model_params("Claude")["request_params"],
+            },
+        }
+    raise ValueError(f"{model_provider} has no supported batch API")
+
+
+def _openai_client(api_key: str, base_url: Optional[str]) -> OpenAI:
+    return OpenAI(api_key=api_key, base_url=base_url)
+
+
+def _anthropic_client(api_key: str, base_url: Optional[str]) -> Anthropic:
+    return Anthropic(api_key=api_key, base_url=base_url)
+
+
+def chunk_requests(
+    requests: List[dict], max_requests: int, max_bytes: int
+) -> Iterator[List[dict]]:
+    """Split batch lines into chunks of at most ``max_requests`` lines and
+    ``max_bytes`` of serialized JSON.
+    """
+    chunk: List[dict] = []
+    size = 0
+    for request in requests:
+        # One byte for the newline or comma that separates lines.
+        request_size = len(json.dumps(request).encode("utf-8")) + 1
+        if request_size > max_bytes:
+            raise ValueError(f"Request {request['custom_id']} exceeds the batch size")
+        if chunk and (len(chunk) == max_requests or size + request_size > max_bytes):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(request)
+        size += request_size
+    if chunk:
+        yield chunk
+
+
+def _create_batch(
+    requests: List[dict],
+    role: str,
+    model_provider: str,
+    api_key: str,
+    base_url: Optional[str],
+) -> str:
+    """Upload one chunk of batch lines and return the provider's batch id."""
+    if model_provider == "OpenAI":
+        client = _openai_client(api_key, base_url)
+        job_file = io.BytesIO(
+            "".join(json.dumps(r) + "\n" for r in requests).encode("utf-8")
+        )
+        uploaded = client.files.create(
+            file=("analysis_batch.jsonl", job_file), purpose="batch"
+        )
+        return client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+            metadata={"role": role[:512]},
+        ).id
+    if model_provider == "Claude":
+        client = _anthropic_client(api_key, base_url)
+        return client.messages.batches.create(requests=requests).id
+    raise ValueError(f"{model_provider} has no supported batch API")
+
+
+def submit_batch(
+    resumes: Iterable[Tuple[str, str]],
+    role: str,
+    role_requirements: dict,
+    model_provider: str,
+    api_key: str,
+    base_url: Optional[str] = None,
+    errors: Optional[Dict[str, str]] = None,
+) -> BatchJob:
+    """Submit ``(candidate_id, resume_text)`` pairs as one job of as many
+    batches as ``BATCH_LIMITS`` require.
+
+    ``errors`` maps candidates that could not be submitted to the reason, so
+    that ``collect`` reports them along with the results.
+    """
+    if model_provider not in BATCH_LIMITS:
+        raise ValueError(f"{model_provider} has no supported batch API")
+    candidates: Dict[str, str] = {}
+    requests: List[dict] = []
+    for number, (candidate_id, resume_text) in enumerate(resumes):
+        custom_id = f"candidate-{number:06d}"
+        candidates[custom_id] = candidate_id
+        requests.append(
+            build_batch_request(
+                custom_id, resume_text, role, role_requirements, model_provider
+            )
+        )
+    if not requests:
+        raise ValueError("No resumes to submit")
+
+    job = BatchJob(
+        model_provider=model_provider,
+        batch_ids=[],
+        role=role,
+        candidates=candidates,
+        base_url=base_url,
+        submitted_at=time.time(),
+        errors=dict(errors or {}),
+    )
+    for chunk in chunk_requests(requests, *BATCH_LIMITS[model_provider]):
+        job.batch_ids.append(
+            _create_batch(chunk, role, model_provider, api_key, base_url)
+        )
+        # Saved after every batch, so a failure part-way leaves a manifest for
+        # the batches already submitted; the rest are reported as missing.
+        job.save()
+        logger.info(f"Submitted batch {job.batch_ids[-1]} with {len(chunk)} resumes")
+    return job
+
+
+def batch_status(job: BatchJob, api_key: str) -> Tuple[str, bool]:
+    """Return the provider's status string and whether every batch of the job
+    is finished. Batches in different states are listed in one string.
+    """
+    statuses = []
+    done = True
+    for batch_id in job.batch_ids:
+        if job.model_provider == "OpenAI":
+            batch = _openai_client(api_key, job.base_url).batches.retrieve(batch_id)
+            status = batch.status
+            done = done and status in OPENAI_DONE_STATUSES
+        else:
+            batch = _anthropic_client(api_key, job.base_url).messages.batches.retrieve(
+                batch_id
+            )
+            status = batch.processing_status
+            done = done and status == "ended"
+        if status not in statuses:
+            statuses.append(status)
+    return ", ".join(statuses), done
+
+
+def wait_for_batch(
+    job: BatchJob,
+    api_key: str,
+    poll_interval: float = 60.0,
+    timeout: Optional[float] = None,
+) -> str:
+    started = time.monotonic()
+    while True:
+        status, done = batch_status(job, api_key)
+        if done:
+            return status
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"Batch {job.batch_id} still {status}")
+        logger.info(f"Batch {job.batch_id} is {status}; polling again shortly")
+        time.sleep(poll_interval)
+
+
+def _iter_raw_results(
+    job: BatchJob, api_key: str
+) -> Iterator[Tuple[str, Union[str, Exception]]]:
+    """Yield ``(custom_id, assistant text)``, with an exception in place of the
+    text for requests the provider failed.
+    """
+    for batch_id in job.batch_ids:
+        yield from _iter_batch_results(job, batch_id, api_key)
+
+
+def _iter_batch_results(
+    job: BatchJob, batch_id: str, api_key: str
+) -> Iterator[Tuple[str, Union[str, Exception]]]:
+    if job.model_provider == "OpenAI":
+        client = _openai_client(api_key, job.base_url)
+        batch = client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                if entry.get("error") or response.get("status_code") != 200:
+                    yield entry["custom_id"], ValueError(
+                        str(entry.get("error") or response.get("body"))
+                    )
+                else:
+                    if response["body"].get("usage"):
+                        record_openai_usage(response["body"]["usage"])
+                    message = response["body"]["choices"][0]["message"]
+                    yield entry["custom_id"], message["content"]
+    else:
+        client = _anthropic_client(api_key, job.base_url)
+        for entry in client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                record_anthropic_usage(entry.result.message.usage)
+                text = "".join(
+                    (
+                        json.dumps(block.input)
+                        if block.type == "tool_use"
+                        else getattr(block, "text", "")
+                    )
+                    for block in entry.result.message.content
+                )
+                yield entry.custom_id, text
+            else:
+                yield entry.custom_id, ValueError(f"Request {entry.result.type}")
+
+
+def fetch_batch_results(job: BatchJob, api_key: str) -> Iterator[dict]:
+    """Yield one result record per candidate of a finished batch."""
+    seen = set()
+    for custom_id, content in _iter_raw_results(job, api_key):
+        seen.add(custom_id)
+        record = {
+            "candidate": job.candidates.get(custom_id, custom_id),
+            "role": job.role,
+            "error": None,
+        }
+        try:
+            if isinstance(content, Exception):
+                raise content
+            record.update(parse_analysis_content(content))
+        except (json.JSONDecodeError, ValueError) as e:
+            record["error"] = f"Error analyzing resume: {str(e)}"
+        yield record
+    for custom_id, candidate_id in job.candidates.items():
+        if custom_id not in seen:
+            yield {
+                "candidate": candidate_id,
+                "role": job.role,
+                "error": "No result returned by the batch",
+            }
+    for candidate_id, error in job.errors.items():
+        yield {"candidate": candidate_id, "role": job.role, "error": error}
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Screen resumes via batch APIs.")
+    parser.add_argument("--api-key", default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    submit = commands.add_parser("submit")
+    submit.add_argument("--input", required=True, help="Directory or zip/tar of PDFs")
+    submit.add_argument("--role", required=True)
+    submit.add_argument("--provider", choices=BATCH_PROVIDERS, default="OpenAI")
+    submit.add_argument("--base-url", default=None)
+    collect = commands.add_parser("collect")
+    collect.add_argument("--job", required=True, help="Manifest written by submit")
+    collect.add_argument("--output", default="results.jsonl")
+    collect.add_argument("--wait", action="store_true")
+    collect.add_argument("--poll-interval", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        provider = args.provider
+    else:
+        job = BatchJob.load(args.job)
+        provider = job.model_provider
+    api_key = args.api_key or os.environ.get(API_KEY_ENV_VARS[provider])
+    if not api_key:
+        parser.error(f"Pass --api-key or set {API_KEY_ENV_VARS[provider]}")
+
+    if args.command == "submit":
+        role_requirements = load_job_descriptions()[args.role]
+        resumes: List[Tuple[str, str]] = []
+        errors: Dict[str, str] = {}
+        with PdfExtractor() as extractor:
+            for candidate_id, pdf_bytes in iter_resumes(args.input):
+                try:
+                    resume_text = extractor.extract(pdf_bytes)
+                    if not resume_text.strip():
+                        raise ValueError("No text could be extracted from the PDF")
+                except Exception as e:
+                    logger.error(f"Error extracting {candidate_id}: {e}")
+                    errors[candidate_id] = str(e)
+                    continue
+                resumes.append((candidate_id, resume_text))
+        job = submit_batch(
+            resumes,
+            args.role,
+            role_requirements,
+            provider,
+            api_key,
+            args.base_url,
+            errors=errors,
+        )
+        print(
+            f"Submitted {len(job.candidates)} resumes in {len(job.batch_ids)} "
+            f"batches, skipped {len(errors)} unreadable; "
+            f"manifest: {job.manifest_path}"
+        )
+        compaction = compaction_metrics.stats()
+        print(
+            f"Resume tokens {compaction['tokens_before']} -> "
+            f"{compaction['tokens_after']} ({compaction['saved_ratio']:.0%} saved, "
+            f"{compaction['truncated']} truncated)"
+        )
+        return
+
+    if args.wait:
+        status = wait_for_batch(job, api_key, poll_interval=args.poll_interval)
+    else:
+        status, done = batch_status(job, api_key)
+        if not done:
+            print(f"Batch {job.batch_id} is still {status}")
+            return
+    records = []
+    with open(args.output, "w") as out:
+        for record in fetch_batch_results(job, api_key):
+            out.write(json.dumps(record) + "\n")
+            records.append(record)
+    recorded = get_results_store().add_records(records, source="batch_api")
+    failed = sum(bool(record["error"]) for record in records)
+    print(
+        f"Batch {job.batch_id} {status}: {len(records)} results, {failed} failed, "
+        f"{recorded} recorded"
+    )
+    for line in describe_cache_usage():
+        print(line)
+    parsing = parse_metrics.stats()
+    print(
+        f"Parsing: {parsing['tolerant']} needed cleanup, "
+        f"{parsing['failed']} failed ({parsing['failure_rate']:.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
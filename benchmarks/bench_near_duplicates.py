@@ -0,0 +1,99 @@
+"""Benchmark near-duplicate detection: lookup and insert latency, detection rate.
+
+Builds a pool of distinct synthetic resumes, then adds lightly edited copies
+of some of them (words dropped, swapped and appended, as in a resubmitted CV)
+and reports how many were caught and how many distinct resumes were flagged.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_near_duplicates --resumes 20000 --copies 1000
+"""
+
+import argparse
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import List
+
+from phi.utils.log import logger
+
+from near_duplicates import DuplicateIndex
+
+VOCABULARY_SIZE = 20_000
+
+
+def distinct_resume(rng: random.Random, vocabulary: List[str]) -> str:
+    return " ".join(rng.choices(vocabulary, k=rng.randint(200, 700)))
+
+
+def edited_copy(rng: random.Random, text: str, edit_rate: float) -> str:
+    """``text`` with about ``edit_rate`` of its words dropped or replaced."""
+    words = []
+    for word in text.split():
+        roll = rng.random()
+        if roll < edit_rate / 2:
+            continue
+        words.append(f"{word}x" if roll < edit_rate else word)
+    return " ".join(words) + " Phone: +1 555 0100, updated"
+
+
+def percentile(sorted_values: List[float], share: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(share * len(sorted_values)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resumes", type=int, default=20_000)
+    parser.add_argument("--copies", type=int, default=1000)
+    parser.add_argument("--edit-rate", type=float, default=0.03)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # One log line per caught copy would dominate the timings.
+    logger.setLevel(logging.WARNING)
+    rng = random.Random(args.seed)
+    vocabulary = [f"w{number}" for number in range(VOCABULARY_SIZE)]
+    corpus = [distinct_resume(rng, vocabulary) for _ in range(args.resumes)]
+    copies = [
+        edited_copy(rng, rng.choice(corpus), args.edit_rate) for _ in range(args.copies)
+    ]
+
+    directory = tempfile.mkdtemp(prefix="near_duplicates_")
+    try:
+        index = DuplicateIndex(os.path.join(directory, "index.sqlite3"))
+        latencies, lookups = [], []
+        false_positives = 0
+        for number, text in enumerate(corpus):
+            started = time.perf_counter()
+            check = index.add(f"candidate-{number}", text, role="Engineer")
+            latencies.append(time.perf_counter() - started)
+            false_positives += check.match is not None
+        caught = 0
+        for number, text in enumerate(copies):
+            started = time.perf_counter()
+            index.find(text)
+            lookups.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            check = index.add(f"copy-{number}", text, role="Engineer")
+            latencies.append(time.perf_counter() - started)
+            caught += check.match is not None
+    finally:
+        shutil.rmtree(directory)
+
+    for name, values in (("lookups", lookups), ("inserts", latencies)):
+        values.sort()
+        print(
+            f"{len(values)} {name}: p50 {percentile(values, 0.5) * 1000:.3f} ms, "
+            f"p95 {percentile(values, 0.95) * 1000:.3f} ms, "
+            f"p99 {percentile(values, 0.99) * 1000:.3f} ms"
+        )
+    print(
+        f"caught {caught}/{len(copies)} edited copies, "
+        f"{false_positives}/{len(corpus)} distinct resumes flagged"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""End-to-end pipeline benchmark against local fakes.
+
+Runs every stage a candidate goes through on synthetic resume PDFs, with
+``fakes.FakeAnalyzer`` in place of the LLM, ``fakes.FakeSmtpServer`` as the
+mail server and ``fakes.FakeZoomServer`` for Zoom OAuth and meetings, and
+reports per-stage latency percentiles, throughput and peak memory:
+
+- extraction: ``PdfExtractor`` with an empty text cache;
+- analysis: ``run_analysis`` (prompt building, compaction, parsing, repair);
+- analysis_async: ``analyze_resume_async`` behind a rate-limit scheduler
+  with limits too high to pace it;
+- email: ``Mailer.send`` through the outbox and pooled SMTP connections;
+- scheduling: ``schedule_interviews`` (slot book, allocation, Zoom).
+
+Nothing touches the network or the app's data directory. ``--output``
+writes the report as JSON; ``--baseline`` compares with a saved report and
+exits non-zero when a stage's p95 or throughput regressed. A stage in
+which every item failed also makes it exit non-zero.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pipeline --candidates 10 1000 10000
+    python -m benchmarks.bench_pipeline --candidates 1000 --output bench.json
+    python -m benchmarks.bench_pipeline --candidates 1000 --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import zoom_client
+from benchmarks.synthetic_pdf import synthetic_resume_pdf
+from fakes import FakeAnalyzer, FakeSmtpServer, FakeZoomServer
+from llm_scheduler import ProviderLimits, RateLimitScheduler, analyze_resume_async
+from mailer import Mailer, Outbox, SmtpConfig
+from pdf_extraction import PdfExtractor, PdfTextCache
+from slot_allocator import (
+    InterviewRequest,
+    Interviewer,
+    SlotAllocator,
+    SlotBook,
+    schedule_interviews,
+)
+from tasks import load_job_descriptions, run_analysis
+
+STAGES = ("extraction", "analysis", "analysis_async", "email", "scheduling")
+# A stage regressed when its p95 grew, or its throughput fell, by more than this.
+REGRESSION_TOLERANCE = 0.2
+
+
+def percentile(sorted_values: Sequence[float], share: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(share * len(sorted_values)))]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_stage(
+    name: str,
+    items: Sequence,
+    work: Callable,
+    concurrency: int,
+    trace_memory: bool = False,
+) -> Tuple[dict, list]:
+    """Run ``work`` on every item and time each call.
+
+    Returns the stage's statistics and the results, with None where ``work``
+    raised.
+    """
+
+    def timed(item):
+        started = time.perf_counter()
+        try:
+            result = work(item)
+        except Exception as e:
+            return time.perf_counter() - started, None, e
+        return time.perf_counter() - started, result, None
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        runs = list(pool.map(timed, items))
+    elapsed = time.perf_counter() - started
+    traced_peak = None
+    if trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    latencies = sorted(seconds for seconds, _, _ in runs)
+    errors = [error for _, _, error in runs if error is not None]
+    if errors:
+        print(f"  {name}: {len(errors)} errors, first: {errors[0]!r}", file=sys.stderr)
+    stats = {
+        "stage": name,
+        "items": len(runs),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "per_second": len(runs) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "traced_peak_mb": traced_peak,
+    }
+    return stats, [result for _, result, _ in runs]
+
+
+def run_pipeline(candidates: int, args, directory: str) -> List[dict]:
+    """Push ``candidates`` synthetic resumes through every stage."""
+    rng = random.Random(args.seed)
+    pdfs = [synthetic_resume_pdf(rng, rng.random()) for _ in range(candidates)]
+    emails = [f"candidate-{number}@example.com" for number in range(candidates)]
+    role_requirements = load_job_descriptions()[args.role]
+    report = []
+
+    with PdfExtractor(args.workers, PdfTextCache(f"{directory}/pdf_text")) as extractor:
+        stats, texts = run_stage(
+            "extraction",
+            pdfs,
+            extractor.extract,
+            args.concurrency,
+            args.trace_memory,
+        )
+    report.append(stats)
+
+    def analyzer(number: int) -> FakeAnalyzer:
+        return FakeAnalyzer(
+            latency=args.llm_latency,
+            jitter=args.llm_jitter,
+            error_rate=args.llm_error_rate,
+            output_tokens=args.llm_output_tokens,
+            seed=args.seed + number,
+        )
+
+    def analyze(item):
+        number, text = item
+        return run_analysis(text or "", role_requirements, args.role, analyzer(number))
+
+    stats, verdicts = run_stage(
+        "analysis",
+        list(enumerate(texts)),
+        analyze,
+        args.concurrency,
+        args.trace_memory,
+    )
+    report.append(stats)
+
+    scheduler = RateLimitScheduler(ProviderLimits(1e9, 1e12))
+
+    def analyze_async(item):
+        number, text = item
+        return asyncio.run(
+            analyze_resume_async(
+                text or "", role_requirements, args.role, analyzer(number), scheduler
+            )
+        )
+
+    stats, _ = run_stage(
+        "analysis_async",
+        list(enumerate(texts)),
+        analyze_async,
+        args.concurrency,
+        args.trace_memory,
+    )
+    report.append(stats)
+
+    with FakeSmtpServer(fail_rate=args.smtp_fail_rate, seed=args.seed) as smtp:
+        config = SmtpConfig(
+            smtp.host, smtp.port, "recruiting@example.com", "passkey", use_ssl=False
+        )
+        # No send pacing: the benchmark measures the mailer, not the provider's limit.
+        mailer = Mailer(config, Outbox(f"{directory}/outbox.sqlite3"), rate=(1e9, 1e9))
+
+        def send(item):
+            email, verdict = item
+            selected = bool(verdict and verdict["selected"])
+            feedback = verdict["feedback"] if verdict else "We could not review it."
+            subject = (
+                f"Interview invitation: {args.role}"
+                if selected
+                else f"Your application for {args.role}"
+            )
+            status = mailer.send(email, subject, feedback, "Benchmark Inc.")
+            if status != "sent":
+                raise RuntimeError(f"Email to {email} was not accepted ({status})")
+
+        stats, _ = run_stage(
+            "email",
+            list(zip(emails, verdicts)),
+            send,
+            args.concurrency,
+            args.trace_memory,
+        )
+        mailer.close()
+    report.append(stats)
+
+    selected = [
+        email
+        for email, verdict in zip(emails, verdicts)
+        if verdict and verdict["selected"]
+    ]
+    batches = [
+        selected[start : start + args.schedule_batch]
+        for start in range(0, len(selected), args.schedule_batch)
+    ]
+    interviewers = [
+        Interviewer(f"interviewer-{number}") for number in range(args.interviewers)
+    ]
+    book = SlotBook(f"{directory}/interview_slots.sqlite3")
+    with FakeZoomServer(latency=args.zoom_latency, seed=args.seed) as zoom_server:
+        zoom = zoom_client.ZoomClient(
+            "account",
+            "client",
+            "secret",
+            api_url=zoom_server.api_url,
+            token_url=zoom_server.token_url,
+            # Zoom's real create limit would make the stage measure the pacing only.
+            meeting_create_rate=(1e9, 1e9),
+        )
+
+        def schedule(batch):
+            # As in the app, every booking starts from the interviewers' calendars.
+            allocator = SlotAllocator(interviewers, horizon=timedelta(days=365))
+            bookings = schedule_interviews(
+                [InterviewRequest(email, args.role) for email in batch],
+                zoom,
+                allocator,
+                book,
+            )
+            missing = sum(booking is None for booking in bookings)
+            if missing:
+                raise RuntimeError(f"{missing} of {len(batch)} interviews not booked")
+
+        stats, _ = run_stage(
+            "scheduling",
+            batches,
+            schedule,
+            max(1, args.concurrency // 4),
+            args.trace_memory,
+        )
+    # Report per candidate: each candidate waited for their whole batch.
+    stats.update(
+        items=len(selected),
+        per_second=len(selected) / stats["seconds"] if stats["seconds"] else 0.0,
+    )
+    report.append(stats)
+    return report
+
+
+def regressions(report: dict, baseline: dict) -> List[str]:
+    """Stages slower than in ``baseline`` beyond ``REGRESSION_TOLERANCE``."""
+    found = []
+    for size, stages in report.items():
+        previous = {stats["stage"]: stats for stats in baseline.get(size, [])}
+        for stats in stages:
+            before = previous.get(stats["stage"])
+            if before is None:
+                continue
+            if stats["p95_ms"] > before["p95_ms"] * (1 + REGRESSION_TOLERANCE):
+                found.append(
+                    f"{size} candidates, {stats['stage']}: p95 "
+                    f"{before['p95_ms']:.1f} -> {stats['p95_ms']:.1f} ms"
+                )
+            if stats["per_second"] < before["per_second"] * (1 - REGRESSION_TOLERANCE):
+                found.append(
+                    f"{size} candidates, {stats['stage']}: throughput "
+                    f"{before['per_second']:,.1f} -> {stats['per_second']:,.1f}/s"
+                )
+    return found
+
+
+def print_report(candidates: int, stages: List[dict]) -> None:
+    print(f"\n{candidates} candidates")
+    print(
+        "stage         items  errors     p50 ms     p95 ms     p99 ms     max ms"
+        "      /s   RSS MB"
+    )
+    for stats in stages:
+        print(
+            f"{stats['stage']:<12} {stats['items']:>6}  {stats['errors']:>6} "
+            f"{stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} "
+            f"{stats['p99_ms']:>10.1f} {stats['max_ms']:>10.1f} "
+            f"{stats['per_second']:>7,.0f} {stats['peak_rss_mb']:>8.0f}"
+            + (
+                f"  (traced peak {stats['traced_peak_mb']:.1f} MB)"
+                if stats["traced_peak_mb"] is not None
+                else ""
+            )
+        )
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--role", default="Senior AI ML Engineer")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None, help="PDF processes")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--llm-error-rate", type=float, default=0.01)
+    parser.add_argument("--llm-output-tokens", type=int, default=300)
+    parser.add_argument("--smtp-fail-rate", type=float, default=0.0)
+    parser.add_argument("--zoom-latency", type=float, default=0.01)
+    parser.add_argument("--interviewers", type=int, default=40)
+    parser.add_argument("--schedule-batch", type=int, default=50)
+    parser.add_argument("--trace-memory", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    parser.add_argument("--baseline", default=None, help="Report to compare with")
+    args = parser.parse_args(argv)
+    # Per-candidate log lines would dominate the run time at 10k candidates.
+    logging.getLogger("phi").setLevel(logging.ERROR)
+
+    report = {}
+    for candidates in args.candidates:
+        directory = tempfile.mkdtemp(prefix="bench_pipeline_")
+        try:
+            report[str(candidates)] = run_pipeline(candidates, args, directory)
+        finally:
+            shutil.rmtree(directory)
+        print_report(candidates, report[str(candidates)])
+
+    broken = [
+        f"{size} candidates, {stats['stage']}"
+        for size, stages in report.items()
+        for stats in stages
+        if stats["items"] and stats["errors"] == stats["items"]
+    ]
+    for line in broken:
+        print(f"FAILED every item: {line}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f))
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+    if broken:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark the pre-filter on a synthetic corpus of resumes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_prefilter --resumes 5000 --threshold 0.25
+"""
+
+import argparse
+import random
+import time
+
+from prefilter import SKILL_SYNONYMS, PreFilter
+from tasks import load_job_descriptions
+
+FILLER = (
+    "Worked closely with stakeholders to deliver projects on time. "
+    "Led weekly meetings and mentored junior colleagues. "
+    "Responsible for documentation, testing and code reviews. "
+    "Volunteered at local community events and hackathons. "
+)
+OFF_TOPIC_SKILLS = [
+    "accounting",
+    "sales",
+    "customer service",
+    "excel",
+    "photoshop",
+    "logistics",
+    "retail",
+    "salesforce",
+]
+
+
+def synthetic_resume(rng: random.Random, relevance: float) -> str:
+    """A resume mentioning roughly ``relevance`` of the known skills."""
+    skills = [
+        rng.choice([skill, *synonyms])
+        for skill, synonyms in SKILL_SYNONYMS.items()
+        if rng.random() < relevance
+    ]
+    skills += rng.sample(OFF_TOPIC_SKILLS, k=rng.randint(1, 4))
+    rng.shuffle(skills)
+    return f"Skills: {', '.join(skills)}.\n" + FILLER * rng.randint(2, 10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resumes", type=int, default=5000)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--role", default="Senior AI ML Engineer")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [synthetic_resume(rng, rng.random()) for _ in range(args.resumes)]
+
+    started = time.perf_counter()
+    pre_filter = PreFilter(load_job_descriptions()[args.role], threshold=args.threshold)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for resume_text in corpus:
+        pre_filter.should_analyze(resume_text)
+    score_seconds = time.perf_counter() - started
+
+    stats = pre_filter.stats()
+    print(f"role: {args.role} ({len(pre_filter.skills)} required skills)")
+    print(f"index build: {build_seconds * 1000:.2f} ms")
+    print(
+        f"scored {stats['evaluated']} resumes in {score_seconds:.3f}s "
+        f"({stats['evaluated'] / score_seconds:,.0f} resumes/s)"
+    )
+    print(
+        f"forwarded to LLM: {stats['forwarded']}, "
+        f"LLM calls saved: {stats['llm_calls_saved']} "
+        f"({stats['llm_calls_saved'] / stats['evaluated']:.0%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark recruiter queries over the results store.
+
+Fills a store with synthetic verdicts spread over several roles, then times
+filtered first pages, deep keyset pagination and counts.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_results_store --results 200000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from prefilter import SKILL_SYNONYMS
+from results_store import ResultFilter, ResultsStore
+
+ROLES = ["Senior AI ML Engineer", "Frontend Engineer", "Product Manager", "Designer"]
+LEVELS = ["junior", "mid", "senior"]
+
+
+def synthetic_verdict(rng: random.Random, skills: list) -> dict:
+    required = rng.sample(skills, k=rng.randint(4, 10))
+    split = rng.randint(0, len(required))
+    return {
+        "selected": rng.random() < 0.3,
+        "matching_skills": required[:split],
+        "missing_skills": required[split:],
+        "experience_level": rng.choice(LEVELS),
+        "confidence": round(rng.random(), 2),
+        "feedback": "Synthetic verdict. " * rng.randint(5, 20),
+    }
+
+
+def timed(label: str, call, repeat: int = 20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = call()
+    print(f"{label:<52} {(time.perf_counter() - started) / repeat * 1000:8.2f} ms")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--results", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    skills = list(SKILL_SYNONYMS) + [f"skill {number}" for number in range(60)]
+    directory = tempfile.mkdtemp(prefix="results_store_")
+    try:
+        store = ResultsStore(os.path.join(directory, "results.sqlite3"))
+        started = time.perf_counter()
+        for start in range(0, args.results, 1000):
+            store.add_records(
+                (
+                    {
+                        "candidate": f"candidate-{number}@example.com",
+                        "role": rng.choice(ROLES),
+                        "error": None,
+                        **synthetic_verdict(rng, skills),
+                    }
+                    for number in range(start, min(start + 1000, args.results))
+                ),
+                source="bench",
+            )
+        elapsed = time.perf_counter() - started
+        print(f"recorded {args.results} results in {elapsed:.1f}s")
+
+        queries = {
+            "role": ResultFilter(role=ROLES[0]),
+            "role + senior": ResultFilter(role=ROLES[0], experience_level="senior"),
+            "role + senior + missing pytorch": ResultFilter(
+                role=ROLES[0], experience_level="senior", missing_skills=["torch"]
+            ),
+            "selected + has 2 skills": ResultFilter(
+                selected=True, has_skills=["python", "rag"]
+            ),
+            "candidate": ResultFilter(candidate="candidate-123@example.com"),
+        }
+        for name, filters in queries.items():
+            timed(f"first page: {name}", lambda: store.query(filters))
+            timed(f"count: {name}", lambda: store.count(filters), repeat=3)
+
+        filters = queries["role + senior"]
+
+        def walk(pages: int):
+            cursor = None
+            for _ in range(pages):
+                page = store.query(filters, after=cursor, limit=args.page_size)
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+            return cursor
+
+        timed("100 pages: role + senior, in total", lambda: walk(100), 1)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark interview slot allocation for a large batch of candidates.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_slot_allocator --candidates 10000 --interviewers 40
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from slot_allocator import InterviewRequest, Interviewer, SlotAllocator
+
+TIMEZONES = ["Asia/Kolkata", "Europe/London", "America/New_York"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, default=10_000)
+    parser.add_argument("--interviewers", type=int, default=40)
+    parser.add_argument(
+        "--constrained-every",
+        type=int,
+        default=50,
+        help="Every Nth candidate only accepts slots in their local hours",
+    )
+    args = parser.parse_args()
+
+    interviewers = [
+        Interviewer(f"interviewer-{i}", timezone=TIMEZONES[i % len(TIMEZONES)])
+        for i in range(args.interviewers)
+    ]
+    requests = [
+        InterviewRequest(
+            f"candidate-{i}@example.com",
+            "Senior AI ML Engineer",
+            timezone=(
+                "Europe/Berlin"
+                if args.constrained_every and i % args.constrained_every == 0
+                else None
+            ),
+        )
+        for i in range(args.candidates)
+    ]
+    allocator = SlotAllocator(interviewers, horizon=timedelta(days=365))
+    not_before = datetime.now(pytz.utc)
+
+    started = time.perf_counter()
+    slots = allocator.allocate(requests, not_before)
+    elapsed = time.perf_counter() - started
+
+    booked = [slot for slot in slots if slot is not None]
+    last = max(end for _, _, end in booked)
+    print(
+        f"allocated {len(booked)}/{len(requests)} interviews in {elapsed:.3f}s "
+        f"({len(requests) / elapsed:,.0f}/s); last ends {last:%Y-%m-%d %H:%M} UTC"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark building and querying the resume similarity index.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_vector_index --resumes 50000
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_prefilter import synthetic_resume
+from tasks import load_job_descriptions
+from vector_index import VectorIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resumes", type=int, default=50_000)
+    parser.add_argument("--role", default="Senior AI ML Engineer")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [
+        (f"candidate-{i}", synthetic_resume(rng, rng.random()))
+        for i in range(args.resumes)
+    ]
+    directory = tempfile.mkdtemp(prefix="resume_index_")
+    try:
+        started = time.perf_counter()
+        index = VectorIndex(directory)
+        for i in range(0, len(corpus), 5000):
+            index.add_many(corpus[i : i + 5000])
+        print(f"indexed {index.count} resumes in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        index = VectorIndex(directory)
+        print(f"reopened index in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        role_requirements = load_job_descriptions()[args.role]
+        timings = []
+        for _ in range(args.queries):
+            started = time.perf_counter()
+            index.rank_for_role(role_requirements, args.top)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        print(
+            f"top-{args.top} over {index.count} resumes: "
+            f"p50 {timings[len(timings) // 2] * 1000:.1f} ms, "
+            f"max {timings[-1] * 1000:.1f} ms"
+        )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Generate synthetic resume PDFs for benchmarks and local batch runs.
+
+The PDFs are written by hand (Helvetica text, one content stream per page),
+so no PDF library is needed, and PyPDF2 extracts their text like that of a
+real single-column resume.
+
+Usage (from the repository root):
+    python -m benchmarks.synthetic_pdf --count 1000 --output resumes/
+"""
+
+import argparse
+import os
+import random
+import textwrap
+from typing import List
+
+from benchmarks.bench_prefilter import synthetic_resume
+
+FIRST_NAMES = ["Asha", "Ravi", "Maria", "Chen", "Fatima", "Lukas", "Amara", "Diego"]
+LAST_NAMES = ["Iyer", "Kumar", "Garcia", "Wang", "Khan", "Muller", "Okafor", "Silva"]
+LINES_PER_PAGE = 48
+LINE_WIDTH = 90
+
+
+def _escape(line: str) -> str:
+    line = line.encode("latin-1", errors="replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(lines: List[str]) -> bytes:
+    commands = ["BT", "/F1 10 Tf", "12 TL", "50 770 Td"]
+    commands += [f"({_escape(line)}) Tj T*" for line in lines]
+    commands.append("ET")
+    return "\n".join(commands).encode("latin-1")
+
+
+def text_to_pdf(text: str) -> bytes:
+    """A minimal, valid PDF showing ``text`` with page breaks as needed."""
+    lines = []
+    for paragraph in text.split("\n"):
+        lines += textwrap.wrap(paragraph, LINE_WIDTH) or [""]
+    pages = [
+        lines[start : start + LINES_PER_PAGE]
+        for start in range(0, len(lines), LINES_PER_PAGE)
+    ] or [[]]
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and its contents
+    # for every page.
+    page_ids = [4 + 2 * number for number in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+        + f"] /Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_id, page_lines in zip(page_ids, pages):
+        stream = _page_stream(page_lines)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
+
+
+def synthetic_resume_text(rng: random.Random, relevance: float) -> str:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    email = f"{name.lower().replace(' ', '.')}{rng.randint(1, 9999)}@example.com"
+    return f"{name}\n{email}\n\n{synthetic_resume(rng, relevance)}"
+
+
+def synthetic_resume_pdf(rng: random.Random, relevance: float) -> bytes:
+    """A resume PDF mentioning roughly ``relevance`` of the known skills."""
+    return text_to_pdf(synthetic_resume_text(rng, relevance))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--output", required=True, help="Directory to write to")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    rng = random.Random(args.seed)
+    for number in range(args.count):
+        path = os.path.join(args.output, f"candidate-{number:05d}.pdf")
+        with open(path, "wb") as f:
+            f.write(synthetic_resume_pdf(rng, rng.random()))
+    print(f"wrote {args.count} resumes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
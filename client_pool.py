@@ -0,0 +1,75 @@
+"""Process-wide pool of provider SDK clients.
+
+phidata models build a fresh SDK client, and with it a fresh HTTP connection
+pool, whenever they are not handed one. Clients here are built lazily, once
+per provider and API key, and shared by every agent in the process, across
+Streamlit sessions and batch workers, so TCP/TLS connections are reused.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from anthropic import Anthropic
+from mistralai import Mistral
+from openai import AsyncOpenAI, OpenAI
+
+
+def _build_clients(model_provider: str, api_key: str) -> Dict[str, Any]:
+    """Keyword arguments that hand the pooled clients to a phidata model."""
+    if model_provider == "OpenAI":
+        return {
+            "client": OpenAI(api_key=api_key),
+            "async_client": AsyncOpenAI(api_key=api_key),
+        }
+    if model_provider == "Claude":
+        return {"client": Anthropic(api_key=api_key)}
+    if model_provider == "Mistral":
+        return {"mistral_client": Mistral(api_key=api_key)}
+    raise ValueError(f"Unknown model provider '{model_provider}'")
+
+
+class ClientPool:
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.reuses = 0
+        self.build_seconds = 0.0
+
+    @staticmethod
+    def _key(model_provider: str, api_key: str) -> Tuple[str, str]:
+        # Keep only a fingerprint of the credential in the pool's keys.
+        return model_provider, hashlib.sha256(api_key.encode()).hexdigest()
+
+    def get(self, model_provider: str, api_key: str) -> Dict[str, Any]:
+        key = self._key(model_provider, api_key)
+        with self._lock:
+            clients = self._clients.get(key)
+            if clients is not None:
+                self.reuses += 1
+                return clients
+            started = time.perf_counter()
+            clients = _build_clients(model_provider, api_key)
+            self.build_seconds += time.perf_counter() - started
+            self.builds += 1
+            self._clients[key] = clients
+            return clients
+
+    def stats(self) -> dict:
+        average = self.build_seconds / self.builds if self.builds else 0.0
+        return {
+            "clients": len(self._clients),
+            "builds": self.builds,
+            "reuses": self.reuses,
+            "build_seconds": round(self.build_seconds, 4),
+            "estimated_seconds_saved": round(self.reuses * average, 4),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+
+client_pool = ClientPool()
@@ -0,0 +1,254 @@
+"""Per-role email templates, written once by the LLM and then rendered locally.
+
+Writing every candidate email with the email agent costs an LLM round trip
+per candidate. Instead, the first email of each kind for a role asks the
+model for a template with ``${slot}`` placeholders, stores it, and every
+later email is rendered by substituting the candidate-specific slots
+(feedback, meeting details) and sent directly, without an LLM call.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from string import Template
+from typing import Dict, Optional, Tuple
+
+from phi.agent import Agent
+from phi.utils.log import logger
+
+from agents import get_the_model
+from tools import PooledEmailTools
+
+EMAIL_TEMPLATES_PATH = "data/email_templates.sqlite3"
+# Bump whenever the generation prompts change so stored templates are rebuilt.
+TEMPLATE_VERSION = "1"
+
+# Slots every template of a kind must use; ``role`` and ``company_name`` are
+# always available as well.
+REQUIRED_SLOTS: Dict[str, Tuple[str, ...]] = {
+    "selection": (),
+    "rejection": ("feedback",),
+    "confirmation": ("meeting_details",),
+}
+COMMON_SLOTS = ("role", "company_name")
+
+TEMPLATE_BRIEFS = {
+    "selection": """an email to a candidate regarding their selection for the interview.
+        The email should:
+        1. Start by congratulating the candidate on being selected for the interview.
+        Use professional and courteous language throughout the email.
+        2. Briefly highlight why candidates like them stood out for the role.
+        3. Clearly outline the next steps in the process.
+        4. Mention that they will receive the interview details, including date, time, and format, shortly.
+        5. Encourage them to prepare for the interview and let them know they can reach out with questions or concerns.
+        6. Use a clear structure with paragraphs and bullet points for readability.""",
+    "rejection": """an email to a candidate regarding their application.
+        The email should:
+        1. Be empathetic, respectful, and human in tone.
+        2. Acknowledge their effort and interest in applying for the role.
+        3. Introduce the specific feedback, which is inserted verbatim at ${feedback}.
+        4. Encourage them to act on the feedback and suggest the kind of learning resources (online courses, books, certifications) that usually help.
+        5. Encourage them to reapply in the future once they've addressed the areas of improvement.
+        6. Be concise yet thoughtful, with professional wording and a supportive tone.""",
+    "confirmation": """an email confirming the scheduled interview.
+        The email should:
+        1. Start with a polite and enthusiastic confirmation of the interview.
+        2. Present the meeting details, which are inserted verbatim at ${meeting_details}.
+        3. Clearly state that the time is in IST (India Standard Time) and provide a link for timezone conversion.
+        4. Politely request the candidate to join 5 minutes early to ensure a smooth start.
+        5. Encourage the candidate to be confident and well-prepared for the interview.
+        6. Conclude with a friendly note, wishing them the best for the interview.""",
+}
+
+
+class TemplateError(ValueError):
+    pass
+
+
+@dataclass
+class EmailTemplate:
+    kind: str
+    subject: str
+    body: str
+
+    def render(self, **slots) -> Tuple[str, str]:
+        """Return the ``(subject, body)`` with the slots filled in."""
+        return (
+            Template(self.subject).safe_substitute(slots),
+            Template(self.body).safe_substitute(slots),
+        )
+
+
+def template_slots(text: str) -> set:
+    """The ``$name`` / ``${name}`` placeholders used in ``text``."""
+    slots = set()
+    for match in Template.pattern.finditer(text):
+        name = match.group("named") or match.group("braced")
+        if name:
+            slots.add(name)
+    return slots
+
+
+def validate_template(template: EmailTemplate) -> EmailTemplate:
+    allowed = set(COMMON_SLOTS) | set(REQUIRED_SLOTS[template.kind])
+    used = template_slots(template.subject) | template_slots(template.body)
+    missing = set(REQUIRED_SLOTS[template.kind]) - used
+    if missing:
+        raise TemplateError(f"Template is missing slots: {sorted(missing)}")
+    unknown = used - allowed
+    if unknown:
+        raise TemplateError(f"Template uses unknown slots: {sorted(unknown)}")
+    return template
+
+
+class EmailTemplateStore:
+    def __init__(self, path: str = EMAIL_TEMPLATES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS email_templates (
+                    kind TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    company_name TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (kind, role, company_name, version)
+                )"""
+            )
+
+    def get(self, kind: str, role: str, company_name: str) -> Optional[EmailTemplate]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT subject, body FROM email_templates "
+                "WHERE kind = ? AND role = ? AND company_name = ? AND version = ?",
+                (kind, role, company_name, TEMPLATE_VERSION),
+            ).fetchone()
+        return EmailTemplate(kind, *row) if row else None
+
+    def put(self, role: str, company_name: str, template: EmailTemplate) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO email_templates "
+                "(kind, role, company_name, version, subject, body, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    template.kind,
+                    role,
+                    company_name,
+                    TEMPLATE_VERSION,
+                    template.subject,
+                    template.body,
+                    time.time(),
+                ),
+            )
+
+    def invalidate_role(self, role: str) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM email_templates WHERE role = ?", (role,)
+            ).rowcount
+
+
+_store: Optional[EmailTemplateStore] = None
+_store_lock = threading.Lock()
+# Only one LLM call per missing template, however many emails are waiting on it.
+_generation_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+
+
+def get_email_template_store() -> EmailTemplateStore:
+    """Return the process-wide template store, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EmailTemplateStore()
+        return _store
+
+
+def generate_template(
+    kind: str, role: str, company_name: str, model_provider: str, api_key: str
+) -> EmailTemplate:
+    """Ask the model for a reusable template of the given kind."""
+    slots = ", ".join(f"${{{slot}}}" for slot in COMMON_SLOTS + REQUIRED_SLOTS[kind])
+    writer = Agent(
+        model=get_the_model(model_provider, api_key),
+        description="You are a professional recruitment coordinator writing reusable email templates.",
+        instructions=[
+            "Properly formatted (Headers, Bullet points, Paragraphs) without markdown email should be written.",
+            "Act like a human writing an email and use all lowercase letters",
+            "Maintain a friendly yet professional tone",
+            "Always end emails with exactly: 'best,\nthe ai recruiting team'",
+            "Never include the sender's or receiver's name in the signature",
+            f"The name of the company is '{company_name}'",
+        ],
+        markdown=False,
+    )
+    response = writer.run(
+        f"""
+        Write a template for {TEMPLATE_BRIEFS[kind]}
+        The position is {role}.
+        The template is reused for every candidate, so do not address the
+        candidate by name. Use these placeholders exactly as written where the
+        values belong: {slots}. Do not use any other "$" placeholders.
+        Respond with a JSON object only, in this format:
+        {{"subject": "...", "body": "..."}}
+        """
+    )
+    content = response.content.strip()
+    content = content.removeprefix("```json").removeprefix("```").removesuffix("```")
+    try:
+        data = json.loads(content)
+        template = EmailTemplate(kind, data["subject"], data["body"])
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        raise TemplateError(f"Invalid template from the model: {e}") from e
+    return validate_template(template)
+
+
+def get_template(
+    kind: str, role: str, company_name: str, model_provider: str, api_key: str
+) -> EmailTemplate:
+    """Return the stored template for the role, generating it on first use."""
+    store = get_email_template_store()
+    template = store.get(kind, role, company_name)
+    if template is not None:
+        return template
+    key = (kind, role, company_name)
+    with _store_lock:
+        lock = _generation_locks.setdefault(key, threading.Lock())
+    with lock:
+        template = store.get(kind, role, company_name)
+        if template is None:
+            logger.info(f"Generating {kind} email template for {role}")
+            template = generate_template(
+                kind, role, company_name, model_provider, api_key
+            )
+            store.put(role, company_name, template)
+    return template
+
+
+def send_templated_email(kind: str, settings: dict, role: str, **slots) -> None:
+    """Render the role's template for one candidate and send it."""
+    template = get_template(
+        kind,
+        role,
+        settings["company_name"],
+        settings["model_provider"],
+        settings["api_key"],
+    )
+    subject, body = template.render(
+        role=role, company_name=settings["company_name"], **slots
+    )
+    result = PooledEmailTools(
+        receiver_email=settings["candidate_email"],
+        sender_email=settings["email_sender"],
+        sender_name=settings["company_name"],
+        sender_passkey=settings["email_passkey"],
+    ).email_user(subject, body)
+    if result.startswith("error"):
+        raise RuntimeError(f"Could not send {kind} email: {result}")
@@ -0,0 +1,656 @@
+"""Local stand-ins for external services, for testing without network access."""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+from types import SimpleNamespace
+from typing import Iterator, Optional
+
+from phi.agent import RunResponse
+from phi.model.message import Message
+
+DEFAULT_VERDICT = {
+    "selected": True,
+    "matching_skills": ["Python", "PyTorch"],
+    "missing_skills": [],
+    "experience_level": "mid",
+    "confidence": 0.9,
+    "feedback": "Strong hands-on experience with the required stack.",
+}
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: Optional[dict] = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeRateLimitError(Exception):
+    """Shaped like the provider SDKs' 429 errors."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        headers = {} if retry_after is None else {"retry-after": str(retry_after)}
+        self.response = FakeResponse(429, headers)
+
+
+class FakeAnalyzer:
+    """Duck-typed stand-in for an analyzer ``Agent``.
+
+    Each run sleeps for ``latency`` seconds (plus up to ``jitter``) and fails
+    with a 429 carrying ``retry_after`` with probability ``rate_limit_rate``.
+    With probability ``error_rate`` the reply is prose instead of JSON, and
+    ``output_tokens`` pads the feedback to about that many tokens. Token
+    usage is counted in ``model.metrics`` like a phidata model's. With
+    ``stream=True`` the verdict arrives in ``stream_chunks`` pieces spread
+    over the same delay.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        jitter: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: Optional[float] = 1.0,
+        verdict: Optional[dict] = None,
+        seed: Optional[int] = None,
+        stream_chunks: int = 8,
+        error_rate: float = 0.0,
+        output_tokens: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.stream_chunks = stream_chunks
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.verdict = verdict or DEFAULT_VERDICT
+        if output_tokens is not None:
+            feedback = self.verdict["feedback"]
+            padding = max(0, output_tokens * 4 - len(json.dumps(self.verdict)))
+            self.verdict = {
+                **self.verdict,
+                "feedback": (feedback + " ") * (padding // (len(feedback) + 1) + 1),
+            }
+        self.calls = 0
+        self.model = SimpleNamespace(
+            provider=None,
+            id="fake-analyzer",
+            metrics={"input_tokens": 0, "output_tokens": 0},
+        )
+        self._random = random.Random(seed)
+
+    def _delay(self) -> float:
+        return self.latency + self._random.uniform(0, self.jitter)
+
+    def _respond(self, message) -> RunResponse:
+        self.calls += 1
+        if self._random.random() < self.rate_limit_rate:
+            raise FakeRateLimitError(self.retry_after)
+        if self._random.random() < self.error_rate:
+            content = "I could not evaluate this resume against the role."
+        else:
+            content = json.dumps(self.verdict)
+        # Roughly four characters per token, like resume_compaction's estimate.
+        prompt = message if isinstance(message, str) else str(message.content)
+        self.model.metrics["input_tokens"] += -(-len(prompt) // 4)
+        self.model.metrics["output_tokens"] += -(-len(content) // 4)
+        return RunResponse(
+            content=content, messages=[Message(role="assistant", content=content)]
+        )
+
+    def _stream(self, message, delay: float) -> Iterator[RunResponse]:
+        content = self._respond(message).content
+        size = -(-len(content) // self.stream_chunks)
+        for start in range(0, len(content), size):
+            time.sleep(delay / self.stream_chunks)
+            yield RunResponse(content=content[start : start + size])
+
+    def run(self, message, stream: bool = False, **kwargs):
+        if stream:
+            return self._stream(message, self._delay())
+        time.sleep(self._delay())
+        return self._respond(message)
+
+    async def arun(self, message, **kwargs) -> RunResponse:
+        await asyncio.sleep(self._delay())
+        return self._respond(message)
+
+
+class FakeBatchServer:
+    """Minimal local implementation of the OpenAI and Anthropic batch endpoints.
+
+    Every request in a batch is answered with ``verdict`` (as JSON text), and
+    batches report completion ``complete_after`` seconds after submission.
+    Point the SDK clients at ``base_url`` (OpenAI needs the ``/v1`` suffix).
+    """
+
+    def __init__(self, complete_after: float = 0.0, verdict: Optional[dict] = None):
+        self.complete_after = complete_after
+        self.verdict = verdict or DEFAULT_VERDICT
+        self.files: dict = {}
+        self.batches: dict = {}
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeBatchServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _batch_handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeBatchServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+    def _done(self, batch: dict) -> bool:
+        return time.time() - batch["_submitted"] >= self.complete_after
+
+    def upload_file(self, filename: str, content: bytes, purpose: str) -> dict:
+        file_id = self._new_id("file")
+        self.files[file_id] = content
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    def create_openai_batch(self, body: dict) -> dict:
+        batch_id = self._new_id("batch")
+        requests = [
+            json.loads(line)
+            for line in self.files[body["input_file_id"]].decode().splitlines()
+            if line.strip()
+        ]
+        self.batches[batch_id] = {"_submitted": time.time(), "_requests": requests}
+        return self.openai_batch(batch_id, body)
+
+    def openai_batch(self, batch_id: str, body: Optional[dict] = None) -> dict:
+        batch = self.batches[batch_id]
+        if body is not None:
+            batch["_body"] = body
+        status = "in_progress"
+        output_file_id = None
+        if self._done(batch):
+            status = "completed"
+            if "_output" not in batch:
+                lines = []
+                for request in batch["_requests"]:
+                    content = json.dumps(self.verdict)
+                    lines.append(
+                        json.dumps(
+                            {
+                                "id": self._new_id("batch_req"),
+                                "custom_id": request["custom_id"],
+                                "response": {
+                                    "status_code": 200,
+                                    "body": {
+                                        "choices": [
+                                            {
+                                                "index": 0,
+                                                "message": {
+                                                    "role": "assistant",
+                                                    "content": content,
+                                                },
+                                            }
+                                        ]
+                                    },
+                                },
+                                "error": None,
+                            }
+                        )
+                    )
+                batch["_output"] = self.upload_file(
+                    "output.jsonl", "\n".join(lines).encode(), "batch_output"
+                )["id"]
+            output_file_id = batch["_output"]
+        count = len(batch["_requests"])
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": batch["_body"]["endpoint"],
+            "input_file_id": batch["_body"]["input_file_id"],
+            "completion_window": batch["_body"]["completion_window"],
+            "created_at": int(batch["_submitted"]),
+            "status": status,
+            "output_file_id": output_file_id,
+            "error_file_id": None,
+            "request_counts": {
+                "total": count,
+                "completed": count if output_file_id else 0,
+                "failed": 0,
+            },
+        }
+
+    def create_anthropic_batch(self, body: dict) -> dict:
+        batch_id = self._new_id("msgbatch")
+        self.batches[batch_id] = {
+            "_submitted": time.time(),
+            "_requests": body["requests"],
+        }
+        return self.anthropic_batch(batch_id)
+
+    def anthropic_batch(self, batch_id: str) -> dict:
+        batch = self.batches[batch_id]
+        done = self._done(batch)
+        count = len(batch["_requests"])
+        created = datetime.fromtimestamp(batch["_submitted"], timezone.utc)
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if done else "in_progress",
+            "request_counts": {
+                "processing": 0 if done else count,
+                "succeeded": count if done else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": created.isoformat(),
+            "expires_at": (created + timedelta(days=1)).isoformat(),
+            "ended_at": datetime.now(timezone.utc).isoformat() if done else None,
+            "cancel_initiated_at": None,
+            "archived_at": None,
+            "results_url": (
+                f"{self.base_url}/v1/messages/batches/{batch_id}/results"
+                if done
+                else None
+            ),
+        }
+
+    def anthropic_results(self, batch_id: str) -> bytes:
+        lines = []
+        for request in self.batches[batch_id]["_requests"]:
+            lines.append(
+                json.dumps(
+                    {
+                        "custom_id": request["custom_id"],
+                        "result": {
+                            "type": "succeeded",
+                            "message": {
+                                "id": self._new_id("msg"),
+                                "type": "message",
+                                "role": "assistant",
+                                "model": request["params"]["model"],
+                                "content": [
+                                    {"type": "text", "text": json.dumps(self.verdict)}
+                                ],
+                                "stop_reason": "end_turn",
+                                "stop_sequence": None,
+                                "usage": {"input_tokens": 1, "output_tokens": 1},
+                            },
+                        },
+                    }
+                )
+            )
+        return "\n".join(lines).encode()
+
+
+class FakeZoomServer:
+    """Local stand-in for Zoom's OAuth token and meeting endpoints.
+
+    Issues tokens living ``token_lifetime`` seconds, rejects unknown or
+    expired tokens with 401, answers ``rate_limit_rate`` of meeting requests
+    with a 429 and delays each meeting request by ``latency`` seconds.
+    Use ``token_url`` and ``api_url`` with ``zoom_client.ZoomClient``.
+    """
+
+    def __init__(
+        self,
+        token_lifetime: float = 3600,
+        latency: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.token_lifetime = token_lifetime
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.tokens: dict = {}
+        self.meetings: dict = {}
+        self.token_requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def token_url(self) -> str:
+        return f"{self.base_url}/oauth/token"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/v2"
+
+    def start(self) -> "FakeZoomServer":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _zoom_handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeZoomServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def issue_token(self) -> dict:
+        token = uuid.uuid4().hex
+        with self._lock:
+            self.token_requests += 1
+            self.tokens[token] = time.time() + self.token_lifetime
+        return {
+            "access_token": token,
+            "token_type": "bearer",
+            "expires_in": self.token_lifetime,
+            "scope": "meeting:write:admin",
+        }
+
+    def authorized(self, header: Optional[str]) -> bool:
+        token = (header or "").removeprefix("Bearer ")
+        with self._lock:
+            return self.tokens.get(token, 0) > time.time()
+
+    def rate_limited(self) -> bool:
+        with self._lock:
+            return self._random.random() < self.rate_limit_rate
+
+    def create_meeting(self, user_id: str, body: dict) -> dict:
+        meeting_id = self._random.randint(10**10, 10**11 - 1)
+        meeting = {
+            "id": meeting_id,
+            "uuid": uuid.uuid4().hex,
+            "host_id": user_id,
+            "topic": body.get("topic", ""),
+            "type": body.get("type", 2),
+            "start_time": body.get("start_time", ""),
+            "duration": body.get("duration", 60),
+            "timezone": body.get("timezone", "UTC"),
+            "agenda": body.get("agenda", ""),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "join_url": f"https://zoom.example/j/{meeting_id}",
+            "settings": body.get("settings", {}),
+        }
+        with self._lock:
+            self.meetings[meeting_id] = meeting
+        return meeting
+
+
+def _zoom_handler(server: FakeZoomServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def _send(self, payload: dict, status: int = 200, headers=None) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_POST(self) -> None:
+            parts = self.path.split("?")[0].strip("/").split("/")
+            body = self._body()
+            if parts == ["oauth", "token"]:
+                self._send(server.issue_token())
+            elif parts[:2] == ["v2", "users"] and parts[3:] == ["meetings"]:
+                if not server.authorized(self.headers.get("Authorization")):
+                    self._send({"code": 124, "message": "Invalid access token."}, 401)
+                elif server.rate_limited():
+                    self._send(
+                        {"code": 429, "message": "Too many requests."},
+                        429,
+                        {"Retry-After": "0.05"},
+                    )
+                else:
+                    time.sleep(server.latency)
+                    self._send(server.create_meeting(parts[2], json.loads(body)), 201)
+            else:
+                self._send({"message": "not found"}, 404)
+
+        def do_GET(self) -> None:
+            parts = self.path.split("?")[0].strip("/").split("/")
+            if not server.authorized(self.headers.get("Authorization")):
+                self._send({"code": 124, "message": "Invalid access token."}, 401)
+            elif parts[:2] == ["v2", "meetings"] and len(parts) == 3:
+                meeting = server.meetings.get(int(parts[2]))
+                if meeting is None:
+                    self._send({"code": 3001, "message": "Meeting not found."}, 404)
+                else:
+                    self._send(meeting)
+            else:
+                self._send({"message": "not found"}, 404)
+
+    return Handler
+
+
+def _parse_multipart(content_type: str, body: bytes) -> dict:
+    message = BytesParser().parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields = {}
+    for part in message.get_payload():
+        name = part.get_param("name", header="content-disposition")
+        fields[name] = (part.get_filename(), part.get_payload(decode=True))
+    return fields
+
+
+def _batch_handler(server: FakeBatchServer):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:
+            pass
+
+        def _send(self, payload, status: int = 200) -> None:
+            data = payload if isinstance(payload, bytes) else json.dumps(payload)
+            data = data if isinstance(data, bytes) else data.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_POST(self) -> None:
+            path = self.path.split("?")[0]
+            if path == "/v1/files":
+                fields = _parse_multipart(self.headers["Content-Type"], self._body())
+                filename, content = fields["file"]
+                purpose = fields["purpose"][1].decode()
+                self._send(server.upload_file(filename, content, purpose))
+            elif path == "/v1/batches":
+                self._send(server.create_openai_batch(json.loads(self._body())))
+            elif path == "/v1/messages/batches":
+                self._send(server.create_anthropic_batch(json.loads(self._body())))
+            else:
+                self._send({"error": {"message": "not found"}}, 404)
+
+        def do_GET(self) -> None:
+            parts = self.path.split("?")[0].strip("/").split("/")
+            if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                self._send(server.openai_batch(parts[2]))
+            elif parts[:2] == ["v1", "files"] and parts[3:] == ["content"]:
+                self._send(server.files[parts[2]])
+            elif parts[:3] == ["v1", "messages", "batches"] and len(parts) == 4:
+                self._send(server.anthropic_batch(parts[3]))
+            elif parts[:3] == ["v1", "messages", "batches"] and parts[4:] == [
+                "results"
+            ]:
+                self._send(server.anthropic_results(parts[3]))
+            else:
+                self._send({"error": {"message": "not found"}}, 404)
+
+    return Handler
+
+
+class _SmtpServer(ThreadingTCPServer):
+    # Do not let an open client session keep the process alive.
+    daemon_threads = True
+
+
+class FakeSmtpServer:
+    """Local SMTP sink that accepts any login and stores every message.
+
+    Speaks plain (non-TLS) ESMTP with AUTH PLAIN/LOGIN, which is enough for
+    ``smtplib``. Counts connections and logins so connection reuse can be
+    checked, and rejects ``fail_rate`` of messages with a transient 451.
+    Use with ``SMTP_HOST=127.0.0.1 SMTP_PORT=<port> SMTP_SSL=0``.
+    """
+
+    def __init__(self, fail_rate: float = 0.0, seed: Optional[int] = None):
+        self.fail_rate = fail_rate
+        self.messages: list = []
+        self.connections = 0
+        self.logins = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "FakeSmtpServer":
+        self._server = _SmtpServer(("127.0.0.1", 0), _smtp_handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeSmtpServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _accept(self, mail_from: str, recipients: list, data: bytes) -> bool:
+        with self._lock:
+            if self._random.random() < self.fail_rate:
+                return False
+            self.messages.append(
+                {"from": mail_from, "to": recipients, "data": data.decode()}
+            )
+            return True
+
+
+def _smtp_handler(server: FakeSmtpServer):
+    class Handler(StreamRequestHandler):
+        def _reply(self, line: str) -> None:
+            self.wfile.write(f"{line}\r\n".encode())
+
+        def _line(self) -> Optional[str]:
+            line = self.rfile.readline()
+            return line.decode().rstrip("\r\n") if line else None
+
+        def handle(self) -> None:
+            with server._lock:
+                server.connections += 1
+            self._reply("220 fake-smtp ESMTP ready")
+            mail_from, recipients = None, []
+            while True:
+                line = self._line()
+                if line is None:
+                    return
+                command = line[:4].upper()
+                if command in ("EHLO", "HELO"):
+                    self._reply("250-fake-smtp")
+                    self._reply("250-PIPELINING")
+                    self._reply("250-8BITMIME")
+                    self._reply("250 AUTH PLAIN LOGIN")
+                elif command == "AUTH":
+                    if line.split()[1].upper() == "LOGIN":
+                        self._reply("334 VXNlcm5hbWU6")
+                        self._line()
+                        self._reply("334 UGFzc3dvcmQ6")
+                        self._line()
+                    with server._lock:
+                        server.logins += 1
+                    self._reply("235 2.7.0 Authentication successful")
+                elif command == "MAIL":
+                    mail_from, recipients = line.split(":", 1)[1].strip(), []
+                    self._reply("250 OK")
+                elif command == "RCPT":
+                    recipients.append(line.split(":", 1)[1].strip())
+                    self._reply("250 OK")
+                elif command == "DATA":
+                    self._reply("354 End data with <CR><LF>.<CR><LF>")
+                    chunks = []
+                    while True:
+                        raw = self.rfile.readline()
+                        if not raw or raw in (b".\r\n", b".\n"):
+                            break
+                        chunks.append(raw[1:] if raw.startswith(b"..") else raw)
+                    if server._accept(mail_from, recipients, b"".join(chunks)):
+                        self._reply("250 OK: queued")
+                    else:
+                        self._reply("451 4.3.0 Try again later")
+                    mail_from, recipients = None, []
+                elif command == "RSET":
+                    mail_from, recipients = None, []
+                    self._reply("250 OK")
+                elif command == "NOOP":
+                    self._reply("250 OK")
+                elif command == "QUIT":
+                    self._reply("221 Bye")
+                    return
+                else:
+                    self._reply("502 Command not implemented")
+
+    return Handler
@@ -0,0 +1,529 @@
+"""Durable local work queue for the post-analysis pipeline.
+
+Selection emails and interview scheduling used to run inline while the
+candidate waited on a spinner. The UI now enqueues them here and returns;
+workers (threads in the Streamlit process and/or separate processes started
+with ``python job_queue.py``) claim jobs from a shared SQLite table.
+
+* Each job carries an idempotency key (candidate + role + step), so double
+  clicks and reruns enqueue it only once.
+* A claimed job holds a lease; if its worker dies the lease expires and the
+  job is picked up again.
+* Failures are retried with exponential backoff and jitter; after
+  ``max_attempts`` the job is moved to the dead-letter list, from where it
+  can be requeued.
+* Credentials (API key, Zoom client secret, SMTP passkey) are kept out of
+  the job payloads, in a separate secret store readable only by its owner
+  (``<queue>_secrets.sqlite3``) that every worker reads. They are deleted as
+  soon as the job is done or dead-lettered; a job found without them fails
+  at once instead of running under other credentials.
+
+Usage:
+    python job_queue.py --workers 4
+    python job_queue.py --dead-letters
+    python job_queue.py --requeue <job id>
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from phi.utils.log import logger
+
+import telemetry
+from rate_limit import backoff_delay
+
+JOB_QUEUE_PATH = "data/jobs.sqlite3"
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Session settings a worker needs to act on the candidate's behalf.
+PIPELINE_SETTINGS = (
+    "model_provider",
+    "api_key",
+    "candidate_email",
+    "zoom_account_id",
+    "zoom_client_id",
+    "zoom_client_secret",
+    "email_sender",
+    "email_passkey",
+    "company_name",
+    "email_mode",
+    "llm_meeting_descriptions",
+)
+SECRET_SETTINGS = ("api_key", "zoom_client_secret", "email_passkey")
+
+
+class MissingCredentials(RuntimeError):
+    """A job's credentials are no longer in the secret store."""
+
+
+class JobQueue:
+    def __init__(self, path: str = JOB_QUEUE_PATH, secrets_path: Optional[str] = None):
+        self.path = path
+        self.secrets_path = (
+            secrets_path or f"{os.path.splitext(path)[0]}_secrets.sqlite3"
+        )
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # SQLite gives the journal files the permissions of the database.
+        os.close(os.open(self.secrets_path, os.O_CREAT | os.O_WRONLY, 0o600))
+        os.chmod(self.secrets_path, 0o600)
+        self._conn.execute("ATTACH DATABASE ? AS vault", (self.secrets_path,))
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS vault.job_secrets (
+                job_id TEXT PRIMARY KEY,
+                secrets TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                run_after REAL NOT NULL,
+                lease_until REAL,
+                worker TEXT,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_after)"
+        )
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: dict,
+        idempotency_key: str,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        delay: float = 0.0,
+        secrets: Optional[dict] = None,
+    ) -> str:
+        """Add a job and return its id, or the id of the job already queued
+        under ``idempotency_key``.
+
+        ``secrets`` go to the secret store, and the job will not run without
+        them. A dead job enqueued again with secrets is requeued with them.
+        """
+        if secrets is not None:
+            payload = {**payload, "credentials": True}
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                added = self._conn.execute(
+                    "INSERT OR IGNORE INTO jobs "
+                    "(id, kind, idempotency_key, payload, max_attempts, run_after, "
+                    "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        uuid.uuid4().hex,
+                        kind,
+                        idempotency_key,
+                        json.dumps(payload),
+                        max_attempts,
+                        now + delay,
+                        now,
+                        now,
+                    ),
+                ).rowcount
+                job_id, status = self._conn.execute(
+                    "SELECT id, status FROM jobs WHERE idempotency_key = ?",
+                    (idempotency_key,),
+                ).fetchone()
+                if secrets is not None and (added or status == "dead"):
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO vault.job_secrets (job_id, secrets) "
+                        "VALUES (?, ?)",
+                        (job_id, json.dumps(secrets)),
+                    )
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'pending', attempts = 0, "
+                        "run_after = ?, updated_at = ? "
+                        "WHERE id = ? AND status = 'dead'",
+                        (now, now, job_id),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(
+        self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ) -> Optional[dict]:
+        """Lease the next runnable job to ``worker``, or return None."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A worker died during the job's last attempt.
+                for (job_id,) in self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'running' "
+                    "AND lease_until < ? AND attempts >= max_attempts",
+                    (now,),
+                ).fetchall():
+                    self._bury(job_id, "Lease expired on the last attempt", now)
+                row = self._conn.execute(
+                    "SELECT id, kind, payload, attempts, max_attempts FROM jobs "
+                    "WHERE (status = 'pending' AND run_after <= ?) "
+                    "OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY run_after LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                        "lease_until = ?, worker = ?, updated_at = ? WHERE id = ?",
+                        (now + lease_seconds, worker, now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, kind, payload, attempts, max_attempts = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "payload": json.loads(payload),
+            "attempt": attempts + 1,
+            "max_attempts": max_attempts,
+        }
+
+    def secrets(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT secrets FROM vault.job_secrets WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _bury(self, job_id: str, error: str, now: float) -> None:
+        """Dead-letter a job and delete its credentials, in the caller's lock."""
+        self._conn.execute(
+            "UPDATE jobs SET status = 'dead', lease_until = NULL, last_error = ?, "
+            "updated_at = ? WHERE id = ?",
+            (error, now, job_id),
+        )
+        self._conn.execute("DELETE FROM vault.job_secrets WHERE job_id = ?", (job_id,))
+
+    def complete(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', lease_until = NULL, "
+                "last_error = NULL, updated_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+            self._conn.execute(
+                "DELETE FROM vault.job_secrets WHERE job_id = ?", (job_id,)
+            )
+
+    def fail(self, job_id: str, error: str, final: bool = False) -> str:
+        """Record a failed attempt; returns the job's new status. A ``final``
+        failure is dead-lettered without further attempts.
+        """
+        now = time.time()
+        with self._lock:
+            attempts, max_attempts = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if final or attempts >= max_attempts:
+                self._bury(job_id, error, now)
+                return "dead"
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', run_after = ?, "
+                "lease_until = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+                (
+                    now + backoff_delay(attempts, base=2.0, cap=300.0),
+                    error,
+                    now,
+                    job_id,
+                ),
+            )
+        return "pending"
+
+    def requeue(self, job_id: str) -> bool:
+        """Move a dead-lettered job back to the queue with fresh attempts.
+
+        Credentials are deleted when a job dies, so a job that needs them
+        has to be enqueued again with them instead (from the app).
+        """
+        with self._lock:
+            now = time.time()
+            changed = self._conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, run_after = ?, "
+                "updated_at = ? WHERE id = ? AND status = 'dead' "
+                "AND json_extract(payload, '$.credentials') IS NULL",
+                (now, now, job_id),
+            ).rowcount
+        return bool(changed)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return next(iter(self._select("WHERE id = ?", (job_id,))), None)
+
+    def find(self, idempotency_key: str) -> Optional[dict]:
+        return next(
+            iter(self._select("WHERE idempotency_key = ?", (idempotency_key,))), None
+        )
+
+    def dead_letters(self, limit: int = 100) -> List[dict]:
+        return self._select(
+            "WHERE status = 'dead' ORDER BY updated_at DESC LIMIT ?", (limit,)
+        )
+
+    def _select(self, where: str, params: tuple) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, idempotency_key, status, attempts, max_attempts, "
+                f"last_error, created_at, updated_at FROM jobs {where}",
+                params,
+            ).fetchall()
+        keys = (
+            "id",
+            "kind",
+            "idempotency_key",
+            "status",
+            "attempts",
+            "max_attempts",
+            "last_error",
+            "created_at",
+            "updated_at",
+        )
+        return [dict(zip(keys, row)) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, opening it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+def handle_selection_email(payload: dict, queue: JobQueue) -> None:
+    from tasks import deliver_email
+
+    deliver_email("selection", payload["settings"], payload["role"])
+    # The interview follows the selection email, as it did inline.
+    enqueue_step(queue, "schedule_interview", payload["settings"], payload["role"])
+
+
+def handle_schedule_interview(payload: dict, queue: JobQueue) -> None:
+    from tasks import book_interview_slot
+
+    settings = payload["settings"]
+    # Rerunning is safe: a candidate who already has a booking gets it back.
+    booking = book_interview_slot(settings, payload["role"])
+    # A separate step, so a failed email is retried without booking again.
+    enqueue_step(
+        queue,
+        "interview_confirmation",
+        settings,
+        payload["role"],
+        meeting_details=booking.details(),
+    )
+
+
+def handle_interview_confirmation(payload: dict, queue: JobQueue) -> None:
+    from tasks import deliver_email
+
+    deliver_email(
+        "confirmation",
+        payload["settings"],
+        payload["role"],
+        meeting_details=payload["meeting_details"],
+    )
+
+
+HANDLERS: Dict[str, Callable[[dict, JobQueue], None]] = {
+    "selection_email": handle_selection_email,
+    "schedule_interview": handle_schedule_interview,
+    "interview_confirmation": handle_interview_confirmation,
+}
+
+
+def idempotency_key(kind: str, candidate_email: str, role: str) -> str:
+    return f"{kind}:{role}:{candidate_email.strip().lower()}"
+
+
+def enqueue_step(queue: JobQueue, kind: str, settings: dict, role: str, **extra) -> str:
+    return queue.enqueue(
+        kind,
+        {
+            "settings": {
+                k: settings.get(k)
+                for k in PIPELINE_SETTINGS
+                if k not in SECRET_SETTINGS
+            },
+            "role": role,
+            **extra,
+        },
+        idempotency_key(kind, settings["candidate_email"], role),
+        secrets={k: settings.get(k) for k in SECRET_SETTINGS},
+    )
+
+
+def enqueue_post_selection(settings: dict, role: str) -> str:
+    """Queue the selection email (which in turn queues the interview)."""
+    return enqueue_step(get_job_queue(), "selection_email", settings, role)
+
+
+def _with_credentials(queue: JobQueue, job: dict) -> dict:
+    """The job's payload with its credentials put back into the settings."""
+    payload = job["payload"]
+    if not payload.get("credentials"):
+        return payload
+    secrets = queue.secrets(job["id"])
+    if secrets is None:
+        raise MissingCredentials(
+            f"Credentials for job {job['id']} are missing from "
+            f"{queue.secrets_path}; enqueue it again from the app"
+        )
+    return {**payload, "settings": {**payload["settings"], **secrets}}
+
+
+def run_job(queue: JobQueue, job: dict, handlers: Dict[str, Callable]) -> bool:
+    try:
+        payload = _with_credentials(queue, job)
+        with telemetry.span(
+            f"job.{job['kind']}", job_id=job["id"], attempt=job["attempt"]
+        ):
+            handlers[job["kind"]](payload, queue)
+    except Exception as e:
+        # Retrying cannot bring credentials back.
+        status = queue.fail(
+            job["id"],
+            f"{e}\n{traceback.format_exc()}",
+            final=isinstance(e, MissingCredentials),
+        )
+        logger.error(
+            f"Job {job['kind']} {job['id']} failed "
+            f"(attempt {job['attempt']}/{job['max_attempts']}, now {status}): {e}"
+        )
+        return False
+    queue.complete(job["id"])
+    logger.info(f"Job {job['kind']} {job['id']} done")
+    return True
+
+
+def work(
+    queue: Optional[JobQueue] = None,
+    handlers: Optional[Dict[str, Callable]] = None,
+    stop: Optional[threading.Event] = None,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    max_jobs: Optional[int] = None,
+) -> int:
+    """Claim and run jobs until ``stop`` is set (or ``max_jobs`` ran).
+
+    Returns the number of jobs run.
+    """
+    queue = queue or get_job_queue()
+    handlers = handlers or HANDLERS
+    stop = stop or threading.Event()
+    worker = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    ran = 0
+    while not stop.is_set() and (max_jobs is None or ran < max_jobs):
+        job = queue.claim(worker, lease_seconds)
+        if job is None:
+            stop.wait(poll_interval)
+            continue
+        run_job(queue, job, handlers)
+        ran += 1
+    return ran
+
+
+_worker_threads: List[threading.Thread] = []
+
+
+def start_worker_threads(count: int = 2) -> None:
+    """Start ``count`` daemon worker threads in this process, once."""
+    with _queue_lock:
+        if _worker_threads:
+            return
+        for number in range(count):
+            thread = threading.Thread(
+                target=work, name=f"job-worker-{number}", daemon=True
+            )
+            thread.start()
+            _worker_threads.append(thread)
+
+
+def _work_process(path: str, poll_interval: float) -> None:
+    telemetry.configure(serve_metrics=False)
+    work(JobQueue(path), poll_interval=poll_interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run post-analysis job workers.")
+    parser.add_argument("--queue", default=JOB_QUEUE_PATH)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--dead-letters", action="store_true")
+    parser.add_argument("--requeue", metavar="JOB_ID", default=None)
+    args = parser.parse_args()
+    telemetry.configure()
+
+    queue = JobQueue(args.queue)
+    if args.dead_letters:
+        for job in queue.dead_letters():
+            error = (job["last_error"] or "").splitlines()[:1]
+            print(f"{job['id']}  {job['idempotency_key']}  {' '.join(error)}")
+        return
+    if args.requeue:
+        if queue.requeue(args.requeue):
+            print("requeued")
+        else:
+            print("not a dead job, or its credentials must be resubmitted from the app")
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=_work_process, args=(args.queue, args.poll_interval)
+        )
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {len(processes)} workers on {args.queue}: {queue.stats()}")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
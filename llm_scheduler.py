@@ -0,0 +1,243 @@
+"""Async resume analysis with per-provider rate limiting.
+
+Keeps several analysis requests in flight at once while staying inside each
+provider's requests-per-minute and tokens-per-minute limits. A 429 response
+pauses the whole provider for its ``retry-after`` period; other failures are
+retried with jittered exponential backoff.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from phi.agent import Agent
+from phi.model.base import Model
+from phi.model.message import Message
+from phi.utils.log import logger
+
+from analysis_cache import AnalysisCache
+from prompt_cache import message_text
+from rate_limit import TokenBucket, backoff_delay
+from structured_output import (
+    MAX_REPAIR_ATTEMPTS,
+    AnalysisParseError,
+    parse_metrics,
+    parse_verdict,
+    repair_prompt,
+)
+from tasks import (
+    analysis_cache_key,
+    analysis_response_text,
+    build_analysis_message,
+)
+
+# Rough upper bound on the size of the JSON verdict, reserved per request.
+EXPECTED_OUTPUT_TOKENS = 800
+
+
+@dataclass
+class ProviderLimits:
+    requests_per_minute: float
+    tokens_per_minute: float
+
+
+# Conservative defaults for the lowest paid tier of each provider.
+DEFAULT_PROVIDER_LIMITS: Dict[str, ProviderLimits] = {
+    "OpenAI": ProviderLimits(requests_per_minute=500, tokens_per_minute=30_000),
+    "Claude": ProviderLimits(requests_per_minute=50, tokens_per_minute=40_000),
+    "Mistral": ProviderLimits(requests_per_minute=60, tokens_per_minute=500_000),
+}
+
+
+class RateLimitScheduler:
+    """Request and token budgets for a single provider."""
+
+    def __init__(self, limits: ProviderLimits, burst_seconds: float = 10.0):
+        self.limits = limits
+        self.requests = TokenBucket(
+            limits.requests_per_minute / 60,
+            max(1.0, limits.requests_per_minute * burst_seconds / 60),
+        )
+        self.tokens = TokenBucket(
+            limits.tokens_per_minute / 60,
+            max(1.0, limits.tokens_per_minute * burst_seconds / 60),
+        )
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request to this provider for ``seconds``."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, tokens: float) -> None:
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+
+
+_schedulers: Dict[str, RateLimitScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(
+    model_provider: str, limits: Optional[ProviderLimits] = None
+) -> RateLimitScheduler:
+    """Return the process-wide scheduler for a provider, creating it on first use."""
+    with _schedulers_lock:
+        if model_provider not in _schedulers or limits is not None:
+            _schedulers[model_provider] = RateLimitScheduler(
+                limits or DEFAULT_PROVIDER_LIMITS[model_provider]
+            )
+        return _schedulers[model_provider]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Return the ``retry-after`` delay in seconds of a 429 error, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+async def _run_agent(analyzer: Agent, prompt: Union[str, Message]):
+    # Only some phidata models implement the async API; run the rest, and
+    # stand-ins without a phidata model, in a thread.
+    model = getattr(analyzer, "model", None)
+    if not isinstance(model, Model) or type(model).aresponse is Model.aresponse:
+        return await asyncio.to_thread(analyzer.run, prompt)
+    return await analyzer.arun(prompt)
+
+
+async def _parse_or_repair(
+    response, analyzer: Agent, scheduler: RateLimitScheduler
+) -> dict:
+    """Async counterpart of :func:`tasks.parse_or_repair`."""
+    text = analysis_response_text(response)
+    for attempt in range(MAX_REPAIR_ATTEMPTS + 1):
+        try:
+            result, cleaned = parse_verdict(text)
+        except AnalysisParseError as e:
+            if attempt == MAX_REPAIR_ATTEMPTS:
+                parse_metrics.record("failed")
+                raise
+            logger.warning(f"Could not parse analysis ({e}); requesting a repair")
+            parse_metrics.record_repair_call()
+            prompt = repair_prompt(text, e)
+            await scheduler.acquire(estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS)
+            text = analysis_response_text(await _run_agent(analyzer, prompt))
+            continue
+        parse_metrics.record(
+            "repaired" if attempt else "tolerant" if cleaned else "strict"
+        )
+        return result
+
+
+async def analyze_resume_async(
+    resume_text: str,
+    role_requirements,
+    role,
+    analyzer: Agent,
+    scheduler: RateLimitScheduler,
+    max_retries: int = 5,
+    cache: Optional[AnalysisCache] = None,
+) -> dict:
+    """Async counterpart of :func:`tasks.run_analysis` gated by ``scheduler``."""
+    if cache is not None:
+        key = analysis_cache_key(resume_text, role_requirements, role, analyzer)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    model_provider = getattr(getattr(analyzer, "model", None), "provider", None)
+    prompt = build_analysis_message(
+        resume_text, role_requirements, role, model_provider
+    )
+    tokens = estimate_tokens(message_text(prompt)) + EXPECTED_OUTPUT_TOKENS
+    for attempt in range(max_retries + 1):
+        await scheduler.acquire(tokens)
+        try:
+            response = await _run_agent(analyzer, prompt)
+            result = await _parse_or_repair(response, analyzer, scheduler)
+            if cache is not None:
+                cache.put(key, role, result)
+            return result
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            retry_after = get_retry_after(e)
+            if _status_code(e) == 429 and retry_after is not None:
+                scheduler.pause(retry_after)
+                delay = retry_after + random.uniform(0, 1)
+            else:
+                delay = backoff_delay(attempt)
+            logger.warning(
+                f"Analysis attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+async def analyze_resumes_async(
+    resumes: Iterable[Tuple[str, str]],
+    role_requirements,
+    role,
+    analyzer_factory,
+    scheduler: RateLimitScheduler,
+    max_in_flight: int = 8,
+    cache: Optional[AnalysisCache] = None,
+) -> List[dict]:
+    """Analyze ``(candidate_id, resume_text)`` pairs with up to ``max_in_flight``
+    concurrent requests.
+
+    ``analyzer_factory`` is called once per candidate so agents never share
+    run state. Failures are reported in each record's ``error`` field.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def one(candidate_id: str, resume_text: str) -> dict:
+        async with semaphore:
+            record = {"candidate": candidate_id, "role": role, "error": None}
+            try:
+                record.update(
+                    await analyze_resume_async(
+                        resume_text,
+                        role_requirements,
+                        role,
+                        analyzer_factory(),
+                        scheduler,
+                        cache=cache,
+                    )
+                )
+            except Exception as e:
+                logger.error(f"Error analyzing {candidate_id}: {e}")
+                record["error"] = str(e)
+            return record
+
+    return await asyncio.gather(*(one(cid, text) for cid, text in resumes))
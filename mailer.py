@@ -0,0 +1,445 @@
+"""Pooled SMTP delivery with a persistent outbox.
+
+phidata's ``EmailTools`` opens a TLS connection and logs in for every
+message. ``Mailer`` keeps a small pool of logged-in connections per sender
+and reuses each connection for many messages. Sends are paced by a
+per-server token bucket. Every message is written to an SQLite outbox before
+it is sent, and stays there as pending until the server accepts it.
+Messages left pending by a failure or a restart are retried by ``flush``,
+which runs again whenever a mailer for the same sender is created. A message
+that ran out of attempts is marked failed, and sending it again requeues it.
+
+Point ``SMTP_HOST``/``SMTP_PORT``/``SMTP_SSL=0`` at ``fakes.FakeSmtpServer``
+to exercise the whole flow locally.
+
+Usage:
+    python mailer.py --sender me@example.com --passkey ... --flush
+"""
+
+import argparse
+import hashlib
+import os
+import queue
+import smtplib
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+
+from phi.utils.log import logger
+
+from rate_limit import shared_bucket
+from telemetry import timed_call
+
+OUTBOX_PATH = "data/outbox.sqlite3"
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_ATTEMPTS = 5
+# Servers close sessions after this many messages; reconnect before that.
+MAX_MESSAGES_PER_CONNECTION = 90
+MAX_CONNECTION_AGE = 240.0
+# A message claimed for longer than this is assumed abandoned and retried.
+CLAIM_TIMEOUT = 300.0
+
+# (messages per second, burst) per SMTP server.
+SMTP_SEND_LIMITS: Dict[str, Tuple[float, float]] = {
+    "smtp.gmail.com": (2.0, 10.0),
+    "smtp.office365.com": (0.5, 5.0),
+}
+DEFAULT_SEND_LIMIT = (5.0, 20.0)
+
+
+@dataclass(frozen=True)
+class SmtpConfig:
+    host: str
+    port: int
+    username: str
+    password: str
+    use_ssl: bool = True
+    timeout: float = 30.0
+
+    @classmethod
+    def for_sender(cls, sender_email: str, passkey: str) -> "SmtpConfig":
+        """Gmail, as ``EmailTools`` uses, unless overridden from the environment."""
+        return cls(
+            host=os.environ.get("SMTP_HOST", "smtp.gmail.com"),
+            port=int(os.environ.get("SMTP_PORT", "465")),
+            username=sender_email,
+            password=passkey,
+            use_ssl=os.environ.get("SMTP_SSL", "1") != "0",
+        )
+
+
+class _Connection:
+    def __init__(self, config: SmtpConfig):
+        smtp_class = smtplib.SMTP_SSL if config.use_ssl else smtplib.SMTP
+        self.smtp = smtp_class(config.host, config.port, timeout=config.timeout)
+        if config.password:
+            self.smtp.login(config.username, config.password)
+        self.opened = time.monotonic()
+        self.sent = 0
+
+    @property
+    def stale(self) -> bool:
+        return (
+            self.sent >= MAX_MESSAGES_PER_CONNECTION
+            or time.monotonic() - self.opened > MAX_CONNECTION_AGE
+        )
+
+    def close(self) -> None:
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class SmtpPool:
+    """Up to ``size`` logged-in connections to one server, shared by threads."""
+
+    def __init__(self, config: SmtpConfig, size: int = DEFAULT_POOL_SIZE):
+        self.config = config
+        self.size = size
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.connections_opened = 0
+
+    def _open(self) -> _Connection:
+        with timed_call("smtp", "connect"):
+            connection = _Connection(self.config)
+        self.connections_opened += 1
+        return connection
+
+    def _checkout(self) -> _Connection:
+        self._slots.acquire()
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if not connection.stale:
+                return connection
+            connection.close()
+        try:
+            return self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def send(self, message: EmailMessage) -> None:
+        connection = self._checkout()
+        try:
+            try:
+                with timed_call("smtp", "send"):
+                    connection.smtp.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped an idle connection; retry on a fresh one.
+                connection.close()
+                connection = self._open()
+                with timed_call("smtp", "send"):
+                    connection.smtp.send_message(message)
+            connection.sent += 1
+        except (
+            smtplib.SMTPSenderRefused,
+            smtplib.SMTPRecipientsRefused,
+            smtplib.SMTPDataError,
+        ):
+            # The message was rejected but the session is still usable.
+            self._idle.put(connection)
+            raise
+        except BaseException:
+            connection.close()
+            raise
+        else:
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class Outbox:
+    def __init__(self, path: str = OUTBOX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS outbox (
+                    id TEXT PRIMARY KEY,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    sender TEXT NOT NULL,
+                    sender_name TEXT NOT NULL,
+                    recipient TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    claimed_at REAL,
+                    sent_at REAL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (sender, status)"
+            )
+
+    def add(
+        self,
+        sender: str,
+        sender_name: str,
+        recipient: str,
+        subject: str,
+        body: str,
+        idempotency_key: Optional[str] = None,
+    ) -> Tuple[str, str]:
+        """Store a message and return its ``(id, status)``. A message already
+        stored under ``idempotency_key`` is returned instead of a new one.
+        """
+        key = idempotency_key or uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (id, idempotency_key, sender, "
+                "sender_name, recipient, subject, body, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    uuid.uuid4().hex,
+                    key,
+                    sender,
+                    sender_name,
+                    recipient,
+                    subject,
+                    body,
+                    time.time(),
+                ),
+            )
+            return self._conn.execute(
+                "SELECT id, status FROM outbox WHERE idempotency_key = ?", (key,)
+            ).fetchone()
+
+    def pending(self, sender: str, limit: int = 1000) -> List[tuple]:
+        """Pending messages, including ones whose sender crashed mid-send."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, sender_name, recipient, subject, body FROM outbox "
+                "WHERE sender = ? AND (status = 'pending' "
+                "OR (status = 'sending' AND claimed_at < ?)) "
+                "ORDER BY created_at LIMIT ?",
+                (sender, time.time() - CLAIM_TIMEOUT, limit),
+            ).fetchall()
+
+    def claim(self, message_id: str) -> bool:
+        """Mark a message as being sent; False if someone else already is."""
+        now = time.time()
+        with self._lock, self._conn:
+            return bool(
+                self._conn.execute(
+                    "UPDATE outbox SET status = 'sending', claimed_at = ? "
+                    "WHERE id = ? AND (status = 'pending' "
+                    "OR (status = 'sending' AND claimed_at < ?))",
+                    (now, message_id, now - CLAIM_TIMEOUT),
+                ).rowcount
+            )
+
+    def requeue(self, message_id: str) -> None:
+        """Give a failed message a fresh set of attempts."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'pending', attempts = 0 "
+                "WHERE id = ? AND status = 'failed'",
+                (message_id,),
+            )
+
+    def mark_sent(self, message_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'sent', attempts = attempts + 1, "
+                "last_error = NULL, sent_at = ? WHERE id = ?",
+                (time.time(), message_id),
+            )
+
+    def mark_failed(
+        self, message_id: str, error: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> str:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE id = ?",
+                (error, max_attempts, message_id),
+            )
+            (status,) = self._conn.execute(
+                "SELECT status FROM outbox WHERE id = ?", (message_id,)
+            ).fetchone()
+        return status
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(
+                self._conn.execute(
+                    "SELECT status, COUNT(*) FROM outbox GROUP BY status"
+                ).fetchall()
+            )
+
+
+def message_key(recipient: str, subject: str, body: str) -> str:
+    """Idempotency key for an identical message to the same recipient."""
+    digest = hashlib.sha256(f"{recipient}\0{subject}\0{body}".encode()).hexdigest()
+    return f"{recipient.strip().lower()}:{digest[:32]}"
+
+
+class Mailer:
+    def __init__(
+        self,
+        config: SmtpConfig,
+        outbox: Optional[Outbox] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        rate: Optional[Tuple[float, float]] = None,
+    ):
+        self.config = config
+        self.outbox = outbox or get_outbox()
+        self.pool = SmtpPool(config, pool_size)
+        per_second, burst = rate or SMTP_SEND_LIMITS.get(
+            config.host, DEFAULT_SEND_LIMIT
+        )
+        # One bucket per server, shared by every sender that uses it.
+        self.bucket = shared_bucket(
+            ("smtp", config.host, config.port), per_second, burst
+        )
+
+    def _build(
+        self, sender_name: str, recipient: str, subject: str, body: str
+    ) -> EmailMessage:
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = f"{sender_name} <{self.config.username}>"
+        message["To"] = recipient
+        message.set_content(body)
+        return message
+
+    def _deliver(self, message_id: str, sender_name, recipient, subject, body) -> str:
+        """Send a stored message and return its outbox status: "sent",
+        "pending" (to be retried), "failed" (out of attempts) or "sending"
+        (another sender has claimed it).
+        """
+        if not self.outbox.claim(message_id):
+            return "sending"
+        self.bucket.wait()
+        try:
+            self.pool.send(self._build(sender_name, recipient, subject, body))
+        except (smtplib.SMTPException, OSError) as e:
+            status = self.outbox.mark_failed(message_id, str(e))
+            logger.error(f"Error sending email to {recipient} ({status}): {e}")
+            if isinstance(e, smtplib.SMTPAuthenticationError):
+                raise
+            return status
+        self.outbox.mark_sent(message_id)
+        return "sent"
+
+    def send(
+        self,
+        recipient: str,
+        subject: str,
+        body: str,
+        sender_name: str,
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        """Record the message in the outbox, send it now and return its
+        status, as ``_deliver`` does.
+
+        A message that fails stays pending in the outbox for ``flush``.
+        Messages already sent under the same key are not resent; ones that
+        previously ran out of attempts are requeued and tried again.
+        """
+        message_id, status = self.outbox.add(
+            self.config.username,
+            sender_name,
+            recipient,
+            subject,
+            body,
+            idempotency_key or message_key(recipient, subject, body),
+        )
+        if status == "sent":
+            logger.info(f"Email to {recipient} already sent; skipping")
+            return status
+        if status == "failed":
+            logger.info(f"Email to {recipient} failed before; requeueing it")
+            self.outbox.requeue(message_id)
+        logger.info(f"Sending Email to {recipient}")
+        return self._deliver(message_id, sender_name, recipient, subject, body)
+
+    def flush(self, limit: int = 1000) -> Tuple[int, int]:
+        """Send this sender's pending messages over the pooled connections.
+
+        Returns ``(sent, failed)``; messages another sender claimed first
+        count as neither.
+        """
+        pending = self.outbox.pending(self.config.username, limit)
+        if not pending:
+            return 0, 0
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            statuses = list(executor.map(lambda row: self._deliver(*row), pending))
+        sent = statuses.count("sent")
+        return sent, len(statuses) - sent - statuses.count("sending")
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+_outbox: Optional[Outbox] = None
+_mailers: Dict[SmtpConfig, Mailer] = {}
+_mailers_lock = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    global _outbox
+    with _mailers_lock:
+        if _outbox is None:
+            _outbox = Outbox()
+        return _outbox
+
+
+def get_mailer(sender_email: str, passkey: str) -> Mailer:
+    """Return the process-wide mailer for the sender, creating it on first use.
+
+    A new mailer first retries whatever this sender left in the outbox.
+    """
+    config = SmtpConfig.for_sender(sender_email, passkey)
+    outbox = get_outbox()
+    with _mailers_lock:
+        mailer = _mailers.get(config)
+        if mailer is not None:
+            return mailer
+        mailer = _mailers[config] = Mailer(config, outbox)
+    if outbox.pending(sender_email, limit=1):
+        threading.Thread(target=mailer.flush, daemon=True).start()
+    return mailer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deliver pending outbox emails.")
+    parser.add_argument("--sender", required=True)
+    parser.add_argument("--passkey", default=os.environ.get("EMAIL_PASSKEY"))
+    parser.add_argument("--flush", action="store_true")
+    args = parser.parse_args()
+
+    outbox = get_outbox()
+    if args.flush:
+        mailer = Mailer(SmtpConfig.for_sender(args.sender, args.passkey), outbox)
+        sent, failed = mailer.flush()
+        mailer.close()
+        print(f"Sent {sent}, failed {failed}")
+    print(outbox.stats())
+
+
+if __name__ == "__main__":
+    main()
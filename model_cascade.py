@@ -0,0 +1,479 @@
+"""Cheap-first model cascade for resume analysis.
+
+Each provider has a small, fast model and the large one in ``MODEL_IDS``.
+Every resume is analyzed by the small model first, and the verdict is
+escalated to the large model only when it is uncertain: the model's own
+confidence is below ``CascadeConfig.min_confidence``, or the share of
+matching skills falls in the ``borderline_coverage`` band around the 75%
+bar in the evaluation guidelines. ``cascade_metrics`` accounts calls,
+latency, tokens and estimated cost per model; verdicts served from the
+analysis cache are counted apart, as they cost nothing.
+
+``python model_cascade.py evaluate`` runs both models over a labelled set
+of resumes and reports, for several thresholds, how often the cascade
+agrees with the large model and what it costs.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from phi.agent import Agent
+from phi.utils.log import logger
+
+from agents import MODEL_IDS, create_resume_analyzer_agent
+from analysis_cache import AnalysisCache
+from llm_scheduler import analyze_resume_async, get_scheduler
+from pdf_extraction import extract_text
+from tasks import load_job_descriptions, run_analysis, stream_analysis
+
+CASCADE_MODEL_IDS: Dict[str, List[str]] = {
+    "OpenAI": ["gpt-4o-mini", MODEL_IDS["OpenAI"]],
+    "Claude": ["claude-3-5-haiku-latest", MODEL_IDS["Claude"]],
+    "Mistral": ["mistral-small-latest", MODEL_IDS["Mistral"]],
+}
+# USD per million (input, output) tokens, for cost estimates only.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "claude-3-5-haiku-latest": (0.80, 4.00),
+    "claude-3-5-sonnet-latest": (3.00, 15.00),
+    "mistral-small-latest": (0.20, 0.60),
+    "mistral-large-latest": (2.00, 6.00),
+}
+
+
+@dataclass
+class CascadeConfig:
+    min_confidence: float = 0.75
+    # Escalate when matching / (matching + missing) skills falls in this range.
+    borderline_coverage: Tuple[float, float] = (0.65, 0.85)
+    # Model ids from cheapest to most capable; the provider's default if empty.
+    models: List[str] = field(default_factory=list)
+
+    def tiers(self, model_provider: str) -> List[str]:
+        return self.models or CASCADE_MODEL_IDS[model_provider]
+
+
+def skill_coverage(verdict: dict) -> Optional[float]:
+    matching = len(verdict.get("matching_skills") or [])
+    total = matching + len(verdict.get("missing_skills") or [])
+    return matching / total if total else None
+
+
+def escalation_reason(verdict: dict, config: CascadeConfig) -> Optional[str]:
+    """Why ``verdict`` should go to the next tier, or None to accept it."""
+    confidence = verdict.get("confidence")
+    if confidence is None:
+        return "no confidence reported"
+    if confidence < config.min_confidence:
+        return f"confidence {confidence:.2f}"
+    coverage = skill_coverage(verdict)
+    low, high = config.borderline_coverage
+    if coverage is not None and low <= coverage <= high:
+        return f"borderline skill coverage {coverage:.0%}"
+    return None
+
+
+class CascadeMetrics:
+    """Calls, cache hits, escalations, latency, tokens and estimated cost per
+    model.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tiers: Dict[str, Dict[str, float]] = {}
+
+    def record(
+        self,
+        model_id: str,
+        seconds: float,
+        input_tokens: int,
+        output_tokens: int,
+        escalated: bool,
+        cached: bool = False,
+    ) -> None:
+        price_in, price_out = MODEL_PRICES.get(model_id, (0.0, 0.0))
+        with self._lock:
+            tier = self._tiers.setdefault(
+                model_id,
+                {
+                    "calls": 0,
+                    "cache_hits": 0,
+                    "escalated": 0,
+                    "seconds": 0.0,
+                    "input_tokens": 0,
+                    "output_tokens": 0,
+                    "cost_usd": 0.0,
+                },
+            )
+            tier["escalated"] += escalated
+            if cached:
+                tier["cache_hits"] += 1
+                return
+            tier["calls"] += 1
+            tier["seconds"] += seconds
+            tier["input_tokens"] += input_tokens
+            tier["output_tokens"] += output_tokens
+            tier["cost_usd"] += (
+                input_tokens * price_in + output_tokens * price_out
+            ) / 1_000_000
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                model_id: {
+                    **tier,
+                    "mean_seconds": (
+                        tier["seconds"] / tier["calls"] if tier["calls"] else 0.0
+                    ),
+                    "escalation_rate": (
+                        tier["escalated"] / (tier["calls"] + tier["cache_hits"])
+                    ),
+                }
+                for model_id, tier in self._tiers.items()
+            }
+
+
+cascade_metrics = CascadeMetrics()
+
+
+def _model_metrics(analyzer: Agent) -> dict:
+    # Empty until the model is called, so also when the cache answered.
+    return getattr(getattr(analyzer, "model", None), "metrics", None) or {}
+
+
+def _token_usage(analyzer: Agent) -> Tuple[int, int]:
+    metrics = _model_metrics(analyzer)
+    return metrics.get("input_tokens", 0), metrics.get("output_tokens", 0)
+
+
+def _finish(
+    verdict: dict,
+    model_id: str,
+    analyzer: Agent,
+    started: float,
+    reason: Optional[str],
+) -> None:
+    cascade_metrics.record(
+        model_id,
+        time.perf_counter() - started,
+        *_token_usage(analyzer),
+        bool(reason),
+        cached=not _model_metrics(analyzer),
+    )
+    if reason:
+        logger.info(f"Escalating analysis from {model_id}: {reason}")
+
+
+def analyze_with_cascade(
+    resume_text: str,
+    role_requirements,
+    role,
+    model_provider: str,
+    api_key: str,
+    config: Optional[CascadeConfig] = None,
+    cache: Optional[AnalysisCache] = None,
+) -> dict:
+    """Analyze with the cheapest model whose verdict is confident enough.
+
+    The verdict carries the ``model`` that produced it and the reason the
+    previous tier, if any, was ``escalated``.
+    """
+    config = config or CascadeConfig()
+    tiers = config.tiers(model_provider)
+    reason = None
+    for number, model_id in enumerate(tiers):
+        analyzer = create_resume_analyzer_agent(
+            model_provider, api_key, model_id=model_id
+        )
+        started = time.perf_counter()
+        verdict = run_analysis(resume_text, role_requirements, role, analyzer, cache)
+        last = number == len(tiers) - 1
+        next_reason = None if last else escalation_reason(verdict, config)
+        _finish(verdict, model_id, analyzer, started, next_reason)
+        if next_reason is None:
+            return {**verdict, "model": model_id, "escalated": reason}
+        reason = next_reason
+
+
+def stream_with_cascade(
+    resume_text: str,
+    role_requirements,
+    role,
+    model_provider: str,
+    api_key: str,
+    config: Optional[CascadeConfig] = None,
+    cache: Optional[AnalysisCache] = None,
+) -> Iterator[Tuple[dict, bool]]:
+    """Streaming counterpart of :func:`analyze_with_cascade`, yielding
+    ``(fields, done)`` like :func:`tasks.stream_analysis`.
+
+    Every item carries the ``model`` writing it. When a verdict is escalated,
+    ``{"model": <next model>, "escalated": <reason>}`` is yielded before the
+    next tier starts streaming, so callers can replace what they showed.
+    """
+    config = config or CascadeConfig()
+    tiers = config.tiers(model_provider)
+    reason = None
+    for number, model_id in enumerate(tiers):
+        analyzer = create_resume_analyzer_agent(
+            model_provider, api_key, model_id=model_id
+        )
+        started = time.perf_counter()
+        for fields, done in stream_analysis(
+            resume_text, role_requirements, role, analyzer, cache
+        ):
+            if not done:
+                yield {**fields, "model": model_id, "escalated": reason}, False
+        verdict = fields
+        last = number == len(tiers) - 1
+        next_reason = None if last else escalation_reason(verdict, config)
+        _finish(verdict, model_id, analyzer, started, next_reason)
+        if next_reason is None:
+            yield {**verdict, "model": model_id, "escalated": reason}, True
+            return
+        reason = next_reason
+        yield {"model": tiers[number + 1], "escalated": reason}, False
+
+
+async def analyze_with_cascade_async(
+    resume_text: str,
+    role_requirements,
+    role,
+    model_provider: str,
+    api_key: str,
+    config: Optional[CascadeConfig] = None,
+    cache: Optional[AnalysisCache] = None,
+) -> dict:
+    """Async counterpart of :func:`analyze_with_cascade`, rate limited like
+    :func:`llm_scheduler.analyze_resume_async`.
+    """
+    config = config or CascadeConfig()
+    tiers = config.tiers(model_provider)
+    reason = None
+    for number, model_id in enumerate(tiers):
+        analyzer = create_resume_analyzer_agent(
+            model_provider, api_key, model_id=model_id
+        )
+        started = time.perf_counter()
+        verdict = await analyze_resume_async(
+            resume_text,
+            role_requirements,
+            role,
+            analyzer,
+            get_scheduler(model_provider),
+            cache=cache,
+        )
+        last = number == len(tiers) - 1
+        next_reason = None if last else escalation_reason(verdict, config)
+        _finish(verdict, model_id, analyzer, started, next_reason)
+        if next_reason is None:
+            return {**verdict, "model": model_id, "escalated": reason}
+        reason = next_reason
+
+
+def describe_cascade_usage() -> List[str]:
+    """One line per model with its calls, escalations, latency and cost."""
+    return [
+        f"{model_id}: {tier['calls']} calls, {tier['cache_hits']} cached, "
+        f"{tier['escalation_rate']:.0%} escalated, "
+        f"{tier['mean_seconds']:.2f}s mean, {tier['input_tokens']}+"
+        f"{tier['output_tokens']} tokens, ${tier['cost_usd']:.4f}"
+        for model_id, tier in cascade_metrics.stats().items()
+    ]
+
+
+def load_labelled_set(path: str) -> List[dict]:
+    """Read evaluation cases: JSONL lines with ``role``, either ``resume_text``
+    or ``resume`` (a PDF path relative to the file), and optionally the
+    human decision as ``selected``.
+    """
+    cases = []
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            case = json.loads(line)
+            if "resume_text" not in case:
+                with open(os.path.join(base, case["resume"]), "rb") as pdf:
+                    case["resume_text"] = extract_text(pdf)
+            cases.append(case)
+    return cases
+
+
+def _verdict_cost(model_id: str, analyzer: Agent) -> float:
+    price_in, price_out = MODEL_PRICES.get(model_id, (0.0, 0.0))
+    input_tokens, output_tokens = _token_usage(analyzer)
+    return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+
+def evaluate(
+    cases: List[dict],
+    model_provider: str,
+    api_key: str,
+    thresholds: List[float],
+    borderline_coverage: Tuple[float, float] = (0.65, 0.85),
+    concurrency: int = 4,
+) -> dict:
+    """Run the small and large model on every case and score the cascade
+    offline at each confidence threshold against the large model (and the
+    human labels, where given).
+
+    Cases bypass the analysis cache, so every latency and cost is a real call.
+    """
+    small, large = CASCADE_MODEL_IDS[model_provider][0], MODEL_IDS[model_provider]
+    descriptions = load_job_descriptions()
+
+    def run(case: dict, model_id: str) -> Tuple[Optional[dict], float, float]:
+        analyzer = create_resume_analyzer_agent(
+            model_provider, api_key, model_id=model_id
+        )
+        started = time.perf_counter()
+        try:
+            verdict = run_analysis(
+                case["resume_text"],
+                descriptions[case["role"]],
+                case["role"],
+                analyzer,
+            )
+        except Exception as e:
+            logger.error(f"{model_id} failed on a case: {e}")
+            verdict = None
+        return verdict, time.perf_counter() - started, _verdict_cost(model_id, analyzer)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        small_runs = list(executor.map(lambda case: run(case, small), cases))
+        large_runs = list(executor.map(lambda case: run(case, large), cases))
+
+    pairs = [
+        (case, s, l)
+        for case, s, l in zip(cases, small_runs, large_runs)
+        if s[0] is not None and l[0] is not None
+    ]
+    labelled = [pair for pair in pairs if "selected" in pair[0]]
+
+    def accuracy(pick) -> Optional[float]:
+        if not labelled:
+            return None
+        hits = sum(
+            pick(s, l)["selected"] == case["selected"] for case, s, l in labelled
+        )
+        return hits / len(labelled)
+
+    large_cost = sum(l[2] for _, _, l in pairs)
+    report = {
+        "provider": model_provider,
+        "small_model": small,
+        "large_model": large,
+        "cases": len(cases),
+        "scored": len(pairs),
+        "small_agreement": (
+            sum(s[0]["selected"] == l[0]["selected"] for _, s, l in pairs) / len(pairs)
+            if pairs
+            else None
+        ),
+        "small_accuracy": accuracy(lambda s, l: s[0]),
+        "large_accuracy": accuracy(lambda s, l: l[0]),
+        "large_only_cost_usd": large_cost,
+        "large_only_seconds": sum(l[1] for _, _, l in pairs),
+        "thresholds": [],
+    }
+    for threshold in thresholds:
+        config = CascadeConfig(threshold, borderline_coverage)
+
+        def pick(s, l):
+            return l[0] if escalation_reason(s[0], config) else s[0]
+
+        escalated = [escalation_reason(s[0], config) is not None for _, s, _ in pairs]
+        cost = sum(
+            s[2] + (l[2] if up else 0.0) for (_, s, l), up in zip(pairs, escalated)
+        )
+        seconds = sum(
+            s[1] + (l[1] if up else 0.0) for (_, s, l), up in zip(pairs, escalated)
+        )
+        report["thresholds"].append(
+            {
+                "min_confidence": threshold,
+                "escalation_rate": sum(escalated) / len(pairs) if pairs else None,
+                "agreement": (
+                    sum(pick(s, l)["selected"] == l[0]["selected"] for _, s, l in pairs)
+                    / len(pairs)
+                    if pairs
+                    else None
+                ),
+                "accuracy": accuracy(pick),
+                "cost_usd": cost,
+                "cost_vs_large": cost / large_cost if large_cost else None,
+                "seconds": seconds,
+            }
+        )
+    return report
+
+
+def main(argv: Optional[list] = None) -> None:
+    from batch import API_KEY_ENV_VARS
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    evaluation = subparsers.add_parser("evaluate", help="Score the cascade offline")
+    evaluation.add_argument("--labels", required=True, help="JSONL evaluation set")
+    evaluation.add_argument(
+        "--provider", choices=sorted(CASCADE_MODEL_IDS), default="OpenAI"
+    )
+    evaluation.add_argument("--api-key", default=None)
+    evaluation.add_argument(
+        "--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.75, 0.8, 0.9]
+    )
+    evaluation.add_argument(
+        "--borderline",
+        type=float,
+        nargs=2,
+        default=[0.65, 0.85],
+        metavar=("LOW", "HIGH"),
+    )
+    evaluation.add_argument("--concurrency", type=int, default=4)
+    evaluation.add_argument("--output", default=None, help="Also write the report here")
+    args = parser.parse_args(argv)
+
+    api_key = args.api_key or os.environ.get(API_KEY_ENV_VARS[args.provider])
+    if not api_key:
+        parser.error(f"Pass --api-key or set {API_KEY_ENV_VARS[args.provider]}")
+    report = evaluate(
+        load_labelled_set(args.labels),
+        args.provider,
+        api_key,
+        args.thresholds,
+        tuple(args.borderline),
+        concurrency=args.concurrency,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    def percent(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.0%}"
+
+    print(
+        f"{report['scored']}/{report['cases']} cases; {report['small_model']} agrees "
+        f"with {report['large_model']} on {percent(report['small_agreement'])}; "
+        f"accuracy {percent(report['small_accuracy'])} vs "
+        f"{percent(report['large_accuracy'])}; large only ${report['large_only_cost_usd']:.4f}"
+    )
+    print("min_conf  escalated  agreement  accuracy  cost vs large")
+    for row in report["thresholds"]:
+        print(
+            f"{row['min_confidence']:>8.2f}  {percent(row['escalation_rate']):>9}  "
+            f"{percent(row['agreement']):>9}  {percent(row['accuracy']):>8}  "
+            f"{percent(row['cost_vs_large']):>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
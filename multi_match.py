@@ -0,0 +1,416 @@
+"""Cross-role screening with fewer calls and tokens.
+
+``match_roles`` evaluates one resume against several roles in a single call,
+so the resume is sent once instead of once per role. ``match_resumes`` does
+the inverse: it packs several short resumes into one request for a single
+role, so the role requirements and instructions are sent once per pack. Both
+return one record per (candidate, role) pair in the ``batch.py`` format.
+Pairs the model leaves out of its reply are analyzed on their own.
+
+Usage (from the repository root):
+    python multi_match.py roles --input resumes/ --provider OpenAI --output matches.jsonl
+    python multi_match.py pack --role "Senior AI ML Engineer" --input resumes/ --provider OpenAI
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from phi.agent import Agent
+from phi.utils.log import logger
+
+from agents import create_resume_analyzer_agent
+from analysis_cache import AnalysisCache, get_analysis_cache
+from batch import API_KEY_ENV_VARS, iter_resumes
+from pdf_extraction import PdfExtractor
+from prompt_cache import cacheable_message
+from resume_compaction import compact_resume, compact_text
+from structured_output import (
+    MAX_REPAIR_ATTEMPTS,
+    VERDICT_SHAPE,
+    AnalysisParseError,
+    parse_metrics,
+    parse_verdict_list,
+    repair_prompt,
+)
+from tasks import (
+    EVALUATION_GUIDELINES,
+    analysis_cache_key,
+    analysis_response_text,
+    build_analysis_suffix,
+    load_job_descriptions,
+    run_analysis,
+)
+
+MAX_ROLES_PER_CALL = 8
+MAX_RESUMES_PER_CALL = 10
+# Compacted resume tokens packed into one request.
+PACK_TOKEN_BUDGET = 8000
+# Output tokens reserved per verdict in a multi-verdict reply.
+VERDICT_OUTPUT_TOKENS = 400
+MAX_OUTPUT_TOKENS = 8192
+
+
+def _role_block(label: str, role: str, role_requirements: dict) -> str:
+    return f"""### {label}: {role}
+Role Requirements: {compact_text(role_requirements["job_description"])}
+Additional Instructions from Recruiter Side (Must follow if provided):
+{compact_text(role_requirements.get("additional_instructions") or "")}
+"""
+
+
+def build_multi_role_prefix(roles: Dict[str, dict]) -> str:
+    """Instructions and requirements for ``roles``, labelled R1, R2, ... in order."""
+    blocks = "\n".join(
+        _role_block(f"R{number}", role, requirements)
+        for number, (role, requirements) in enumerate(roles.items(), 1)
+    )
+    return f"""Analyze the resume at the end of this message against each of the roles below, judging each role independently, and provide a detailed evaluation for every role as a JSON object.
+{blocks}
+Your JSON response must adhere to this structure, with one entry per role in the order given:
+{{"verdicts": [{{"role": "R1", "selected": true/false, "matching_skills": ["skill1", "skill2"], "missing_skills": ["skill3", "skill4"], "experience_level": "junior/mid/senior", "confidence": 0.0-1.0, "feedback": "Detailed feedback explaining the decision"}}]}}
+
+{EVALUATION_GUIDELINES}"""
+
+
+def build_multi_resume_prefix(role_requirements: dict, role: str) -> str:
+    """Instructions and requirements for evaluating packed resumes against ``role``."""
+    return f"""Analyze each of the resumes at the end of this message against the specified role requirements, judging each resume independently, and provide a detailed evaluation for every resume as a JSON object.
+Job Role: {role}
+Role Requirements: {compact_text(role_requirements["job_description"])}
+Additional Instructions from Recruiter Side (Must follow if provided):
+{compact_text(role_requirements.get("additional_instructions") or "")}
+Your JSON response must adhere to this structure, with one entry per resume:
+{{"verdicts": [{{"candidate": "C1", "selected": true/false, "matching_skills": ["skill1", "skill2"], "missing_skills": ["skill3", "skill4"], "experience_level": "junior/mid/senior", "confidence": 0.0-1.0, "feedback": "Detailed feedback explaining the decision"}}]}}
+
+{EVALUATION_GUIDELINES}"""
+
+
+def build_multi_resume_suffix(resume_texts: List[str]) -> str:
+    """Already-compacted resumes labelled C1, C2, ... in order."""
+    return "".join(
+        f"\n### C{number}\n{text}\n" for number, text in enumerate(resume_texts, 1)
+    )
+
+
+def _record(
+    candidate: str, role: str, verdict: Optional[dict], error: str = ""
+) -> dict:
+    record = {"candidate": candidate, "role": role, "error": None}
+    if verdict is None:
+        record["error"] = error or "No verdict returned"
+    else:
+        record.update(verdict)
+    return record
+
+
+def _analyzer(model_provider: str, api_key: str, output: str, verdicts: int) -> Agent:
+    return create_resume_analyzer_agent(
+        model_provider,
+        api_key,
+        output=output,
+        max_tokens=min(MAX_OUTPUT_TOKENS, (verdicts + 1) * VERDICT_OUTPUT_TOKENS),
+    )
+
+
+def run_verdict_list(analyzer: Agent, message, key: str) -> Dict[str, dict]:
+    """Run a multi-verdict prompt, repairing a malformed reply like
+    :func:`tasks.parse_or_repair` does for single verdicts.
+    """
+    shape = (
+        f'a JSON object {{"verdicts": [...]}} where each entry has a "{key}" '
+        f"label and {VERDICT_SHAPE}"
+    )
+    text = analysis_response_text(analyzer.run(message))
+    for attempt in range(MAX_REPAIR_ATTEMPTS + 1):
+        try:
+            verdicts, cleaned = parse_verdict_list(text, key)
+        except AnalysisParseError as e:
+            if attempt == MAX_REPAIR_ATTEMPTS:
+                parse_metrics.record("failed")
+                raise
+            logger.warning(f"Could not parse verdicts ({e}); requesting a repair")
+            parse_metrics.record_repair_call()
+            text = analysis_response_text(analyzer.run(repair_prompt(text, e, shape)))
+            continue
+        parse_metrics.record(
+            "repaired" if attempt else "tolerant" if cleaned else "strict"
+        )
+        return verdicts
+
+
+def _cached(
+    cache: AnalysisCache,
+    resume_text: str,
+    role: str,
+    role_requirements: dict,
+    analyzer: Agent,
+    prompt_kind: str,
+) -> Optional[dict]:
+    """A cached single-role verdict for the pair, else one cached earlier by
+    the same ``prompt_kind``.
+    """
+    for kind in ("single", prompt_kind):
+        verdict = cache.get(
+            analysis_cache_key(resume_text, role_requirements, role, analyzer, kind)
+        )
+        if verdict is not None:
+            return verdict
+    return None
+
+
+def _single(
+    candidate: str,
+    resume_text: str,
+    role: str,
+    role_requirements: dict,
+    model_provider: str,
+    api_key: str,
+    cache: Optional[AnalysisCache],
+) -> dict:
+    """Fallback for a pair the multi-verdict reply left out."""
+    try:
+        analyzer = create_resume_analyzer_agent(model_provider, api_key)
+        verdict = run_analysis(resume_text, role_requirements, role, analyzer, cache)
+        return _record(candidate, role, verdict)
+    except Exception as e:
+        return _record(candidate, role, None, f"Error analyzing resume: {str(e)}")
+
+
+def match_roles(
+    candidate: str,
+    resume_text: str,
+    roles: Dict[str, dict],
+    model_provider: str,
+    api_key: str,
+    cache: Optional[AnalysisCache] = None,
+) -> List[dict]:
+    """Evaluate one resume against every role in ``roles`` (``{role:
+    requirements}``), up to ``MAX_ROLES_PER_CALL`` roles per call.
+
+    Roles already analyzed for this resume, on their own or in an earlier
+    multi-role call, are not sent again. New verdicts are cached as
+    multi-role ones, so they never stand in for a single-role analysis.
+    """
+    records: Dict[str, dict] = {}
+    pending = dict(roles)
+    if cache is not None:
+        analyzer = _analyzer(model_provider, api_key, "multi_role_analysis", 1)
+        for role, requirements in roles.items():
+            cached = _cached(
+                cache, resume_text, role, requirements, analyzer, "multi_role"
+            )
+            if cached is not None:
+                records[role] = _record(candidate, role, cached)
+                del pending[role]
+
+    names = list(pending)
+    for start in range(0, len(names), MAX_ROLES_PER_CALL):
+        chunk = {
+            role: pending[role] for role in names[start : start + MAX_ROLES_PER_CALL]
+        }
+        labels = {f"R{number}": role for number, role in enumerate(chunk, 1)}
+        analyzer = _analyzer(model_provider, api_key, "multi_role_analysis", len(chunk))
+        message = cacheable_message(
+            build_multi_role_prefix(chunk),
+            build_analysis_suffix(resume_text, model_provider),
+            model_provider,
+        )
+        try:
+            verdicts = run_verdict_list(analyzer, message, "role")
+        except Exception as e:
+            logger.warning(f"Multi-role analysis failed ({e}); analyzing roles singly")
+            verdicts = {}
+        for label, role in labels.items():
+            verdict = verdicts.get(label)
+            if verdict is None:
+                records[role] = _single(
+                    candidate,
+                    resume_text,
+                    role,
+                    chunk[role],
+                    model_provider,
+                    api_key,
+                    cache,
+                )
+                continue
+            if cache is not None:
+                cache.put(
+                    analysis_cache_key(
+                        resume_text, chunk[role], role, analyzer, "multi_role"
+                    ),
+                    role,
+                    verdict,
+                )
+            records[role] = _record(candidate, role, verdict)
+    return [records[role] for role in roles]
+
+
+def pack_resumes(
+    resumes: Iterable[Tuple[str, str]],
+    model_provider: Optional[str] = None,
+    token_budget: int = PACK_TOKEN_BUDGET,
+    max_resumes: int = MAX_RESUMES_PER_CALL,
+) -> List[List[Tuple[str, str, str]]]:
+    """Group ``(candidate, resume_text)`` pairs into packs of ``(candidate,
+    resume_text, compacted_text)`` that fit ``token_budget``.
+    """
+    packs: List[List[Tuple[str, str, str]]] = []
+    pack: List[Tuple[str, str, str]] = []
+    used = 0
+    for candidate, resume_text in resumes:
+        compaction = compact_resume(resume_text, model_provider)
+        if pack and (
+            used + compaction.tokens_after > token_budget or len(pack) == max_resumes
+        ):
+            packs.append(pack)
+            pack, used = [], 0
+        pack.append((candidate, resume_text, compaction.text))
+        used += compaction.tokens_after
+    if pack:
+        packs.append(pack)
+    return packs
+
+
+def match_resumes(
+    resumes: Iterable[Tuple[str, str]],
+    role: str,
+    role_requirements: dict,
+    model_provider: str,
+    api_key: str,
+    concurrency: int = 4,
+    cache: Optional[AnalysisCache] = None,
+) -> List[dict]:
+    """Evaluate ``(candidate, resume_text)`` pairs against one role, packing
+    several resumes into each request. Records come back in input order.
+
+    Resumes already analyzed for the role, on their own or in an earlier
+    pack, are not sent again. New verdicts are cached as packed ones, so they
+    never stand in for a single-role analysis.
+    """
+    resumes = list(resumes)
+    cached: Dict[int, dict] = {}
+    if cache is not None:
+        analyzer = _analyzer(model_provider, api_key, "multi_resume_analysis", 1)
+        for index, (candidate, resume_text) in enumerate(resumes):
+            verdict = _cached(
+                cache, resume_text, role, role_requirements, analyzer, "packed"
+            )
+            if verdict is not None:
+                cached[index] = _record(candidate, role, verdict)
+    prefix = build_multi_resume_prefix(role_requirements, role)
+
+    def run_pack(pack: List[Tuple[str, str, str]]) -> List[dict]:
+        analyzer = _analyzer(
+            model_provider, api_key, "multi_resume_analysis", len(pack)
+        )
+        message = cacheable_message(
+            prefix,
+            build_multi_resume_suffix([compacted for _, _, compacted in pack]),
+            model_provider,
+        )
+        try:
+            verdicts = run_verdict_list(analyzer, message, "candidate")
+        except Exception as e:
+            logger.warning(f"Packed analysis failed ({e}); analyzing resumes singly")
+            verdicts = {}
+        records = []
+        for number, (candidate, resume_text, _) in enumerate(pack, 1):
+            verdict = verdicts.get(f"C{number}")
+            if verdict is None:
+                records.append(
+                    _single(
+                        candidate,
+                        resume_text,
+                        role,
+                        role_requirements,
+                        model_provider,
+                        api_key,
+                        cache,
+                    )
+                )
+                continue
+            if cache is not None:
+                cache.put(
+                    analysis_cache_key(
+                        resume_text, role_requirements, role, analyzer, "packed"
+                    ),
+                    role,
+                    verdict,
+                )
+            records.append(_record(candidate, role, verdict))
+        return records
+
+    packs = pack_resumes(
+        [resume for index, resume in enumerate(resumes) if index not in cached],
+        model_provider,
+    )
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        analyzed = iter(
+            [record for records in executor.map(run_pack, packs) for record in records]
+        )
+    return [
+        cached[index] if index in cached else next(analyzed)
+        for index in range(len(resumes))
+    ]
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("mode", choices=["roles", "pack"])
+    parser.add_argument("--input", required=True, help="Folder or archive of PDFs")
+    parser.add_argument("--provider", choices=sorted(API_KEY_ENV_VARS), required=True)
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--output", default="matches.jsonl")
+    parser.add_argument(
+        "--roles", nargs="*", default=None, help="Roles to match (default: all)"
+    )
+    parser.add_argument("--role", default=None, help="Role for pack mode")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    api_key = args.api_key or os.environ.get(API_KEY_ENV_VARS[args.provider])
+    if not api_key:
+        parser.error(f"Pass --api-key or set {API_KEY_ENV_VARS[args.provider]}")
+    descriptions = load_job_descriptions()
+    with PdfExtractor() as extractor:
+        resumes = [
+            (candidate_id, extractor.extract(pdf_bytes))
+            for candidate_id, pdf_bytes in iter_resumes(args.input)
+        ]
+    cache = get_analysis_cache()
+
+    if args.mode == "roles":
+        roles = {role: descriptions[role] for role in (args.roles or descriptions)}
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = executor.map(
+                lambda resume: match_roles(
+                    *resume, roles, args.provider, api_key, cache=cache
+                ),
+                resumes,
+            )
+            records = [record for records in results for record in records]
+    else:
+        if not args.role:
+            parser.error("pack mode needs --role")
+        records = match_resumes(
+            resumes,
+            args.role,
+            descriptions[args.role],
+            args.provider,
+            api_key,
+            concurrency=args.concurrency,
+            cache=cache,
+        )
+
+    with open(args.output, "w") as out:
+        for record in records:
+            out.write(json.dumps(record) + "\n")
+    failed = sum(bool(record["error"]) for record in records)
+    print(f"{len(records)} verdicts for {len(resumes)} resumes, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
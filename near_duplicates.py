@@ -0,0 +1,314 @@
+"""Near-duplicate detection over extracted resume text.
+
+Each resume is reduced to the set of its word 3-grams and summarized by a
+MinHash signature: for each of ``NUM_PERMUTATIONS`` hash functions, the
+smallest hash of any shingle. The share of equal positions in two signatures
+estimates the Jaccard similarity of the shingle sets, so a lightly edited CV,
+or the same profile sent again under another email, scores close to 1.
+
+Signatures are split into ``BANDS`` bands, and each band is hashed into a
+bucket (locality-sensitive hashing). Resumes sharing a bucket in any band are
+the only candidates compared, so a lookup is one indexed query whatever the
+size of the pool. The index lives in SQLite next to the analysis cache and is
+append-only. Verdicts are stored per resume and role, so a duplicate can
+reuse the verdict of the resume it copies instead of being analyzed again.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from phi.utils.log import logger
+
+DUPLICATE_INDEX_PATH = "data/near_duplicates.sqlite3"
+NUM_PERMUTATIONS = 128
+# 32 bands of 4 rows: pairs above a Jaccard similarity of about 0.45 are
+# likely to share a bucket; they are then compared on the full signature.
+BANDS = 32
+SHINGLE_WORDS = 3
+# Estimated Jaccard similarity from which a resume counts as a duplicate.
+DEFAULT_THRESHOLD = 0.8
+# Changing the seed changes every signature, so it is stored with the index.
+HASH_SEED = 20240611
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+
+def _hash_functions(count: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    # Multiply-shift hashing: odd multipliers, with the top 32 bits kept.
+    a = rng.integers(1, 2**63, size=count, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=count, dtype=np.uint64)
+    return a, b
+
+
+_A, _B = _hash_functions(NUM_PERMUTATIONS, HASH_SEED)
+_SHINGLE_MULTIPLIERS = _hash_functions(SHINGLE_WORDS, HASH_SEED + 1)[0]
+_BAND_MULTIPLIERS = _hash_functions(NUM_PERMUTATIONS // BANDS, HASH_SEED + 2)[0]
+_BAND_NUMBERS = np.arange(BANDS, dtype=np.uint64) << np.uint64(56)
+_EMPTY_SIGNATURE = np.full(NUM_PERMUTATIONS, 2**32 - 1, dtype=np.uint32)
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """32-bit hashes of the word ``SHINGLE_WORDS``-grams of ``text``, lowercased.
+
+    Words are hashed once and combined per shingle, rather than hashing
+    every joined n-gram string.
+    """
+    words = _TOKEN_RE.findall(text.lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    hashes = np.fromiter(
+        (zlib.crc32(word.encode("utf-8")) for word in words),
+        dtype=np.uint64,
+        count=len(words),
+    )
+    if len(words) < SHINGLE_WORDS:
+        # A text this short is a single, partial shingle.
+        hashes = np.pad(hashes, (0, SHINGLE_WORDS - len(words)))
+    count = len(hashes) - SHINGLE_WORDS + 1
+    combined = np.zeros(count, dtype=np.uint64)
+    # uint64 arithmetic wraps, which is what the hashing here relies on.
+    for position, multiplier in enumerate(_SHINGLE_MULTIPLIERS):
+        combined += hashes[position : position + count] * multiplier
+    return combined >> np.uint64(32)
+
+
+def minhash(text: str) -> np.ndarray:
+    """The ``NUM_PERMUTATIONS``-long uint32 MinHash signature of ``text``."""
+    hashes = shingle_hashes(text)
+    if not len(hashes):
+        return _EMPTY_SIGNATURE.copy()
+    permuted = np.outer(hashes, _A)
+    permuted += _B
+    # Shifting is monotonic, so only the minima need it.
+    return (permuted.min(axis=0) >> np.uint64(32)).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> List[int]:
+    """One bucket key per band, with the band number in the top bits."""
+    rows = signature.reshape(BANDS, -1).astype(np.uint64)
+    mixed = (rows * _BAND_MULTIPLIERS).sum(axis=1)
+    return ((mixed >> np.uint64(8)) | _BAND_NUMBERS).tolist()
+
+
+def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return float(np.mean(signature == other))
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    resume_id: int
+    candidate: str
+    similarity: float
+
+
+@dataclass(frozen=True)
+class DuplicateCheck:
+    """The outcome of adding a resume to the index.
+
+    ``match`` is the most similar resume already indexed, if any is above the
+    threshold. ``verdict`` is the verdict of the most similar such resume for
+    the role asked about, which stands in for an analysis.
+    """
+
+    resume_id: int
+    match: Optional[DuplicateMatch] = None
+    verdict: Optional[dict] = None
+
+
+class DuplicateIndex:
+    def __init__(
+        self, path: str = DUPLICATE_INDEX_PATH, threshold: float = DEFAULT_THRESHOLD
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.checked = 0
+        self.duplicates = 0
+        self.verdicts_reused = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Commits skip fsync in WAL mode; the index can be rebuilt, and a
+        # lookup on every insert should not wait for the disk.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS resumes (
+                id INTEGER PRIMARY KEY,
+                candidate TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                key INTEGER NOT NULL,
+                resume_id INTEGER NOT NULL,
+                PRIMARY KEY (key, resume_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS verdicts (
+                resume_id INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                verdict TEXT NOT NULL,
+                PRIMARY KEY (resume_id, role)
+            );
+            CREATE INDEX IF NOT EXISTS idx_verdicts_role ON verdicts (role);
+            """
+        )
+        self._check_parameters()
+        self._conn.commit()
+
+    def _check_parameters(self) -> None:
+        parameters = json.dumps([NUM_PERMUTATIONS, BANDS, SHINGLE_WORDS, HASH_SEED])
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE name = 'parameters'"
+        ).fetchone()
+        if row is None:
+            self._conn.execute(
+                "INSERT INTO meta (name, value) VALUES ('parameters', ?)",
+                (parameters,),
+            )
+        elif row[0] != parameters:
+            raise ValueError(
+                f"Index at {self.path} was built with other MinHash parameters "
+                f"({row[0]}); delete it to rebuild"
+            )
+
+    def _matches(self, signature: np.ndarray, keys: List[int]) -> List[DuplicateMatch]:
+        """Indexed resumes above the threshold, most similar first."""
+        rows = self._conn.execute(
+            "SELECT DISTINCT r.id, r.candidate, r.signature FROM lsh_buckets b "
+            "JOIN resumes r ON r.id = b.resume_id "
+            f"WHERE b.key IN ({','.join('?' * len(keys))})",
+            keys,
+        ).fetchall()
+        matches = []
+        for resume_id, candidate, blob in rows:
+            score = similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= self.threshold:
+                matches.append(DuplicateMatch(resume_id, candidate, score))
+        matches.sort(key=lambda match: match.similarity, reverse=True)
+        return matches
+
+    def find(self, resume_text: str) -> Optional[DuplicateMatch]:
+        """The indexed resume most similar to ``resume_text``, without adding it."""
+        signature = minhash(resume_text)
+        with self._lock:
+            matches = self._matches(signature, band_keys(signature))
+        return matches[0] if matches else None
+
+    def add(
+        self, candidate: str, resume_text: str, role: Optional[str] = None
+    ) -> DuplicateCheck:
+        """Index ``resume_text`` and return its closest earlier duplicate.
+
+        With ``role`` set, the verdict of the closest duplicate already
+        screened for that role is returned too and recorded for the new
+        resume, so later copies find it as well.
+        """
+        signature = minhash(resume_text)
+        keys = band_keys(signature)
+        with self._lock:
+            matches = self._matches(signature, keys)
+            resume_id = self._conn.execute(
+                "INSERT INTO resumes (candidate, signature, created) VALUES (?, ?, ?)",
+                (candidate, signature.tobytes(), time.time()),
+            ).lastrowid
+            self._conn.execute(
+                "INSERT OR IGNORE INTO lsh_buckets (key, resume_id) VALUES "
+                + ",".join(["(?, ?)"] * len(keys)),
+                [value for key in keys for value in (key, resume_id)],
+            )
+            verdict = None
+            if matches and role is not None:
+                verdict = self._closest_verdict(matches, role)
+                if verdict is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO verdicts (resume_id, role, verdict) "
+                        "VALUES (?, ?, ?)",
+                        (resume_id, role, json.dumps(verdict)),
+                    )
+            self._conn.commit()
+            self.checked += 1
+            self.duplicates += bool(matches)
+            self.verdicts_reused += verdict is not None
+        if matches:
+            logger.info(
+                f"{candidate}'s resume is a near-duplicate of {matches[0].candidate}'s "
+                f"(similarity {matches[0].similarity:.2f})"
+            )
+        return DuplicateCheck(resume_id, matches[0] if matches else None, verdict)
+
+    def _closest_verdict(
+        self, matches: List[DuplicateMatch], role: str
+    ) -> Optional[dict]:
+        placeholders = ",".join("?" * len(matches))
+        verdicts = dict(
+            self._conn.execute(
+                "SELECT resume_id, verdict FROM verdicts "
+                f"WHERE role = ? AND resume_id IN ({placeholders})",
+                [role, *(match.resume_id for match in matches)],
+            ).fetchall()
+        )
+        for match in matches:
+            if match.resume_id in verdicts:
+                return json.loads(verdicts[match.resume_id])
+        return None
+
+    def record_verdict(self, resume_id: int, role: str, verdict: dict) -> None:
+        """Remember the analysis verdict of an indexed resume for ``role``."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (resume_id, role, verdict) "
+                "VALUES (?, ?, ?)",
+                (resume_id, role, json.dumps(verdict)),
+            )
+            self._conn.commit()
+
+    def invalidate_role(self, role: str) -> int:
+        """Drop every stored verdict for ``role``, returning how many were removed."""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM verdicts WHERE role = ?", (role,)
+            ).rowcount
+            self._conn.commit()
+        if removed:
+            logger.info(f"Invalidated {removed} duplicate verdicts for role '{role}'")
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            # Rows are never deleted, so the largest id is the count.
+            (resumes,) = self._conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM resumes"
+            ).fetchone()
+        return {
+            "resumes": resumes,
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "verdicts_reused": self.verdicts_reused,
+        }
+
+
+_index: Optional[DuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_duplicate_index() -> DuplicateIndex:
+    """Return the process-wide duplicate index, opening it on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DuplicateIndex()
+        return _index
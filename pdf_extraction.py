@@ -0,0 +1,194 @@
+"""PDF text extraction: page streaming, a process pool and an on-disk cache.
+
+``iter_pdf_pages`` yields text one page at a time so callers never build the
+text with repeated concatenation. ``PdfExtractor`` parses in worker processes
+(PyPDF2 is pure Python and holds the GIL) and stores the extracted pages on
+disk keyed by the file's SHA-256, so the same PDF is never parsed twice.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+import PyPDF2
+
+PDF_TEXT_CACHE_DIR = "data/pdf_text_cache"
+
+
+def iter_pdf_pages(
+    pdf_file, max_pages: Optional[int] = None, max_bytes: Optional[int] = None
+) -> Iterator[str]:
+    """Yield the text of each page of ``pdf_file`` (a path or file-like object).
+
+    Extraction stops after ``max_pages`` pages, or once ``max_bytes`` bytes of
+    UTF-8 text have been produced; the page crossing the limit is truncated.
+    """
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    produced = 0
+    for number, page in enumerate(pdf_reader.pages):
+        if max_pages is not None and number >= max_pages:
+            return
+        text = page.extract_text() or ""
+        if max_bytes is not None:
+            remaining = max_bytes - produced
+            encoded = text.encode("utf-8")
+            if len(encoded) >= remaining:
+                yield encoded[:remaining].decode("utf-8", errors="ignore")
+                return
+            produced += len(encoded)
+        yield text
+
+
+def extract_text(
+    pdf_file, max_pages: Optional[int] = None, max_bytes: Optional[int] = None
+) -> str:
+    return "".join(iter_pdf_pages(pdf_file, max_pages, max_bytes))
+
+
+def _parse_pages(
+    pdf_bytes: bytes, max_pages: Optional[int], max_bytes: Optional[int]
+) -> List[str]:
+    # Runs in a worker process, so it must stay a picklable module-level function.
+    return list(iter_pdf_pages(io.BytesIO(pdf_bytes), max_pages, max_bytes))
+
+
+def pdf_cache_key(
+    pdf_bytes: bytes,
+    max_pages: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    digest: Optional[str] = None,
+) -> str:
+    """The cache key; pass ``digest`` when the SHA-256 of the PDF is known."""
+    key = digest or hashlib.sha256(pdf_bytes).hexdigest()
+    if max_pages is not None or max_bytes is not None:
+        key += f"-{max_pages}-{max_bytes}"
+    return key
+
+
+class PdfTextCache:
+    """Extracted pages stored as one JSON file per PDF content hash."""
+
+    def __init__(self, directory: str = PDF_TEXT_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[str]]:
+        try:
+            with open(self._path(key), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, pages: List[str]) -> None:
+        # Write to a temporary file first so readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(pages, f)
+        os.replace(tmp_path, self._path(key))
+
+
+_cache: Optional[PdfTextCache] = None
+
+
+def get_pdf_text_cache() -> PdfTextCache:
+    global _cache
+    if _cache is None:
+        _cache = PdfTextCache()
+    return _cache
+
+
+def extract_text_cached(
+    pdf_bytes: bytes,
+    max_pages: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    digest: Optional[str] = None,
+) -> str:
+    """Extract in the calling process, reusing the on-disk cache."""
+    cache = get_pdf_text_cache()
+    key = pdf_cache_key(pdf_bytes, max_pages, max_bytes, digest)
+    pages = cache.get(key)
+    if pages is None:
+        pages = _parse_pages(pdf_bytes, max_pages, max_bytes)
+        cache.put(key, pages)
+    return "".join(pages)
+
+
+class PdfExtractor:
+    """Cached, process-parallel PDF text extraction.
+
+    Safe to share between threads; the worker pool is created on first use.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cache: Optional[PdfTextCache] = None,
+        max_pages: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.workers = workers
+        self.cache = cache if cache is not None else get_pdf_text_cache()
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers)
+            return self._pool
+
+    def cache_key(self, pdf_bytes: bytes) -> str:
+        return pdf_cache_key(pdf_bytes, self.max_pages, self.max_bytes)
+
+    def iter_pages(self, pdf_bytes: bytes) -> Iterator[str]:
+        """Yield page texts, served from the cache when this PDF was seen before."""
+        key = self.cache_key(pdf_bytes)
+        pages = self.cache.get(key)
+        if pages is None:
+            future = self._get_pool().submit(
+                _parse_pages, pdf_bytes, self.max_pages, self.max_bytes
+            )
+            pages = future.result()
+            self.cache.put(key, pages)
+        yield from pages
+
+    def extract(self, pdf_bytes: bytes) -> str:
+        return "".join(self.iter_pages(pdf_bytes))
+
+    async def extract_async(self, pdf_bytes: bytes) -> str:
+        key = self.cache_key(pdf_bytes)
+        pages = self.cache.get(key)
+        if pages is None:
+            loop = asyncio.get_running_loop()
+            pages = await loop.run_in_executor(
+                self._get_pool(),
+                _parse_pages,
+                pdf_bytes,
+                self.max_pages,
+                self.max_bytes,
+            )
+            self.cache.put(key, pages)
+        return "".join(pages)
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def __enter__(self) -> "PdfExtractor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
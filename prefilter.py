@@ -0,0 +1,200 @@
+"""Cheap, deterministic pre-screening ahead of the LLM analysis.
+
+Required skills are pulled out of a role's ``job_description`` (the bullet
+lists, plus any known skill mentioned anywhere in the text). Each skill is
+expanded with its synonyms into an inverted index from normalized phrase to
+skill, so scoring a resume is a single pass over its n-grams. Candidates whose
+skill coverage is below the threshold are rejected without an LLM call.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Set, Tuple
+
+from phi.utils.log import logger
+
+DEFAULT_THRESHOLD = 0.25
+MAX_PHRASE_WORDS = 3
+
+# Canonical skill -> alternative spellings a resume may use instead. Single
+# words that usually mean something else ("design", "agents", "ui", "ts") only
+# count as part of a longer phrase.
+SKILL_SYNONYMS: Dict[str, List[str]] = {
+    "python": ["py", "python3"],
+    "pytorch": ["torch"],
+    "tensorflow": ["tf", "keras"],
+    "machine learning": ["ml", "scikit-learn", "sklearn", "xgboost"],
+    "deep learning": ["neural networks", "neural network", "cnn", "rnn", "lstm"],
+    "data preprocessing": ["data cleaning", "feature engineering", "etl"],
+    "data analysis": ["pandas", "numpy", "data analytics", "eda"],
+    "mlops": ["model deployment", "mlflow", "kubeflow", "sagemaker", "vertex ai"],
+    "rag": ["retrieval augmented generation", "retrieval-augmented generation"],
+    "llm": ["llms", "large language models", "large language model", "gpt"],
+    "fine tuning": ["finetuning", "fine-tuning", "lora", "peft"],
+    "prompt engineering": ["prompting", "prompt design"],
+    "rlhf": ["reinforcement learning from human feedback", "dpo"],
+    "distillation": ["knowledge distillation"],
+    "ai agents": [
+        "ai agent",
+        "llm agents",
+        "agentic",
+        "langchain",
+        "langgraph",
+        "autogen",
+    ],
+    "react": ["react.js", "reactjs", "next.js", "nextjs"],
+    "typescript": [],
+    "full-stack": ["full stack", "fullstack", "frontend", "backend"],
+    "product management": ["product manager", "roadmap", "product strategy"],
+    "product design": [
+        "ux",
+        "ux design",
+        "ui design",
+        "ui ux",
+        "figma",
+        "user experience",
+        "user experiences",
+    ],
+    "healthcare": ["health care", "medical", "clinical", "ehr"],
+}
+
+# Bullet fragments too generic to count as a skill on their own.
+GENERIC_TERMS = {
+    "algorithms",
+    "analysis",
+    "concepts",
+    "experience",
+    "frameworks",
+    "knowledge",
+    "skills",
+    "systems",
+    "tools",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.+)$")
+
+
+def normalize(text: str) -> str:
+    # Dots and hyphens belong inside tokens ("node.js", "scikit-learn"), not at
+    # the end, where they are sentence or line punctuation ("... and Python.").
+    tokens = (token.rstrip(".-") for token in _TOKEN_RE.findall(text.lower()))
+    return " ".join(token for token in tokens if token)
+
+
+def _known_skills(phrases: Set[str]) -> List[str]:
+    return [
+        skill
+        for skill, synonyms in SKILL_SYNONYMS.items()
+        if skill in phrases or any(s in phrases for s in synonyms)
+    ]
+
+
+def extract_required_skills(job_description: str) -> List[str]:
+    """Return the canonical skills required by a job description."""
+    skills: List[str] = []
+    for line in job_description.splitlines():
+        match = _BULLET_RE.match(line)
+        if not match:
+            continue
+        for part in re.split(r",|/|\band\b|\(|\)", match.group(1)):
+            phrase = normalize(part)
+            if not phrase:
+                continue
+            known = _known_skills(_phrases(phrase))
+            if known:
+                skills.extend(known)
+            elif (
+                phrase not in GENERIC_TERMS and len(phrase.split()) <= MAX_PHRASE_WORDS
+            ):
+                skills.append(phrase)
+    # Prose-only descriptions have no bullets, so also look for known skills.
+    skills.extend(_known_skills(_phrases(job_description)))
+    return list(dict.fromkeys(skills))
+
+
+def _phrases(text: str) -> Set[str]:
+    """All 1..MAX_PHRASE_WORDS word n-grams of the normalized text."""
+    words = normalize(text).split()
+    phrases = set()
+    for size in range(1, MAX_PHRASE_WORDS + 1):
+        for i in range(len(words) - size + 1):
+            phrases.add(" ".join(words[i : i + size]))
+    return phrases
+
+
+class PreFilter:
+    """Scores resumes against one role's required skills."""
+
+    def __init__(self, role_requirements: dict, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.skills = extract_required_skills(role_requirements["job_description"])
+        self.index: Dict[str, Set[int]] = {}
+        for skill_id, skill in enumerate(self.skills):
+            for phrase in [skill, *SKILL_SYNONYMS.get(skill, [])]:
+                self.index.setdefault(normalize(phrase), set()).add(skill_id)
+        self.evaluated = 0
+        self.forwarded = 0
+        self._lock = threading.Lock()
+
+    @property
+    def llm_calls_saved(self) -> int:
+        return self.evaluated - self.forwarded
+
+    def score(self, resume_text: str) -> Tuple[float, List[str], List[str]]:
+        """Return ``(coverage, matching_skills, missing_skills)`` for a resume."""
+        if not self.skills:
+            return 1.0, [], []
+        matched: Set[int] = set()
+        for phrase in _phrases(resume_text):
+            skill_ids = self.index.get(phrase)
+            if skill_ids:
+                matched |= skill_ids
+        matching = [s for i, s in enumerate(self.skills) if i in matched]
+        missing = [s for i, s in enumerate(self.skills) if i not in matched]
+        return len(matched) / len(self.skills), matching, missing
+
+    def should_analyze(self, resume_text: str) -> bool:
+        forward, _ = self.screen(resume_text)
+        return forward
+
+    def screen(self, resume_text: str) -> Tuple[bool, dict]:
+        """Score a resume and, when it falls below the threshold, build the
+        rejection verdict that stands in for the LLM's.
+        """
+        coverage, matching, missing = self.score(resume_text)
+        forward = coverage >= self.threshold
+        with self._lock:
+            self.evaluated += 1
+            self.forwarded += forward
+        if forward:
+            return True, {}
+        return False, {
+            "selected": False,
+            "feedback": (
+                f"The resume covers {coverage:.0%} of the role's required skills; "
+                f"missing: {', '.join(missing)}."
+            ),
+            "matching_skills": matching,
+            "missing_skills": missing,
+            "prefilter_score": round(coverage, 3),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "evaluated": self.evaluated,
+            "forwarded": self.forwarded,
+            "llm_calls_saved": self.llm_calls_saved,
+        }
+
+
+def prefilter_resumes(
+    resumes: Iterable[Tuple[str, str]], pre_filter: PreFilter
+) -> List[Tuple[str, str]]:
+    """Keep the ``(candidate_id, resume_text)`` pairs worth sending to the LLM."""
+    kept = [(cid, text) for cid, text in resumes if pre_filter.should_analyze(text)]
+    logger.info(
+        f"Pre-filter forwarded {pre_filter.forwarded}/{pre_filter.evaluated} "
+        f"resumes, saving {pre_filter.llm_calls_saved} LLM calls"
+    )
+    return kept
@@ -0,0 +1,176 @@
+"""Provider-side prompt caching for the analysis prompt.
+
+The analysis prompt is split into a prefix that is identical for every
+candidate of a role (instructions and role requirements) and a suffix
+carrying the resume. The prefix comes first, so:
+
+- OpenAI caches it automatically once the prompt is 1024 tokens or more;
+- Anthropic caches up to a ``cache_control`` breakpoint, which
+  ``cacheable_content`` places at the end of the prefix. Prompts under the
+  model's minimum cacheable length (1024 tokens for Sonnet) are sent
+  uncached without error.
+
+``CachingClaude`` and ``CachingOpenAIChat`` record how many input tokens
+each response read from the cache in ``prompt_cache_metrics``, and report
+each response's latency and tokens to ``telemetry``.
+"""
+
+import threading
+from typing import Dict, List, Optional, Union
+
+from phi.model.anthropic import Claude
+from phi.model.message import Message
+from phi.model.openai import OpenAIChat
+
+from telemetry import record_llm_response
+
+# Providers whose API takes explicit cache breakpoints.
+CACHE_CONTROL_PROVIDERS = {"Claude", "Anthropic"}
+
+
+class PromptCacheMetrics:
+    """Input and cached input tokens per provider."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, int]] = {}
+
+    def record(
+        self,
+        provider: str,
+        input_tokens: int,
+        cached_tokens: int = 0,
+        cache_write_tokens: int = 0,
+    ) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(
+                provider,
+                {
+                    "requests": 0,
+                    "input_tokens": 0,
+                    "cached_tokens": 0,
+                    "cache_write_tokens": 0,
+                },
+            )
+            totals["requests"] += 1
+            totals["input_tokens"] += input_tokens
+            totals["cached_tokens"] += cached_tokens
+            totals["cache_write_tokens"] += cache_write_tokens
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                provider: {
+                    **totals,
+                    "cached_ratio": (
+                        totals["cached_tokens"] / totals["input_tokens"]
+                        if totals["input_tokens"]
+                        else 0.0
+                    ),
+                }
+                for provider, totals in self._totals.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+prompt_cache_metrics = PromptCacheMetrics()
+
+
+def describe_cache_usage() -> List[str]:
+    """One line per provider with the share of input tokens served from cache."""
+    return [
+        f"{provider} prompt cache: {usage['cached_tokens']}/"
+        f"{usage['input_tokens']} input tokens cached ({usage['cached_ratio']:.0%})"
+        for provider, usage in prompt_cache_metrics.stats().items()
+    ]
+
+
+def _usage_value(usage, name: str) -> int:
+    if isinstance(usage, dict):
+        return usage.get(name) or 0
+    return getattr(usage, name, None) or 0
+
+
+def record_anthropic_usage(usage) -> None:
+    # Anthropic's input_tokens excludes tokens read from or written to the cache.
+    cached = _usage_value(usage, "cache_read_input_tokens")
+    written = _usage_value(usage, "cache_creation_input_tokens")
+    prompt_cache_metrics.record(
+        "Claude",
+        _usage_value(usage, "input_tokens") + cached + written,
+        cached,
+        written,
+    )
+
+
+def record_openai_usage(usage) -> None:
+    details = (
+        usage.get("prompt_tokens_details")
+        if isinstance(usage, dict)
+        else getattr(usage, "prompt_tokens_details", None)
+    )
+    prompt_cache_metrics.record(
+        "OpenAI",
+        _usage_value(usage, "prompt_tokens"),
+        _usage_value(details, "cached_tokens") if details else 0,
+    )
+
+
+def cacheable_content(prefix: str, suffix: str) -> List[dict]:
+    """Anthropic content blocks with a cache breakpoint after ``prefix``."""
+    return [
+        {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": suffix},
+    ]
+
+
+def cacheable_message(
+    prefix: str, suffix: str, model_provider: Optional[str]
+) -> Union[str, Message]:
+    """The user turn for ``Agent.run``, marked for caching where the API needs it."""
+    if model_provider in CACHE_CONTROL_PROVIDERS:
+        return Message(role="user", content=cacheable_content(prefix, suffix))
+    return prefix + suffix
+
+
+def message_text(message: Union[str, Message]) -> str:
+    """The text of a message built by ``cacheable_message``."""
+    if isinstance(message, str):
+        return message
+    return "".join(block["text"] for block in message.content)
+
+
+class CachingClaude(Claude):
+    def update_usage_metrics(self, assistant_message, usage=None, metrics=None):
+        if metrics is None:
+            super().update_usage_metrics(assistant_message, usage)
+        else:
+            super().update_usage_metrics(assistant_message, usage, metrics)
+        if usage is not None:
+            record_anthropic_usage(usage)
+            record_llm_response(
+                "Claude",
+                self.id,
+                metrics.response_timer.elapsed if metrics is not None else None,
+                _usage_value(usage, "input_tokens")
+                + _usage_value(usage, "cache_read_input_tokens")
+                + _usage_value(usage, "cache_creation_input_tokens"),
+                _usage_value(usage, "output_tokens"),
+            )
+
+
+class CachingOpenAIChat(OpenAIChat):
+    def update_usage_metrics(self, assistant_message, metrics, response_usage):
+        super().update_usage_metrics(assistant_message, metrics, response_usage)
+        if response_usage is not None:
+            record_openai_usage(response_usage)
+            record_llm_response(
+                "OpenAI",
+                self.id,
+                metrics.response_timer.elapsed,
+                _usage_value(response_usage, "prompt_tokens"),
+                _usage_value(response_usage, "completion_tokens"),
+            )
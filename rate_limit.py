@@ -0,0 +1,66 @@
+"""Rate-limiting primitives shared by the LLM, SMTP and Zoom clients."""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Hashable
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate`` per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take ``amount`` tokens and return how long the caller must wait.
+
+        The bucket may go negative, so callers queue up behind each other in
+        the order they reserved.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        delay = self.reserve(amount)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def wait(self, amount: float = 1.0) -> None:
+        delay = self.reserve(amount)
+        if delay:
+            time.sleep(delay)
+
+
+_buckets: Dict[Hashable, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def shared_bucket(key: Hashable, rate: float, capacity: float) -> TokenBucket:
+    """Return the process-wide bucket for ``key`` (a server or an account),
+    so that every client of it draws from the same limit. ``rate`` and
+    ``capacity`` only apply when the bucket is first created.
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = _buckets[key] = TokenBucket(rate, capacity)
+        return bucket
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2**attempt))
@@ -0,0 +1,311 @@
+"""Persistent store of analysis verdicts, for recruiter queries and dashboards.
+
+Every verdict is recorded with its structured fields (decision, experience
+level, confidence, matching and missing skills, feedback), from the app,
+``batch.py``, ``batch_api.py`` and multi-role matching alike. Skills go to a
+separate table keyed by normalized skill, with synonyms folded into the
+pre-filter's canonical names, so "senior candidates for role X missing skill
+Y" is answered from indexes. Pages are fetched with keyset pagination on the result id,
+newest first, so a dashboard over 100k+ candidates only ever reads one page.
+
+Usage:
+    python results_store.py --role "Senior AI ML Engineer" --level senior \\
+        --missing docker --limit 20
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from phi.utils.log import logger
+
+from prefilter import SKILL_SYNONYMS, normalize
+
+RESULTS_STORE_PATH = "data/results.sqlite3"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_CANONICAL_SKILLS = {
+    normalize(synonym): skill
+    for skill, synonyms in SKILL_SYNONYMS.items()
+    for synonym in synonyms
+}
+
+
+def skill_key(skill: str) -> str:
+    """The form a skill is indexed and queried under."""
+    key = normalize(skill)
+    return _CANONICAL_SKILLS.get(key, key)
+
+
+@dataclass(frozen=True)
+class ResultFilter:
+    """Conditions a result must meet; unset fields do not filter."""
+
+    role: Optional[str] = None
+    experience_level: Optional[str] = None
+    selected: Optional[bool] = None
+    candidate: Optional[str] = None
+    min_confidence: Optional[float] = None
+    has_skills: Sequence[str] = ()
+    missing_skills: Sequence[str] = ()
+
+    def clauses(self) -> Tuple[str, str, List[str], list]:
+        """The SQL FROM clause, the id column to order on, and the WHERE
+        conditions with their parameters.
+
+        With a skill filter, the first skill's postings (already in result id
+        order) drive the query, so a sparse skill does not mean scanning every
+        result of the role to fill a page. Other skills are primary-key probes.
+        """
+        source, id_column = "results", "results.id"
+        conditions, params = [], []
+        for column, value in (
+            ("role", self.role),
+            # Levels are stored lowercased.
+            ("experience_level", (self.experience_level or "").lower()),
+            ("candidate", self.candidate),
+        ):
+            if value:
+                conditions.append(f"results.{column} = ?")
+                params.append(value)
+        if self.selected is not None:
+            conditions.append("results.selected = ?")
+            params.append(int(self.selected))
+        if self.min_confidence is not None:
+            conditions.append("results.confidence >= ?")
+            params.append(self.min_confidence)
+        skills = [(skill, 0) for skill in self.has_skills]
+        skills += [(skill, 1) for skill in self.missing_skills]
+        for number, (skill, missing) in enumerate(skills):
+            if number == 0:
+                # CROSS JOIN keeps the postings as the outer loop.
+                source = (
+                    "result_skills AS postings CROSS JOIN results "
+                    "ON results.id = postings.result_id"
+                )
+                id_column = "postings.result_id"
+                conditions.append("postings.skill = ? AND postings.missing = ?")
+            else:
+                conditions.append(
+                    "EXISTS (SELECT 1 FROM result_skills WHERE skill = ? "
+                    "AND missing = ? AND result_id = results.id)"
+                )
+            params += [skill_key(skill), missing]
+        return source, id_column, conditions, params
+
+
+@dataclass(frozen=True)
+class ResultPage:
+    results: List[dict]
+    # Pass as ``after`` to get the next page; None on the last page.
+    next_cursor: Optional[int]
+
+
+class ResultsStore:
+    def __init__(self, path: str = RESULTS_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY,
+                candidate TEXT NOT NULL,
+                role TEXT NOT NULL,
+                selected INTEGER NOT NULL,
+                experience_level TEXT NOT NULL,
+                confidence REAL,
+                matching_skills TEXT NOT NULL,
+                missing_skills TEXT NOT NULL,
+                feedback TEXT NOT NULL,
+                source TEXT NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_results_role ON results (role);
+            CREATE INDEX IF NOT EXISTS idx_results_role_level
+                ON results (role, experience_level);
+            CREATE INDEX IF NOT EXISTS idx_results_role_selected
+                ON results (role, selected);
+            CREATE INDEX IF NOT EXISTS idx_results_candidate ON results (candidate);
+            CREATE TABLE IF NOT EXISTS result_skills (
+                skill TEXT NOT NULL,
+                missing INTEGER NOT NULL,
+                result_id INTEGER NOT NULL,
+                PRIMARY KEY (skill, missing, result_id)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    def add(self, candidate: str, role: str, verdict: dict, source: str = "app") -> int:
+        """Record one verdict, returning its result id."""
+        with self._lock, self._conn:
+            return self._insert(candidate, role, verdict, source, time.time())
+
+    def add_records(self, records: Iterable[dict], source: str) -> int:
+        """Record the verdicts in ``batch.py``-format records, skipping
+        failed ones, and return how many were recorded.
+        """
+        now = time.time()
+        added = 0
+        with self._lock, self._conn:
+            for record in records:
+                if record.get("error") or "selected" not in record:
+                    continue
+                self._insert(record["candidate"], record["role"], record, source, now)
+                added += 1
+        return added
+
+    def _insert(
+        self, candidate: str, role: str, verdict: dict, source: str, created: float
+    ) -> int:
+        matching = list(verdict.get("matching_skills") or [])
+        missing = list(verdict.get("missing_skills") or [])
+        result_id = self._conn.execute(
+            "INSERT INTO results (candidate, role, selected, experience_level, "
+            "confidence, matching_skills, missing_skills, feedback, source, created) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                candidate,
+                role,
+                int(bool(verdict.get("selected"))),
+                (verdict.get("experience_level") or "").lower(),
+                verdict.get("confidence"),
+                json.dumps(matching),
+                json.dumps(missing),
+                verdict.get("feedback") or "",
+                source,
+                created,
+            ),
+        ).lastrowid
+        skills = {(skill_key(skill), 0) for skill in matching}
+        skills |= {(skill_key(skill), 1) for skill in missing}
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO result_skills (skill, missing, result_id) "
+            "VALUES (?, ?, ?)",
+            [(skill, flag, result_id) for skill, flag in skills if skill],
+        )
+        return result_id
+
+    def query(
+        self,
+        filters: ResultFilter = ResultFilter(),
+        after: Optional[int] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> ResultPage:
+        """One page of matching results, newest first, starting after the
+        result id ``after`` (the previous page's ``next_cursor``).
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        source, id_column, conditions, params = filters.clauses()
+        if after is not None:
+            conditions.append(f"{id_column} < ?")
+            params.append(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT results.* FROM {source} {where} "
+                f"ORDER BY {id_column} DESC LIMIT ?",
+                [*params, limit + 1],
+            ).fetchall()
+        results = [_result(row) for row in rows[:limit]]
+        next_cursor = results[-1]["id"] if len(rows) > limit else None
+        return ResultPage(results, next_cursor)
+
+    def count(self, filters: ResultFilter = ResultFilter()) -> int:
+        source, _, conditions, params = filters.clauses()
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            (count,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {source} {where}", params
+            ).fetchone()
+        return count
+
+    def stats(self) -> dict:
+        with self._lock:
+            # Results are never deleted, so the largest id is the count.
+            (results,) = self._conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM results"
+            ).fetchone()
+        return {"results": results}
+
+
+def _result(row: sqlite3.Row) -> dict:
+    result = dict(row)
+    result["selected"] = bool(result["selected"])
+    result["matching_skills"] = json.loads(result["matching_skills"])
+    result["missing_skills"] = json.loads(result["missing_skills"])
+    return result
+
+
+_store: Optional[ResultsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_results_store() -> ResultsStore:
+    """Return the process-wide results store, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultsStore()
+        return _store
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query recorded verdicts.")
+    parser.add_argument("--store", default=RESULTS_STORE_PATH)
+    parser.add_argument("--role", default=None)
+    parser.add_argument("--level", default=None, help="junior, mid or senior")
+    parser.add_argument(
+        "--selected", choices=["yes", "no"], default=None, help="Filter on decision"
+    )
+    parser.add_argument("--candidate", default=None)
+    parser.add_argument("--min-confidence", type=float, default=None)
+    parser.add_argument("--has", nargs="*", default=[], help="Skills they have")
+    parser.add_argument("--missing", nargs="*", default=[], help="Skills they lack")
+    parser.add_argument("--limit", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--after", type=int, default=None, help="Page cursor")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.store)
+    filters = ResultFilter(
+        role=args.role,
+        experience_level=args.level,
+        selected=None if args.selected is None else args.selected == "yes",
+        candidate=args.candidate,
+        min_confidence=args.min_confidence,
+        has_skills=args.has,
+        missing_skills=args.missing,
+    )
+    page = store.query(filters, after=args.after, limit=args.limit)
+    for result in page.results:
+        print(
+            json.dumps(
+                {
+                    key: result[key]
+                    for key in (
+                        "id",
+                        "candidate",
+                        "role",
+                        "selected",
+                        "experience_level",
+                        "confidence",
+                        "missing_skills",
+                    )
+                }
+            )
+        )
+    logger.info(f"{store.count(filters)} matching results")
+    if page.next_cursor is not None:
+        print(f"next page: --after {page.next_cursor}")
+
+
+if __name__ == "__main__":
+    main()
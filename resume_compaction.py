@@ -0,0 +1,239 @@
+"""Shrink resume and role text before it is put into the analysis prompt.
+
+PDF extraction leaves runs of blank lines and spaces, page numbers, and
+headers/footers repeated on every page. Resumes also carry sections the
+analysis never needs (declarations, references, personal details, hobbies).
+``compact_resume`` removes these and truncates the rest to a per-provider
+token budget, counting tokens with ``tiktoken`` when it is installed and
+with a character-based estimate otherwise. ``compaction_metrics`` keeps
+running totals of the tokens saved.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# Resume tokens allowed in one analysis prompt, per provider.
+RESUME_TOKEN_BUDGETS: Dict[str, int] = {
+    "OpenAI": 3000,
+    "Claude": 3000,
+    "Mistral": 3000,
+}
+DEFAULT_RESUME_TOKEN_BUDGET = 3000
+# phidata reports Claude models under the provider name "Anthropic".
+PROVIDER_ALIASES = {"Anthropic": "Claude"}
+TIKTOKEN_ENCODINGS = {"OpenAI": "o200k_base"}
+TRUNCATION_MARKER = "[... resume truncated ...]"
+
+BOILERPLATE_HEADINGS = {
+    "declaration",
+    "references",
+    "referees",
+    "hobbies",
+    "interests",
+    "hobbies and interests",
+    "hobbies & interests",
+    "personal details",
+    "personal information",
+    "personal data",
+}
+SECTION_HEADINGS = BOILERPLATE_HEADINGS | {
+    "summary",
+    "profile",
+    "professional summary",
+    "objective",
+    "career objective",
+    "experience",
+    "work experience",
+    "professional experience",
+    "employment history",
+    "education",
+    "skills",
+    "technical skills",
+    "core competencies",
+    "projects",
+    "personal projects",
+    "certifications",
+    "certificates",
+    "publications",
+    "awards",
+    "achievements",
+    "languages",
+    "volunteering",
+    "leadership",
+}
+BOILERPLATE_LINES = re.compile(
+    r"^(references (are )?available (up)?on request\.?"
+    r"|i hereby declare.*"
+    r"|curriculum vitae|resume|r[ée]sum[ée])$",
+    re.IGNORECASE,
+)
+PAGE_NUMBER = re.compile(
+    r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$|^-\s*\d{1,3}\s*-$", re.IGNORECASE
+)
+# Repeated lines longer than this are content, not page furniture.
+MAX_FURNITURE_LENGTH = 80
+
+
+@dataclass
+class CompactionResult:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    truncated: bool
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+class CompactionMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.truncated = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def record(self, result: CompactionResult) -> None:
+        with self._lock:
+            self.calls += 1
+            self.truncated += result.truncated
+            self.tokens_before += result.tokens_before
+            self.tokens_after += result.tokens_after
+
+    def stats(self) -> dict:
+        with self._lock:
+            saved = self.tokens_before - self.tokens_after
+            return {
+                "calls": self.calls,
+                "truncated": self.truncated,
+                "tokens_before": self.tokens_before,
+                "tokens_after": self.tokens_after,
+                "tokens_saved": saved,
+                "saved_ratio": (
+                    saved / self.tokens_before if self.tokens_before else 0.0
+                ),
+            }
+
+
+compaction_metrics = CompactionMetrics()
+
+
+def _provider(model_provider: Optional[str]) -> Optional[str]:
+    return PROVIDER_ALIASES.get(model_provider, model_provider)
+
+
+@lru_cache(maxsize=None)
+def _encoding(model_provider: Optional[str]):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    # Other providers' tokenizers are not public; OpenAI's is a close stand-in.
+    return tiktoken.get_encoding(TIKTOKEN_ENCODINGS.get(model_provider, "cl100k_base"))
+
+
+def count_tokens(text: str, model_provider: Optional[str] = None) -> int:
+    encoding = _encoding(_provider(model_provider))
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # About four characters per token for English prose, more for symbols.
+    return math.ceil(len(text) / 4)
+
+
+def normalize_whitespace(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\xa0", " ")
+    # Rejoin words hyphenated across line breaks.
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[ \t\f\v]+", " ", text)
+    text = re.sub(r"[•●▪■◦·‣∙]\s*", "- ", text)
+    lines = [line.strip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _heading(line: str) -> Optional[str]:
+    key = line.strip().rstrip(":").strip().lower()
+    return key if key in SECTION_HEADINGS else None
+
+
+def drop_page_furniture(lines: List[str]) -> List[str]:
+    """Drop page numbers and repeat occurrences of short repeated lines
+    (headers and footers), keeping the first occurrence.
+    """
+    counts = Counter(line for line in lines if line)
+    seen = set()
+    kept = []
+    for line in lines:
+        if PAGE_NUMBER.match(line):
+            continue
+        if line and counts[line] > 1 and len(line) <= MAX_FURNITURE_LENGTH:
+            if line in seen and not line.startswith("- ") and not _heading(line):
+                continue
+            seen.add(line)
+        kept.append(line)
+    return kept
+
+
+def drop_boilerplate(lines: List[str]) -> List[str]:
+    """Drop boilerplate lines and sections, up to the next section heading."""
+    kept = []
+    skipping = False
+    for line in lines:
+        heading = _heading(line)
+        if heading is not None:
+            skipping = heading in BOILERPLATE_HEADINGS
+        if skipping or BOILERPLATE_LINES.match(line):
+            continue
+        kept.append(line)
+    return kept
+
+
+def truncate_to_budget(
+    text: str, budget: int, model_provider: Optional[str] = None
+) -> str:
+    """Keep whole lines from the start of ``text`` until ``budget`` tokens."""
+    marker_tokens = count_tokens(TRUNCATION_MARKER, model_provider) + 1
+    used = 0
+    kept = []
+    for line in text.split("\n"):
+        tokens = count_tokens(line, model_provider) + 1
+        if used + tokens > budget - marker_tokens:
+            break
+        kept.append(line)
+        used += tokens
+    kept.append(TRUNCATION_MARKER)
+    return "\n".join(kept)
+
+
+def compact_text(text: str) -> str:
+    """Whitespace normalization only; for role descriptions and instructions."""
+    return normalize_whitespace(text)
+
+
+def compact_resume(
+    text: str,
+    model_provider: Optional[str] = None,
+    budget: Optional[int] = None,
+    record: bool = True,
+) -> CompactionResult:
+    provider = _provider(model_provider)
+    if budget is None:
+        budget = RESUME_TOKEN_BUDGETS.get(provider, DEFAULT_RESUME_TOKEN_BUDGET)
+    tokens_before = count_tokens(text, provider)
+    lines = normalize_whitespace(text).split("\n")
+    lines = drop_boilerplate(drop_page_furniture(lines))
+    compacted = re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+    truncated = count_tokens(compacted, provider) > budget
+    if truncated:
+        compacted = truncate_to_budget(compacted, budget, provider)
+    result = CompactionResult(
+        compacted, tokens_before, count_tokens(compacted, provider), truncated
+    )
+    if record:
+        compaction_metrics.record(result)
+    return result
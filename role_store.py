@@ -0,0 +1,145 @@
+"""SQLite-backed store for job roles.
+
+Replaces reading and rewriting ``data/job_descriptions.json`` on every action.
+Writes are single atomic transactions, so concurrent recruiters (threads or
+processes) cannot clobber each other's roles. Reads are served from an
+in-memory copy that is reloaded only when the database changed, which SQLite
+reports through ``PRAGMA data_version`` for commits made by other connections.
+On first use the existing JSON file is imported.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from phi.utils.log import logger
+
+ROLE_STORE_PATH = "data/roles.sqlite3"
+LEGACY_JSON_PATH = "data/job_descriptions.json"
+
+
+class RoleStore:
+    def __init__(
+        self, path: str = ROLE_STORE_PATH, legacy_json_path: str = LEGACY_JSON_PATH
+    ):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS roles (
+                    role TEXT PRIMARY KEY,
+                    job_description TEXT NOT NULL,
+                    additional_instructions TEXT NOT NULL DEFAULT '',
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+        self._cache: Optional[Dict[str, dict]] = None
+        self._data_version: Optional[int] = None
+        self._migrate(legacy_json_path)
+
+    def _migrate(self, legacy_json_path: str) -> None:
+        """Import the legacy JSON file once, the first time the store is opened."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            done = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'migrated_from_json'"
+            ).fetchone()
+            if done or not os.path.exists(legacy_json_path):
+                return
+            with open(legacy_json_path, "r") as f:
+                legacy = json.load(f)
+            now = time.time()
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO roles "
+                "(role, job_description, additional_instructions, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        role,
+                        details["job_description"],
+                        details.get("additional_instructions", ""),
+                        now,
+                    )
+                    for role, details in legacy.items()
+                ],
+            )
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                (legacy_json_path,),
+            )
+            logger.info(f"Imported {len(legacy)} roles from {legacy_json_path}")
+
+    def all(self) -> Dict[str, dict]:
+        """Return every role, in insertion order, as the JSON file laid them out."""
+        with self._lock:
+            (data_version,) = self._conn.execute("PRAGMA data_version").fetchone()
+            if self._cache is None or data_version != self._data_version:
+                rows = self._conn.execute(
+                    "SELECT role, job_description, additional_instructions "
+                    "FROM roles ORDER BY rowid"
+                ).fetchall()
+                self._cache = {
+                    role: {
+                        "job_description": job_description,
+                        "additional_instructions": additional_instructions,
+                    }
+                    for role, job_description, additional_instructions in rows
+                }
+                self._data_version = data_version
+            return dict(self._cache)
+
+    def get(self, role: str) -> Optional[dict]:
+        return self.all().get(role)
+
+    def upsert(
+        self, role: str, job_description: str, additional_instructions: str = ""
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO roles "
+                "(role, job_description, additional_instructions, updated_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(role) DO UPDATE SET "
+                "job_description = excluded.job_description, "
+                "additional_instructions = excluded.additional_instructions, "
+                "updated_at = excluded.updated_at",
+                (role, job_description, additional_instructions, time.time()),
+            )
+            # data_version does not change for this connection's own commits.
+            self._cache = None
+
+    def delete(self, role: str) -> bool:
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM roles WHERE role = ?", (role,)
+            ).rowcount
+            self._cache = None
+        return bool(removed)
+
+    def export_json(self, path: str) -> None:
+        """Write the roles out in the legacy ``job_descriptions.json`` layout."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.all(), f, indent=4)
+        os.replace(tmp_path, path)
+
+
+_store: Optional[RoleStore] = None
+_store_lock = threading.Lock()
+
+
+def get_role_store() -> RoleStore:
+    """Return the process-wide role store, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RoleStore()
+        return _store
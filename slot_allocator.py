@@ -0,0 +1,519 @@
+"""Deterministic interview slot allocation.
+
+Replaces asking the scheduler agent to book "tomorrow at 11:00 IST" for every
+candidate, which made all candidates of a batch collide on one slot and cost
+an LLM round trip per booking. Each interviewer has working hours in their
+own timezone (defaulting to the company's business hours) plus blocked-out
+periods; candidates may restrict slots to reasonable hours in theirs. Booked
+intervals are kept per interviewer in sorted arrays searched with bisection,
+so finding the earliest free slot stays logarithmic in the bookings, and a
+large batch is allocated in one pass. Bookings are stored in SQLite and
+allocated under a write lock, so concurrent workers never double-book.
+
+Interviewers are read from ``data/interviewers.json``, for example:
+    [{"name": "Asha", "email": "asha@example.com", "timezone": "Asia/Kolkata",
+      "start": "10:00", "end": "16:00", "days": [0, 1, 2, 3],
+      "unavailable": [["2025-01-10T00:00:00+05:30", "2025-01-11T00:00:00+05:30"]]}]
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time as time_module
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pytz
+from phi.utils.log import logger
+
+from zoom_client import MeetingRequest, ZoomClient
+
+INTERVIEWERS_PATH = "data/interviewers.json"
+SLOT_BOOK_PATH = "data/interview_slots.sqlite3"
+COMPANY_TIMEZONE = "Asia/Kolkata"
+# How far ahead slots are searched before giving up on a candidate.
+DEFAULT_HORIZON_DAYS = 60
+
+
+@dataclass(frozen=True)
+class BusinessHours:
+    start: time = time(9, 0)
+    end: time = time(17, 0)
+    days: Tuple[int, ...] = (0, 1, 2, 3, 4)  # Monday is 0
+    timezone: str = COMPANY_TIMEZONE
+
+
+@dataclass
+class Interviewer:
+    name: str
+    email: str = ""
+    timezone: Optional[str] = None
+    start: Optional[time] = None
+    end: Optional[time] = None
+    days: Optional[Tuple[int, ...]] = None
+    unavailable: List[Tuple[datetime, datetime]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Interviewer":
+        return cls(
+            name=data["name"],
+            email=data.get("email", ""),
+            timezone=data.get("timezone"),
+            start=time.fromisoformat(data["start"]) if data.get("start") else None,
+            end=time.fromisoformat(data["end"]) if data.get("end") else None,
+            days=tuple(data["days"]) if data.get("days") is not None else None,
+            unavailable=[
+                (datetime.fromisoformat(a), datetime.fromisoformat(b))
+                for a, b in data.get("unavailable", [])
+            ],
+        )
+
+
+@dataclass
+class InterviewRequest:
+    candidate_email: str
+    role: str
+    # Only offer slots between these local hours of the candidate, if set.
+    timezone: Optional[str] = None
+    earliest_local: time = time(8, 0)
+    latest_local: time = time(20, 0)
+
+    @property
+    def key(self) -> str:
+        return f"{self.role}:{self.candidate_email.strip().lower()}"
+
+
+@dataclass
+class Booking:
+    candidate_key: str
+    interviewer: str
+    start: datetime  # UTC
+    end: datetime  # UTC
+    timezone: str
+    meeting_id: Optional[str] = None
+    join_url: Optional[str] = None
+
+    def local_start(self) -> datetime:
+        return self.start.astimezone(pytz.timezone(self.timezone))
+
+    def details(self) -> str:
+        """Meeting details as shown to the candidate."""
+        start = self.local_start()
+        lines = [
+            f"Date: {start.strftime('%A, %d %B %Y')}",
+            f"Time: {start.strftime('%I:%M %p')} {start.tzname()} ({self.timezone})",
+            f"Duration: {int((self.end - self.start).total_seconds() // 60)} minutes",
+            f"Interviewer: {self.interviewer}",
+        ]
+        if self.join_url:
+            lines.append(f"Zoom link: {self.join_url}")
+        if self.meeting_id:
+            lines.append(f"Meeting ID: {self.meeting_id}")
+        return "\n".join(lines)
+
+
+def load_interviewers(path: str = INTERVIEWERS_PATH) -> List[Interviewer]:
+    """Interviewers from ``path``; without it, one interviewer working the
+    company's business hours (the Zoom account host).
+    """
+    if not os.path.exists(path):
+        return [Interviewer(name="AI Recruiting Team")]
+    with open(path, "r") as f:
+        return [Interviewer.from_dict(item) for item in json.load(f)]
+
+
+class _Calendar:
+    """One interviewer's working hours and booked intervals (UTC, sorted)."""
+
+    def __init__(self, interviewer: Interviewer, hours: BusinessHours):
+        self.interviewer = interviewer
+        self.tz = pytz.timezone(interviewer.timezone or hours.timezone)
+        self.start = interviewer.start or hours.start
+        self.end = interviewer.end or hours.end
+        self.days = interviewer.days if interviewer.days is not None else hours.days
+        # Busy time as merged, non-overlapping intervals sorted by start, so
+        # ends are sorted as well and both lists can be bisected.
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        self._windows: Dict[date, Tuple[datetime, datetime]] = {}
+        for start, end in interviewer.unavailable:
+            self.book(start.astimezone(pytz.utc), end.astimezone(pytz.utc))
+
+    def book(self, start: datetime, end: datetime) -> None:
+        first = bisect_left(self._ends, start)
+        last = bisect_right(self._starts, end)
+        if first < last:
+            start = min(start, self._starts[first])
+            end = max(end, self._ends[last - 1])
+        self._starts[first:last] = [start]
+        self._ends[first:last] = [end]
+
+    def _conflict_end(self, start: datetime, end: datetime) -> Optional[datetime]:
+        """End of the busy interval overlapping ``[start, end)``, if any."""
+        index = bisect_right(self._ends, start)
+        if index < len(self._starts) and self._starts[index] < end:
+            return self._ends[index]
+        return None
+
+    def _window(self, day: date) -> Tuple[datetime, datetime]:
+        window = self._windows.get(day)
+        if window is None:
+            # Localizing dominates the search; every day is looked at many times.
+            window = self._windows[day] = (
+                self.tz.localize(datetime.combine(day, self.start)).astimezone(
+                    pytz.utc
+                ),
+                self.tz.localize(datetime.combine(day, self.end)).astimezone(pytz.utc),
+            )
+        return window
+
+    def next_free(
+        self,
+        after: datetime,
+        duration: timedelta,
+        step: timedelta,
+        until: datetime,
+        accept: Optional[Callable[[datetime], bool]] = None,
+    ) -> Optional[datetime]:
+        """Earliest start >= ``after`` (UTC) with ``duration`` free inside
+        working hours and accepted by ``accept``, or None before ``until``.
+        """
+        day = after.astimezone(self.tz).date()
+        while True:
+            window_start, window_end = self._window(day)
+            if window_start > until:
+                return None
+            if day.weekday() in self.days:
+                start = max(window_start, after)
+                # Keep slots on the step grid of the working day.
+                offset = (start - window_start) % step
+                if offset:
+                    start += step - offset
+                while start + duration <= window_end:
+                    end = start + duration
+                    conflict = self._conflict_end(start, end)
+                    if conflict is not None:
+                        offset = (conflict - window_start) % step
+                        start = conflict + (step - offset if offset else timedelta())
+                        continue
+                    if accept is None or accept(start):
+                        return start
+                    start += step
+            day += timedelta(days=1)
+
+
+class SlotAllocator:
+    def __init__(
+        self,
+        interviewers: Sequence[Interviewer],
+        hours: BusinessHours = BusinessHours(),
+        duration: timedelta = timedelta(minutes=60),
+        buffer: timedelta = timedelta(minutes=0),
+        step: timedelta = timedelta(minutes=30),
+        horizon: timedelta = timedelta(days=DEFAULT_HORIZON_DAYS),
+    ):
+        if not interviewers:
+            raise ValueError("At least one interviewer is needed")
+        self.hours = hours
+        self.duration = duration
+        self.buffer = buffer
+        self.step = step
+        self.horizon = horizon
+        self.calendars: Dict[str, _Calendar] = {
+            interviewer.name: _Calendar(interviewer, hours)
+            for interviewer in interviewers
+        }
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._heap_not_before: Optional[datetime] = None
+        self._free_from: Dict[str, datetime] = {}
+
+    def reserve(self, interviewer: str, start: datetime, end: datetime) -> None:
+        """Mark an existing booking as busy."""
+        self.calendars[interviewer].book(start, end + self.buffer)
+
+    def _earliest_constrained(
+        self, request: InterviewRequest, not_before: datetime, until: datetime
+    ) -> Optional[Tuple[datetime, str]]:
+        candidate_tz = pytz.timezone(request.timezone)
+
+        def accept(start: datetime) -> bool:
+            local_start = start.astimezone(candidate_tz).time()
+            local_end = (start + self.duration).astimezone(candidate_tz).time()
+            return (
+                request.earliest_local <= local_start
+                and local_end <= request.latest_local
+                and local_start < local_end
+            )
+
+        best = None
+        for name, calendar in self.calendars.items():
+            after = not_before
+            if (
+                self._heap_not_before is not None
+                and not_before >= self._heap_not_before
+            ):
+                # Nothing is free before the interviewer's heap entry.
+                after = max(after, self._free_from.get(name, after))
+            start = calendar.next_free(
+                after, self.duration + self.buffer, self.step, until, accept
+            )
+            if start is not None and (best is None or start < best[0]):
+                best = (start, name)
+        return best
+
+    def _earliest(
+        self, not_before: datetime, until: datetime
+    ) -> Optional[Tuple[datetime, str]]:
+        """Earliest free slot over all interviewers, from a heap of each one's
+        next free start. Bookings only ever add busy time, so heap entries are
+        lower bounds: an entry is re-checked when popped and pushed back if
+        its slot has been taken in the meantime.
+        """
+        if self._heap_not_before != not_before:
+            self._heap_not_before = not_before
+            self._heap = [
+                (not_before, order, name) for order, name in enumerate(self.calendars)
+            ]
+            self._free_from = {}
+        length = self.duration + self.buffer
+        while self._heap:
+            after, order, name = self._heap[0]
+            start = self.calendars[name].next_free(after, length, self.step, until)
+            self._free_from[name] = start or until
+            if start is None:
+                heapq.heappop(self._heap)
+            elif start == after:
+                return start, name
+            else:
+                heapq.heapreplace(self._heap, (start, order, name))
+        return None
+
+    def allocate_one(
+        self, request: InterviewRequest, not_before: datetime
+    ) -> Optional[Tuple[str, datetime, datetime]]:
+        until = not_before + self.horizon
+        if request.timezone:
+            best = self._earliest_constrained(request, not_before, until)
+        else:
+            best = self._earliest(not_before, until)
+        if best is None:
+            return None
+        start, name = best
+        end = start + self.duration
+        self.calendars[name].book(start, end + self.buffer)
+        return name, start, end
+
+    def allocate(
+        self, requests: Iterable[InterviewRequest], not_before: datetime
+    ) -> List[Optional[Tuple[str, datetime, datetime]]]:
+        """Assign non-overlapping slots to ``requests`` in order, earliest first."""
+        return [self.allocate_one(request, not_before) for request in requests]
+
+
+class SlotBook:
+    """Persisted interview bookings, shared by every worker and process."""
+
+    def __init__(self, path: str = SLOT_BOOK_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS bookings (
+                candidate_key TEXT PRIMARY KEY,
+                interviewer TEXT NOT NULL,
+                start_utc REAL NOT NULL,
+                end_utc REAL NOT NULL,
+                timezone TEXT NOT NULL,
+                meeting_id TEXT,
+                join_url TEXT,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS bookings_by_end ON bookings (end_utc)"
+        )
+
+    @staticmethod
+    def _booking(row) -> Booking:
+        key, interviewer, start, end, tz, meeting_id, join_url = row
+        return Booking(
+            key,
+            interviewer,
+            datetime.fromtimestamp(start, pytz.utc),
+            datetime.fromtimestamp(end, pytz.utc),
+            tz,
+            meeting_id,
+            join_url,
+        )
+
+    def get(self, candidate_key: str) -> Optional[Booking]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT candidate_key, interviewer, start_utc, end_utc, timezone, "
+                "meeting_id, join_url FROM bookings WHERE candidate_key = ?",
+                (candidate_key,),
+            ).fetchone()
+        return self._booking(row) if row else None
+
+    def allocate(
+        self,
+        allocator: SlotAllocator,
+        requests: Sequence[InterviewRequest],
+        not_before: Optional[datetime] = None,
+    ) -> List[Optional[Booking]]:
+        """Allocate and persist slots for ``requests`` atomically.
+
+        Candidates that already hold a booking get it back unchanged.
+        """
+        not_before = not_before or datetime.now(pytz.utc) + timedelta(hours=12)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT candidate_key, interviewer, start_utc, end_utc, timezone, "
+                    "meeting_id, join_url FROM bookings WHERE end_utc > ?",
+                    (not_before.timestamp() - 86400,),
+                ).fetchall()
+                existing = {}
+                for row in rows:
+                    booking = self._booking(row)
+                    existing[booking.candidate_key] = booking
+                    if booking.interviewer in allocator.calendars:
+                        allocator.reserve(
+                            booking.interviewer, booking.start, booking.end
+                        )
+                bookings: List[Optional[Booking]] = []
+                new_rows = []
+                for request in requests:
+                    booking = existing.get(request.key) or self._stored(request.key)
+                    if booking is None:
+                        slot = allocator.allocate_one(request, not_before)
+                        if slot is not None:
+                            interviewer, start, end = slot
+                            booking = Booking(
+                                request.key,
+                                interviewer,
+                                start,
+                                end,
+                                request.timezone or allocator.hours.timezone,
+                            )
+                            existing[request.key] = booking
+                            new_rows.append(
+                                (
+                                    request.key,
+                                    interviewer,
+                                    start.timestamp(),
+                                    end.timestamp(),
+                                    booking.timezone,
+                                    time_module.time(),
+                                )
+                            )
+                    bookings.append(booking)
+                self._conn.executemany(
+                    "INSERT INTO bookings (candidate_key, interviewer, start_utc, "
+                    "end_utc, timezone, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    new_rows,
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return bookings
+
+    def _stored(self, candidate_key: str) -> Optional[Booking]:
+        row = self._conn.execute(
+            "SELECT candidate_key, interviewer, start_utc, end_utc, timezone, "
+            "meeting_id, join_url FROM bookings WHERE candidate_key = ?",
+            (candidate_key,),
+        ).fetchone()
+        return self._booking(row) if row else None
+
+    def attach_meeting(self, booking: Booking, meeting_id: str, join_url: str) -> None:
+        booking.meeting_id, booking.join_url = meeting_id, join_url
+        with self._lock:
+            self._conn.execute(
+                "UPDATE bookings SET meeting_id = ?, join_url = ? "
+                "WHERE candidate_key = ?",
+                (meeting_id, join_url, booking.candidate_key),
+            )
+
+    def release(self, candidate_key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM bookings WHERE candidate_key = ?", (candidate_key,)
+            )
+
+
+_slot_book: Optional[SlotBook] = None
+_slot_book_lock = threading.Lock()
+
+
+def get_slot_book() -> SlotBook:
+    """Return the process-wide slot book, opening it on first use."""
+    global _slot_book
+    with _slot_book_lock:
+        if _slot_book is None:
+            _slot_book = SlotBook()
+        return _slot_book
+
+
+def schedule_interviews(
+    requests: Sequence[InterviewRequest],
+    zoom: ZoomClient,
+    allocator: Optional[SlotAllocator] = None,
+    book: Optional[SlotBook] = None,
+    describe: Optional[Callable[[str], str]] = None,
+    concurrency: int = 8,
+) -> List[Optional[Booking]]:
+    """Allocate slots for all ``requests`` and create their Zoom meetings.
+
+    ``describe`` optionally returns a meeting agenda for a role (e.g. written
+    by the LLM); it is called once per role. Returns a booking per request, or
+    None where no slot was free or the meeting could not be created (that
+    slot is released again).
+    """
+    allocator = allocator or SlotAllocator(load_interviewers())
+    book = book or get_slot_book()
+    bookings = book.allocate(allocator, requests)
+
+    agendas: Dict[str, str] = {}
+    pending = []
+    for request, booking in zip(requests, bookings):
+        if booking is None:
+            logger.error(f"No interview slot free for {request.candidate_email}")
+        elif booking.join_url is None:
+            if describe is not None and request.role not in agendas:
+                agendas[request.role] = describe(request.role)
+            pending.append((request, booking))
+
+    meetings = zoom.create_meetings(
+        [
+            MeetingRequest(
+                topic=f"{request.role} Technical Interview",
+                start_time=booking.local_start(),
+                duration=int((booking.end - booking.start).total_seconds() // 60),
+                timezone=booking.timezone,
+                agenda=agendas.get(request.role, ""),
+            )
+            for request, booking in pending
+        ],
+        concurrency=concurrency,
+    )
+    failed = set()
+    for (request, booking), meeting in zip(pending, meetings):
+        if isinstance(meeting, Exception):
+            book.release(booking.candidate_key)
+            failed.add(booking.candidate_key)
+        else:
+            book.attach_meeting(booking, str(meeting["id"]), meeting["join_url"])
+    return [
+        None if booking is None or booking.candidate_key in failed else booking
+        for booking in bookings
+    ]
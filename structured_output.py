@@ -0,0 +1,389 @@
+"""Structured analysis output and tolerant parsing of the verdict.
+
+The analyzer asks each provider for output that matches ``ANALYSIS_SCHEMA``:
+OpenAI through a strict JSON schema, Mistral through JSON mode and Claude
+through a forced tool call, which ``StructuredClaude`` turns back into JSON
+text. Whatever comes back is read by ``parse_analysis``, which accepts code
+fences, surrounding prose, trailing commas and Python literals. Truncated
+output (cut off at ``max_tokens``, say) is a failure rather than a verdict
+with its feedback cut short. On failure, callers send ``repair_prompt`` (the
+broken output only, not the resume) instead of rerunning the analysis. ``parse_metrics`` counts how each
+response was parsed.
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from anthropic.types import (
+    MessageStopEvent,
+    RawContentBlockDeltaEvent,
+    TextBlock,
+    ToolUseBlock,
+)
+from phi.model.anthropic.claude import Metrics
+from phi.model.message import Message
+from phi.model.response import ModelResponse
+
+from prompt_cache import CachingClaude
+
+EXPERIENCE_LEVELS = ["junior", "mid", "senior"]
+# Models write fields in schema order, so the decision streams in first and
+# the long feedback last.
+ANALYSIS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "selected": {"type": "boolean"},
+        "matching_skills": {"type": "array", "items": {"type": "string"}},
+        "missing_skills": {"type": "array", "items": {"type": "string"}},
+        "experience_level": {"type": "string", "enum": EXPERIENCE_LEVELS},
+        "confidence": {"type": "number"},
+        "feedback": {"type": "string"},
+    },
+    "required": [
+        "selected",
+        "matching_skills",
+        "missing_skills",
+        "experience_level",
+        "confidence",
+        "feedback",
+    ],
+    "additionalProperties": False,
+}
+ANALYSIS_TOOL_NAME = "record_resume_analysis"
+
+
+def _verdict_list_schema(key: str) -> Dict[str, Any]:
+    """A ``{"verdicts": [...]}`` object of verdicts tagged with ``key``."""
+    verdict = {
+        **ANALYSIS_SCHEMA,
+        "properties": {key: {"type": "string"}, **ANALYSIS_SCHEMA["properties"]},
+        "required": [key, *ANALYSIS_SCHEMA["required"]],
+    }
+    return {
+        "type": "object",
+        "properties": {"verdicts": {"type": "array", "items": verdict}},
+        "required": ["verdicts"],
+        "additionalProperties": False,
+    }
+
+
+# Output schemas by name: one verdict, one verdict per role, one per resume.
+OUTPUT_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "resume_analysis": ANALYSIS_SCHEMA,
+    "multi_role_analysis": _verdict_list_schema("role"),
+    "multi_resume_analysis": _verdict_list_schema("candidate"),
+}
+# Repair calls sent per response before the candidate is reported as failed.
+MAX_REPAIR_ATTEMPTS = 2
+
+
+class AnalysisParseError(ValueError):
+    pass
+
+
+class ParseMetrics:
+    """How analysis responses were parsed: ``strict`` (valid JSON as sent),
+    ``tolerant`` (needed cleanup), ``repaired`` (needed a repair call) or
+    ``failed``.
+    """
+
+    OUTCOMES = ("strict", "tolerant", "repaired", "failed")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.OUTCOMES, 0)
+        self.repair_calls = 0
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def record_repair_call(self) -> None:
+        with self._lock:
+            self.repair_calls += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self._counts.values())
+            return {
+                **self._counts,
+                "responses": total,
+                "repair_calls": self.repair_calls,
+                "failure_rate": self._counts["failed"] / total if total else 0.0,
+            }
+
+
+parse_metrics = ParseMetrics()
+
+
+def structured_model_params(
+    model_provider: str, output: str = "resume_analysis"
+) -> dict:
+    """Keyword arguments that put a model of ``model_provider`` in structured
+    mode for the ``output`` schema in ``OUTPUT_SCHEMAS``.
+    """
+    schema = OUTPUT_SCHEMAS[output]
+    tool_name = f"record_{output}"
+    if model_provider == "OpenAI":
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": output, "schema": schema, "strict": True},
+            }
+        }
+    if model_provider == "Mistral":
+        return {"response_format": {"type": "json_object"}}
+    if model_provider == "Claude":
+        return {
+            "structured_tool": tool_name,
+            "request_params": {
+                "tools": [
+                    {
+                        "name": tool_name,
+                        "description": "Record the evaluation of the resume.",
+                        "input_schema": schema,
+                    }
+                ],
+                "tool_choice": {"type": "tool", "name": tool_name},
+            },
+        }
+    return {}
+
+
+class StructuredClaude(CachingClaude):
+    """Claude that reports a forced ``structured_tool`` call as JSON text, so
+    the agent treats it as the final answer instead of running a tool.
+    """
+
+    structured_tool: Optional[str] = None
+
+    def create_assistant_message(self, response, metrics):
+        if self.structured_tool is not None:
+            for block in response.content or []:
+                if (
+                    isinstance(block, ToolUseBlock)
+                    and block.name == self.structured_tool
+                ):
+                    response = response.model_copy(
+                        update={
+                            "content": [
+                                TextBlock(type="text", text=json.dumps(block.input))
+                            ],
+                            "stop_reason": "end_turn",
+                        }
+                    )
+                    break
+        return super().create_assistant_message(response, metrics)
+
+    def response_stream(self, messages: List[Message]) -> Iterator[ModelResponse]:
+        # phidata streams only text deltas; stream the forced tool call's
+        # input JSON as the answer instead of running it as a tool.
+        if self.structured_tool is None:
+            yield from super().response_stream(messages)
+            return
+        metrics = Metrics()
+        metrics.response_timer.start()
+        content = ""
+        usage = None
+        with self.invoke_stream(messages=messages) as stream:
+            for event in stream:
+                if isinstance(event, RawContentBlockDeltaEvent):
+                    text = getattr(event.delta, "partial_json", None) or getattr(
+                        event.delta, "text", None
+                    )
+                    if text:
+                        if not content:
+                            metrics.time_to_first_token = metrics.response_timer.elapsed
+                        content += text
+                        yield ModelResponse(content=text)
+                elif isinstance(event, MessageStopEvent):
+                    usage = event.message.usage
+        metrics.response_timer.stop()
+        assistant_message = Message(role="assistant", content=content)
+        self.update_usage_metrics(assistant_message, usage, metrics)
+        messages.append(assistant_message)
+
+
+def _close_truncated(text: str) -> str:
+    """Close the strings, arrays and objects left open by truncated output."""
+    stack = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = re.sub(r'[,:]\s*$|,\s*"[^"]*"\s*:?\s*$', "", text.rstrip())
+    return text + "".join(reversed(stack))
+
+
+# A JSON string, or the unterminated one at the end of truncated output.
+_STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"?')
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _cleanup_tokens(text: str) -> str:
+    text = re.sub(r"\b(True|False|None)\b", lambda m: _PYTHON_LITERALS[m.group()], text)
+    return re.sub(r",\s*([}\]])", r"\1", text)
+
+
+def _cleanup(text: str) -> str:
+    """Fix Python literals and trailing commas, leaving string values alone."""
+    text = text.replace("“", '"').replace("”", '"')
+    parts, end = [], 0
+    for match in _STRING_RE.finditer(text):
+        parts += [_cleanup_tokens(text[end : match.start()]), match.group()]
+        end = match.end()
+    parts.append(_cleanup_tokens(text[end:]))
+    return "".join(parts)
+
+
+def load_json_object(text: str) -> Tuple[dict, bool]:
+    """The first JSON object in ``text``, and whether it needed cleanup."""
+    try:
+        result = json.loads(text)
+        if isinstance(result, dict):
+            return result, False
+    except json.JSONDecodeError:
+        pass
+    start = text.find("{")
+    if start < 0:
+        raise AnalysisParseError("No JSON object found in response")
+    decoder = json.JSONDecoder()
+    candidate = text[start:]
+    for attempt in (candidate, _cleanup(candidate)):
+        try:
+            result, _ = decoder.raw_decode(attempt)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(result, dict):
+            return result, True
+    try:
+        decoder.raw_decode(_close_truncated(_cleanup(candidate)))
+    except json.JSONDecodeError:
+        raise AnalysisParseError("Response is not valid JSON") from None
+    raise AnalysisParseError("Response is truncated")
+
+
+class PartialVerdictParser:
+    """Reads a verdict as it streams in.
+
+    ``feed`` returns the fields parsed so far whenever they change, with the
+    string being written (usually the feedback) cut off where the stream is.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields: dict = {}
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, chunk: str) -> Optional[dict]:
+        self.text += chunk
+        start = self.text.find("{")
+        if start < 0:
+            return None
+        try:
+            fields, _ = self._decoder.raw_decode(
+                _close_truncated(_cleanup(self.text[start:]))
+            )
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(fields, dict) or fields == self.fields:
+            return None
+        self.fields = fields
+        return dict(fields)
+
+
+def normalize_analysis(result: dict) -> dict:
+    """Check the verdict's required fields and coerce the rest to the schema."""
+    if not all(key in result for key in ("selected", "feedback")):
+        raise AnalysisParseError("Invalid response format")
+    selected = result["selected"]
+    if isinstance(selected, str) and selected.strip().lower() in ("true", "yes"):
+        selected = True
+    elif isinstance(selected, str) and selected.strip().lower() in ("false", "no"):
+        selected = False
+    if not isinstance(selected, bool):
+        raise AnalysisParseError(f"Invalid 'selected' value: {selected!r}")
+    result = {**result, "selected": selected, "feedback": str(result["feedback"])}
+    for key in ("matching_skills", "missing_skills"):
+        skills = result.get(key) or []
+        result[key] = [skills] if isinstance(skills, str) else list(skills)
+    level = str(result.get("experience_level") or "").strip().lower()
+    if level:
+        result["experience_level"] = level
+    if result.get("confidence") is not None:
+        try:
+            result["confidence"] = min(1.0, max(0.0, float(result["confidence"])))
+        except (TypeError, ValueError):
+            result["confidence"] = None
+    return result
+
+
+def parse_verdict(text: str) -> Tuple[dict, bool]:
+    """The verdict in model output, and whether it needed cleanup to parse."""
+    result, cleaned = load_json_object(text.strip())
+    return normalize_analysis(result), cleaned
+
+
+def parse_analysis(text: str) -> dict:
+    """Parse a verdict from model output and record how it went."""
+    try:
+        result, cleaned = parse_verdict(text)
+    except AnalysisParseError:
+        parse_metrics.record("failed")
+        raise
+    parse_metrics.record("tolerant" if cleaned else "strict")
+    return result
+
+
+VERDICT_SHAPE = (
+    'exactly these keys: "selected" (true/false), "matching_skills" (list of '
+    'strings), "missing_skills" (list of strings), "experience_level" ("junior", '
+    '"mid" or "senior"), "confidence" (0.0-1.0), "feedback" (string)'
+)
+
+
+def parse_verdict_list(text: str, key: str) -> Tuple[Dict[str, dict], bool]:
+    """Verdicts from a ``{"verdicts": [...]}`` reply, by their ``key`` field,
+    and whether the reply needed cleanup to parse.
+
+    Entries that are not valid verdicts are skipped; callers treat the keys
+    they expected but did not get as failures.
+    """
+    result, cleaned = load_json_object(text.strip())
+    entries = result.get("verdicts")
+    if not isinstance(entries, list):
+        raise AnalysisParseError("Response has no 'verdicts' list")
+    verdicts = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or key not in entry:
+            continue
+        try:
+            verdicts[str(entry[key])] = normalize_analysis(
+                {k: v for k, v in entry.items() if k != key}
+            )
+        except AnalysisParseError:
+            continue
+    return verdicts, cleaned
+
+
+def repair_prompt(text: str, error: Exception, shape: str = "") -> str:
+    shape = shape or f"a single JSON object with {VERDICT_SHAPE}"
+    return f"""The following resume evaluation could not be parsed ({error}).
+Rewrite it as {shape}. Keep the original decisions and wording. Return ONLY the JSON object.
+
+{text}"""
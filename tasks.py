@@ -1,13 +1,44 @@
-from typing import Literal, Tuple
+from typing import Callable, Iterator, Literal, Optional, Tuple, Union
 import json
-import PyPDF2
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
 import pytz
 
 import streamlit as st
-from phi.agent import Agent
+from phi.agent import Agent, RunResponse
+from phi.model.message import Message
 from phi.utils.log import logger
 
+from agents import create_email_agent, get_the_model
+from analysis_cache import AnalysisCache, get_analysis_cache, make_cache_key
+from email_templates import (
+    TemplateError,
+    get_email_template_store,
+    send_templated_email,
+)
+from near_duplicates import get_duplicate_index
+from pdf_extraction import extract_text, extract_text_cached
+from prompt_cache import cacheable_message
+from resume_compaction import compact_resume, compact_text
+from results_store import get_results_store
+import telemetry
+from role_store import get_role_store
+from structured_output import (
+    MAX_REPAIR_ATTEMPTS,
+    AnalysisParseError,
+    PartialVerdictParser,
+    parse_analysis,
+    parse_metrics,
+    parse_verdict,
+    repair_prompt,
+)
+from upload_store import StoredUpload
+from slot_allocator import Booking, InterviewRequest, schedule_interviews
+from zoom_client import ZoomClient
+
+# Bump whenever the analysis prompt changes so cached verdicts are not reused.
+PROMPT_VERSION = "5"
+
 
 def init_session_state() -> None:
     """Initialize only necessary session state variables."""
@@ -25,40 +56,51 @@ def init_session_state() -> None:
         "email_passkey": "",
         "company_name": "",
         "current_pdf": None,
+        "email_mode": "template",
+        "llm_meeting_descriptions": False,
+        "analysis_cascade": True,
+        # Bumped by "New Application" to give the uploader a fresh, empty key.
+        "upload_generation": 0,
     }
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
 
 
+def read_pdf_text(pdf_file) -> str:
+    """Extract the text of every page, raising on unreadable PDFs."""
+    return extract_text(pdf_file)
+
+
 def extract_text_from_pdf(pdf_file) -> str:
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
+        with telemetry.span("extraction"):
+            if isinstance(pdf_file, StoredUpload):
+                return extract_text_cached(pdf_file.data, digest=pdf_file.digest)
+            if hasattr(pdf_file, "getvalue"):
+                return extract_text_cached(pdf_file.getvalue())
+            return read_pdf_text(pdf_file)
     except Exception as e:
+        logger.error(f"Error extracting PDF text: {e}")
         st.error(f"Error extracting PDF text: {str(e)}")
         return ""
 
 
+def load_job_descriptions() -> dict:
+    """Return every role as ``{role: {"job_description", "additional_instructions"}}``."""
+    return get_role_store().all()
+
+
 def add_job_details(job_role, job_description, additional_instructions):
     job_role = job_role.strip()
     job_description = job_description.strip()
     additional_instructions = additional_instructions.strip()
-    file_path = "data/job_descriptions.json"
     if job_role and job_description:
         try:
-            with open(file_path, "r") as file:
-                job_descriptions_data = json.load(file)
-            temp = {
-                "job_description": job_description,
-                "additional_instructions": additional_instructions,
-            }
-            job_descriptions_data[job_role] = temp
-            with open("data/job_descriptions.json", "w") as f:
-                json.dump(job_descriptions_data, f, indent=4)
+            get_role_store().upsert(job_role, job_description, additional_instructions)
+            get_analysis_cache().invalidate_role(job_role)
+            get_email_template_store().invalidate_role(job_role)
+            get_duplicate_index().invalidate_role(job_role)
             return True
         except Exception as e:
             logger.error(f"Error occurred while storing job_descriptions< {e}")
@@ -67,58 +109,301 @@ def add_job_details(job_role, job_description, additional_instructions):
         return False
 
 
+def _model_provider(analyzer: Agent) -> Optional[str]:
+    return getattr(getattr(analyzer, "model", None), "provider", None)
+
+
+EVALUATION_GUIDELINES = """Evaluation Guidelines:
+- Skill Match: Ensure at least 75% alignment with the role's required skills. Highlight specific examples when skills are demonstrated.
+- Practical Experience: Emphasize hands-on experience, real-world applications, and significant projects related to the role.
+- Transferable Skills: Consider similar technologies or adjacent skills that add value.
+- Continuous Learning: Identify evidence of growth, such as certifications, courses, or self-initiated projects.
+- Soft Skills & Adaptability: Note any mention of leadership, teamwork, problem-solving, or adaptability that enhances suitability for the role.
+- Confidence: Rate how certain the decision is from 0.0 to 1.0; use low values for borderline candidates or resumes that leave key requirements unclear.
+
+Important:
+- Prioritize clarity and accuracy in your analysis.
+- Provide constructive feedback to guide the decision-making process.
+- Return ONLY the JSON object without additional formatting or text.
+"""
+
+
+def build_analysis_prefix(role_requirements, role) -> str:
+    """The part of the analysis prompt shared by every candidate of ``role``.
+
+    It must not depend on the resume, so providers can cache it.
+    """
+    job_description = compact_text(role_requirements["job_description"])
+    additional_instructions = compact_text(
+        role_requirements.get("additional_instructions") or ""
+    )
+    return f"""Analyze the resume at the end of this message against the specified role requirements and provide a detailed evaluation as a JSON object.
+Job Role: {role}
+Role Requirements: {job_description}
+Additional Instructions from Recruiter Side (Must follow if provided):
+{additional_instructions}
+Your JSON response must adhere to this structure:
+{{"selected": true/false, "matching_skills": ["skill1", "skill2"], "missing_skills": ["skill3", "skill4"], "experience_level": "junior/mid/senior", "confidence": 0.0-1.0, "feedback": "Detailed feedback explaining the decision"}}
+
+{EVALUATION_GUIDELINES}"""
+
+
+def build_analysis_suffix(
+    resume_text: str, model_provider: Optional[str] = None
+) -> str:
+    """The per-candidate part of the analysis prompt: the compacted resume."""
+    compaction = compact_resume(resume_text, model_provider)
+    logger.debug(
+        f"Resume compacted from {compaction.tokens_before} to "
+        f"{compaction.tokens_after} tokens"
+        + (" (truncated)" if compaction.truncated else "")
+    )
+    return f"\nResume Text:\n{compaction.text}"
+
+
+def build_analysis_prompt(
+    resume_text: str, role_requirements, role, model_provider: Optional[str] = None
+) -> str:
+    """The analysis prompt, with the resume compacted to the provider's budget."""
+    return build_analysis_prefix(role_requirements, role) + build_analysis_suffix(
+        resume_text, model_provider
+    )
+
+
+def build_analysis_message(
+    resume_text: str, role_requirements, role, model_provider: Optional[str] = None
+) -> Union[str, Message]:
+    """The analysis prompt as the user turn for ``Agent.run``, with the role
+    prefix marked for provider-side caching.
+    """
+    return cacheable_message(
+        build_analysis_prefix(role_requirements, role),
+        build_analysis_suffix(resume_text, model_provider),
+        model_provider,
+    )
+
+
+def analysis_response_text(response) -> str:
+    """The assistant's text in an agent response."""
+    assistant_message = next(
+        (msg.content for msg in response.messages if msg.role == "assistant"), None
+    )
+    if not assistant_message:
+        raise ValueError("No assistant message found in response.")
+    return assistant_message
+
+
+def parse_analysis_response(response) -> dict:
+    """Pull the JSON verdict out of an agent response and validate its shape."""
+    return parse_analysis_content(analysis_response_text(response))
+
+
+def parse_analysis_content(assistant_message: str) -> dict:
+    """Parse and validate the JSON verdict in an assistant message's text."""
+    return parse_analysis(assistant_message)
+
+
+def parse_or_repair(response, analyzer: Agent) -> dict:
+    """Parse the verdict in ``response``, asking ``analyzer`` to fix malformed
+    output (without the resume) instead of rerunning the whole analysis.
+    """
+    return repair_until_parsed(analysis_response_text(response), analyzer)
+
+
+def repair_until_parsed(text: str, analyzer: Agent) -> dict:
+    """Parse the verdict in ``text``, sending repair prompts on failure."""
+    for attempt in range(MAX_REPAIR_ATTEMPTS + 1):
+        try:
+            result, cleaned = parse_verdict(text)
+        except AnalysisParseError as e:
+            if attempt == MAX_REPAIR_ATTEMPTS:
+                parse_metrics.record("failed")
+                raise
+            logger.warning(f"Could not parse analysis ({e}); requesting a repair")
+            parse_metrics.record_repair_call()
+            text = analysis_response_text(analyzer.run(repair_prompt(text, e)))
+            continue
+        parse_metrics.record(
+            "repaired" if attempt else "tolerant" if cleaned else "strict"
+        )
+        return result
+
+
+def analysis_cache_key(
+    resume_text: str,
+    role_requirements,
+    role,
+    analyzer: Agent,
+    prompt_kind: str = "single",
+) -> str:
+    """Cache key of a verdict; ``prompt_kind`` separates verdicts from the
+    multi-role ("multi_role") and packed ("packed") prompts.
+    """
+    model = getattr(analyzer, "model", None)
+    return make_cache_key(
+        resume_text,
+        role,
+        role_requirements,
+        getattr(model, "provider", None) or "",
+        getattr(model, "id", None) or "",
+        PROMPT_VERSION,
+        prompt_kind,
+    )
+
+
+def run_analysis(
+    resume_text: str,
+    role_requirements,
+    role,
+    analyzer: Agent,
+    cache: Optional[AnalysisCache] = None,
+) -> dict:
+    """Run the analysis prompt and return the full parsed verdict.
+
+    Unlike :func:`analyze_resume` this raises instead of reporting through
+    Streamlit, so it can be used from headless callers. When a ``cache`` is
+    given, a previous verdict for the same resume, role and model is reused.
+    """
+    model = getattr(analyzer, "model", None)
+    with telemetry.span(
+        "run_analysis",
+        role=role,
+        provider=getattr(model, "provider", None),
+        model=getattr(model, "id", None),
+    ) as stage:
+        if cache is not None:
+            key = analysis_cache_key(resume_text, role_requirements, role, analyzer)
+            cached = cache.get(key)
+            stage.set(cache_hit=cached is not None)
+            if cached is not None:
+                return cached
+        response = analyzer.run(
+            build_analysis_message(
+                resume_text, role_requirements, role, _model_provider(analyzer)
+            )
+        )
+        result = parse_or_repair(response, analyzer)
+        stage.set(selected=result["selected"])
+        if cache is not None:
+            cache.put(key, role, result)
+        return result
+
+
+def stream_analysis(
+    resume_text: str,
+    role_requirements,
+    role,
+    analyzer: Agent,
+    cache: Optional[AnalysisCache] = None,
+) -> Iterator[Tuple[dict, bool]]:
+    """Like :func:`run_analysis`, but yield ``(fields, done)`` as the verdict
+    streams in: the decision and skills first, then the feedback growing.
+
+    The last item has ``done`` set and carries the validated verdict.
+    """
+    if cache is not None:
+        key = analysis_cache_key(resume_text, role_requirements, role, analyzer)
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached, True
+            return
+    chunks = analyzer.run(
+        build_analysis_message(
+            resume_text, role_requirements, role, _model_provider(analyzer)
+        ),
+        stream=True,
+    )
+    if isinstance(chunks, RunResponse):
+        chunks = [chunks]
+    parser = PartialVerdictParser()
+    for chunk in chunks:
+        fields = parser.feed(chunk.content or "")
+        if fields is not None:
+            yield fields, False
+    result = repair_until_parsed(parser.text, analyzer)
+    if cache is not None:
+        cache.put(key, role, result)
+    yield result, True
+
+
 def analyze_resume(
     resume_text: str,
     role_requirements,
     role,
     analyzer: Agent,
+    cascade: bool = False,
+    on_update: Optional[Callable[[dict], None]] = None,
+    candidate: Optional[str] = None,
 ) -> Tuple[bool, str]:
+    """With ``cascade`` the session's provider is tried with its small model
+    first, and ``analyzer`` is not used. ``on_update`` makes the analysis
+    stream, and is called with the verdict's fields as they arrive. With
+    ``candidate`` set, a near-duplicate's verdict for the role is reused, and
+    the verdict is recorded in the results store.
+    """
     try:
-        response = analyzer.run(
-            f"""Analyze the provided resume against the specified role requirements and provide a detailed evaluation as a JSON object.
-            Resume Text: {resume_text}
-            Job Role: {role}
-            Role Requirements: {role_requirements['job_description']}
-            Additional Instructions from Recruiter Side (Must follow if provided):
-            {role_requirements['additional_instructions']}
-            Your JSON response must adhere to this structure:
-            {{
-                "selected": true/false,
-                "feedback": "Detailed feedback explaining the decision",
-                "matching_skills": ["skill1", "skill2"],
-                "missing_skills": ["skill3", "skill4"],
-                "experience_level": "junior/mid/senior"
-            }}
-    
-            Evaluation Guidelines:
-            - Skill Match: Ensure at least 75% alignment with the role's required skills. Highlight specific examples when skills are demonstrated.
-            - Practical Experience: Emphasize hands-on experience, real-world applications, and significant projects related to the role.
-            - Transferable Skills: Consider similar technologies or adjacent skills that add value.
-            - Continuous Learning: Identify evidence of growth, such as certifications, courses, or self-initiated projects.
-            - Soft Skills & Adaptability: Note any mention of leadership, teamwork, problem-solving, or adaptability that enhances suitability for the role.
-            
-            Important:
-            - Prioritize clarity and accuracy in your analysis.
-            - Provide constructive feedback to guide the decision-making process.
-            - Return ONLY the JSON object without additional formatting or text.
-            """
-        )
+        check = None
+        if candidate:
+            with telemetry.span("duplicate_check", role=role) as stage:
+                check = get_duplicate_index().add(candidate, resume_text, role)
+                stage.set(
+                    duplicate=check.match is not None,
+                    reused=check.verdict is not None,
+                )
+            if check.verdict is not None:
+                if on_update is not None:
+                    on_update(check.verdict)
+                get_results_store().add(candidate, role, check.verdict)
+                return check.verdict["selected"], check.verdict["feedback"]
+        if on_update is not None:
+            if cascade:
+                # model_cascade imports this module.
+                from model_cascade import stream_with_cascade
 
-        assistant_message = next(
-            (msg.content for msg in response.messages if msg.role == "assistant"), None
-        )
-        if not assistant_message:
-            raise ValueError("No assistant message found in response.")
-        response = assistant_message.strip("```").strip("json")
-        result = json.loads(response)
-        if not isinstance(result, dict) or not all(
-            k in result for k in ["selected", "feedback"]
-        ):
-            raise ValueError("Invalid response format")
+                updates = stream_with_cascade(
+                    resume_text,
+                    role_requirements,
+                    role,
+                    st.session_state.model_provider,
+                    st.session_state.api_key,
+                    cache=get_analysis_cache(),
+                )
+            else:
+                updates = stream_analysis(
+                    resume_text,
+                    role_requirements,
+                    role,
+                    analyzer,
+                    cache=get_analysis_cache(),
+                )
+            for result, _ in updates:
+                on_update(result)
+        elif cascade:
+            from model_cascade import analyze_with_cascade
 
+            result = analyze_with_cascade(
+                resume_text,
+                role_requirements,
+                role,
+                st.session_state.model_provider,
+                st.session_state.api_key,
+                cache=get_analysis_cache(),
+            )
+        else:
+            result = run_analysis(
+                resume_text,
+                role_requirements,
+                role,
+                analyzer,
+                cache=get_analysis_cache(),
+            )
+        if check is not None:
+            get_duplicate_index().record_verdict(check.resume_id, role, result)
+            get_results_store().add(candidate, role, result)
         return result["selected"], result["feedback"]
 
     except (json.JSONDecodeError, ValueError) as e:
+        logger.error(f"Error analyzing resume for {role}: {e}")
         st.error(f"Error processing response: {str(e)}")
         return False, f"Error analyzing resume: {str(e)}"
 
@@ -171,51 +456,138 @@ def schedule_interview(
     Schedule interviews during business hours (9 AM - 5 PM IST).
     """
     try:
-        # Get current time in IST
-        ist_tz = pytz.timezone("Asia/Kolkata")
-        current_time_ist = datetime.now(ist_tz)
+        book_interview(scheduler, candidate_email, email_agent, role)
+        st.success("Interview scheduled successfully! Check your email for details.")
+
+    except Exception as e:
+        logger.error(f"Error scheduling interview: {str(e)}")
+        st.error("Unable to schedule interview. Please try again.")
+
+
+def book_interview(
+    scheduler: Agent, candidate_email: str, email_agent: Agent, role: str
+) -> None:
+    """Create the Zoom meeting and send the confirmation, raising on failure."""
+    meeting_response = create_interview_meeting(scheduler, candidate_email, role)
+    send_interview_confirmation(email_agent, role, meeting_response)
+
+
+def create_interview_meeting(scheduler: Agent, candidate_email: str, role: str) -> str:
+    """Book tomorrow's 11:00 IST slot through the scheduler agent."""
+    # Get current time in IST
+    ist_tz = pytz.timezone("Asia/Kolkata")
+    current_time_ist = datetime.now(ist_tz)
 
-        tomorrow_ist = current_time_ist + timedelta(days=1)
-        interview_time = tomorrow_ist.replace(
-            hour=11, minute=0, second=0, microsecond=0
+    tomorrow_ist = current_time_ist + timedelta(days=1)
+    interview_time = tomorrow_ist.replace(hour=11, minute=0, second=0, microsecond=0)
+    formatted_time = interview_time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    meeting_response = scheduler.run(
+        f"""Schedule a 60-minute technical interview with these specifications:
+        - Title: '{role} Technical Interview'
+        - Date: {formatted_time}
+        - Timezone: IST (India Standard Time)
+        - Attendee: {candidate_email}
+        
+        Important Notes:
+        - The meeting must be between 9 AM - 5 PM IST
+        - Use IST (UTC+5:30) timezone for all communications
+        - Include timezone information in the meeting details
+        """
+    )
+    return meeting_response.content
+
+
+def send_interview_confirmation(
+    email_agent: Agent, role: str, meeting_response
+) -> None:
+    email_agent.run(
+        f"""Send an email confirming the scheduled interview for the {role} position.
+
+        The email should:
+        1. Start with a polite and enthusiastic confirmation of the interview details.
+        2. Include the following information clearly:
+        Role: {role} position
+        Meeting Details: {meeting_response}
+        3. Clearly state that the time is in IST (India Standard Time) and provide a link for timezone conversion to help the candidate plan accordingly.
+        4. Politely request the candidate to join 5 minutes early to ensure a smooth start.
+        5. Encourage the candidate to be confident and well-prepared for the interview. Offer tips or resources if appropriate (e.g., topics to review or format expectations).
+        6. Conclude with a friendly note, wishing them the best for the interview.
+        
+        Tone and Style:
+        - Use professional yet warm language to create a positive impression.
+        - Format the email for readability with bullet points or short paragraphs.
+        """
+    )
+
+
+@lru_cache(maxsize=256)
+def describe_interview(role: str, model_provider: str, api_key: str) -> str:
+    """A short meeting agenda for the role's interviews, written once by the LLM."""
+    writer = Agent(model=get_the_model(model_provider, api_key), markdown=False)
+    response = writer.run(
+        f"""Write a short agenda (at most 5 bullet points, plain text) for a
+        60-minute technical interview for the {role} position. Do not include
+        dates, times or names."""
+    )
+    return response.content.strip()
+
+
+def book_interview_slot(settings: dict, role: str) -> Booking:
+    """Book the candidate's interview in the earliest free slot and create the
+    Zoom meeting directly, without the scheduler agent.
+    """
+    describe = (
+        partial(
+            describe_interview,
+            model_provider=settings["model_provider"],
+            api_key=settings["api_key"],
         )
-        formatted_time = interview_time.strftime("%Y-%m-%dT%H:%M:%S")
-
-        meeting_response = scheduler.run(
-            f"""Schedule a 60-minute technical interview with these specifications:
-            - Title: '{role} Technical Interview'
-            - Date: {formatted_time}
-            - Timezone: IST (India Standard Time)
-            - Attendee: {candidate_email}
-            
-            Important Notes:
-            - The meeting must be between 9 AM - 5 PM IST
-            - Use IST (UTC+5:30) timezone for all communications
-            - Include timezone information in the meeting details
-            """
+        if settings.get("llm_meeting_descriptions")
+        else None
+    )
+    zoom = ZoomClient(
+        settings["zoom_account_id"],
+        settings["zoom_client_id"],
+        settings["zoom_client_secret"],
+    )
+    with telemetry.span("scheduling", role=role):
+        (booking,) = schedule_interviews(
+            [InterviewRequest(settings["candidate_email"], role)],
+            zoom,
+            describe=describe,
         )
-
-        email_agent.run(
-            f"""Send an email confirming the scheduled interview for the {role} position.
-
-            The email should:
-            1. Start with a polite and enthusiastic confirmation of the interview details.
-            2. Include the following information clearly:
-            Role: {role} position
-            Meeting Details: {meeting_response}
-            3. Clearly state that the time is in IST (India Standard Time) and provide a link for timezone conversion to help the candidate plan accordingly.
-            4. Politely request the candidate to join 5 minutes early to ensure a smooth start.
-            5. Encourage the candidate to be confident and well-prepared for the interview. Offer tips or resources if appropriate (e.g., topics to review or format expectations).
-            6. Conclude with a friendly note, wishing them the best for the interview.
-            
-            Tone and Style:
-            - Use professional yet warm language to create a positive impression.
-            - Format the email for readability with bullet points or short paragraphs.
-            """
+    if booking is None:
+        raise RuntimeError(
+            f"Could not book an interview for {settings['candidate_email']}"
         )
+    return booking
 
-        st.success("Interview scheduled successfully! Check your email for details.")
 
-    except Exception as e:
-        logger.error(f"Error scheduling interview: {str(e)}")
-        st.error("Unable to schedule interview. Please try again.")
+EMAIL_SENDERS = {
+    "selection": lambda agent, settings, role, **slots: send_selection_email(
+        agent, settings["candidate_email"], role
+    ),
+    "rejection": lambda agent, settings, role, **slots: send_rejection_email(
+        agent, settings["candidate_email"], role, slots["feedback"]
+    ),
+    "confirmation": lambda agent, settings, role, **slots: send_interview_confirmation(
+        agent, role, slots["meeting_details"]
+    ),
+}
+
+
+def deliver_email(kind: str, settings: dict, role: str, **slots) -> None:
+    """Send a candidate email from the role's cached template, or have the email
+    agent write it when ``email_mode`` is "llm" or no usable template exists.
+    """
+    with telemetry.span("email", kind=kind, role=role) as stage:
+        if settings.get("email_mode", "template") == "template":
+            try:
+                send_templated_email(kind, settings, role, **slots)
+                stage.set(mode="template")
+                return
+            except TemplateError as e:
+                logger.warning(f"Falling back to LLM-written {kind} email: {e}")
+        stage.set(mode="llm")
+        EMAIL_SENDERS[kind](create_email_agent(settings), settings, role, **slots)
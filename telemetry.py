@@ -0,0 +1,409 @@
+"""Spans and metrics for the screening pipeline.
+
+Off by default. ``configure`` turns it on from the environment:
+
+- ``TELEMETRY_TRACE_FILE``: append every finished span to this JSONL file;
+- ``TELEMETRY_METRICS_PORT``: serve Prometheus text metrics on this port at
+  ``/metrics``.
+
+While disabled, ``span`` hands out one shared no-op span and the
+``record_*`` functions return after a single flag check, so instrumented
+code pays next to nothing.
+
+Exported metrics:
+
+- ``recruiter_span_seconds{span}`` and ``recruiter_span_errors_total{span}``
+  per pipeline stage;
+- ``recruiter_llm_request_seconds{provider,model}`` and
+  ``recruiter_llm_tokens_total{provider,model,kind}`` per LLM response;
+- ``recruiter_call_seconds{service,operation}`` and
+  ``recruiter_call_errors_total{service,operation}`` for Zoom and SMTP;
+- gauges from the existing metrics objects (analysis and prompt cache hit
+  ratios, parse outcomes, compaction, cascade), read at scrape time.
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from phi.utils.log import logger
+
+TRACE_FILE_ENV = "TELEMETRY_TRACE_FILE"
+METRICS_PORT_ENV = "TELEMETRY_METRICS_PORT"
+# Histogram bucket upper bounds, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class _Histogram:
+    __slots__ = ("counts", "total")
+
+    def __init__(self):
+        # One count per bucket in LATENCY_BUCKETS, plus +Inf.
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+
+
+class Registry:
+    """Counters and latency histograms, keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+
+    def increment(self, name: str, amount: float = 1, **labels) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = (name, _labels(labels))
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.counts[bucket] += 1
+            histogram.total += seconds
+
+    def snapshot(self) -> Tuple[dict, dict]:
+        with self._lock:
+            return dict(self._counters), {
+                key: (list(histogram.counts), histogram.total)
+                for key, histogram in self._histograms.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+registry = Registry()
+_enabled = False
+_trace_file = None
+_trace_lock = threading.Lock()
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_configure_lock = threading.Lock()
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def configure(
+    trace_path: Optional[str] = None,
+    metrics_port: Optional[int] = None,
+    serve_metrics: bool = True,
+) -> bool:
+    """Enable telemetry with the given exporters, or those named in the
+    environment. Safe to call repeatedly; returns whether telemetry is on.
+
+    Worker processes pass ``serve_metrics=False``, as only one process can
+    listen on the port; they still append to the trace file.
+    """
+    global _enabled, _trace_file, _metrics_server
+    trace_path = trace_path or os.environ.get(TRACE_FILE_ENV)
+    if not serve_metrics:
+        metrics_port = None
+    elif metrics_port is None and os.environ.get(METRICS_PORT_ENV):
+        metrics_port = int(os.environ[METRICS_PORT_ENV])
+    with _configure_lock:
+        if trace_path and _trace_file is None:
+            directory = os.path.dirname(trace_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _trace_file = open(trace_path, "a", buffering=1)
+        if metrics_port is not None and _metrics_server is None:
+            _metrics_server = start_metrics_server(metrics_port)
+        _enabled = _enabled or bool(trace_path) or metrics_port is not None
+    return _enabled
+
+
+def disable() -> None:
+    global _enabled, _trace_file, _metrics_server
+    with _configure_lock:
+        _enabled = False
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
+        if _metrics_server is not None:
+            _metrics_server.shutdown()
+            _metrics_server.server_close()
+            _metrics_server = None
+
+
+class Span:
+    """One timed operation, nested under the span active when it started."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start",
+        "_started",
+    )
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start = time.time()
+        self._started = time.perf_counter()
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        seconds = time.perf_counter() - self._started
+        registry.observe("recruiter_span_seconds", seconds, span=self.name)
+        if error is not None:
+            registry.increment("recruiter_span_errors_total", span=self.name)
+        if _trace_file is None:
+            return
+        record = {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(seconds * 1000, 3),
+            "status": "error" if error is not None else "ok",
+            "attributes": self.attributes,
+        }
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"
+        line = json.dumps(record, default=str)
+        with _trace_lock:
+            if _trace_file is not None:
+                _trace_file.write(line + "\n")
+
+
+class _NoopSpan:
+    """What ``span`` and ``timed_call`` return while telemetry is off."""
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def set(self, **attributes) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+@contextmanager
+def _span(name: str, attributes: dict) -> Iterator[Span]:
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    else:
+        current.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def span(name: str, **attributes):
+    """Time the ``with`` block as a pipeline stage.
+
+    Exceptions are recorded on the span and re-raised. Yields an object
+    whose ``set(**attributes)`` adds attributes known only later.
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return _span(name, attributes)
+
+
+def record_llm_response(
+    provider: str,
+    model: str,
+    seconds: Optional[float],
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+) -> None:
+    if not _enabled:
+        return
+    if seconds is not None:
+        registry.observe(
+            "recruiter_llm_request_seconds", seconds, provider=provider, model=model
+        )
+    registry.increment(
+        "recruiter_llm_tokens_total",
+        input_tokens,
+        provider=provider,
+        model=model,
+        kind="input",
+    )
+    registry.increment(
+        "recruiter_llm_tokens_total",
+        output_tokens,
+        provider=provider,
+        model=model,
+        kind="output",
+    )
+
+
+@contextmanager
+def _timed_call(service: str, operation: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        registry.increment(
+            "recruiter_call_errors_total", service=service, operation=operation
+        )
+        raise
+    finally:
+        registry.observe(
+            "recruiter_call_seconds",
+            time.perf_counter() - started,
+            service=service,
+            operation=operation,
+        )
+
+
+def timed_call(service: str, operation: str):
+    """Time the ``with`` block as a call to an external service such as Zoom
+    or SMTP.
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return _timed_call(service, operation)
+
+
+def _component_gauges() -> Iterable[Tuple[str, dict, float]]:
+    # Only report components the process has loaded; importing them here
+    # would open their stores.
+    modules = sys.modules
+    if "analysis_cache" in modules and modules["analysis_cache"]._cache is not None:
+        stats = modules["analysis_cache"]._cache.stats()
+        yield "recruiter_analysis_cache_hits", {}, stats["hits"]
+        yield "recruiter_analysis_cache_misses", {}, stats["misses"]
+        yield "recruiter_analysis_cache_hit_ratio", {}, stats["hit_ratio"]
+    if "near_duplicates" in modules and modules["near_duplicates"]._index is not None:
+        stats = modules["near_duplicates"]._index.stats()
+        yield "recruiter_duplicate_index_resumes", {}, stats["resumes"]
+        yield "recruiter_duplicate_resumes", {}, stats["duplicates"]
+        yield "recruiter_duplicate_verdicts_reused", {}, stats["verdicts_reused"]
+    if "results_store" in modules and modules["results_store"]._store is not None:
+        stats = modules["results_store"]._store.stats()
+        yield "recruiter_results_recorded", {}, stats["results"]
+    if "prompt_cache" in modules:
+        for provider, usage in (
+            modules["prompt_cache"].prompt_cache_metrics.stats().items()
+        ):
+            labels = {"provider": provider}
+            yield "recruiter_prompt_cache_input_tokens", labels, usage["input_tokens"]
+            yield "recruiter_prompt_cache_cached_tokens", labels, usage["cached_tokens"]
+            yield "recruiter_prompt_cache_cached_ratio", labels, usage["cached_ratio"]
+    if "structured_output" in modules:
+        stats = modules["structured_output"].parse_metrics.stats()
+        for outcome in modules["structured_output"].ParseMetrics.OUTCOMES:
+            yield "recruiter_parse_responses", {"outcome": outcome}, stats[outcome]
+        yield "recruiter_parse_repair_calls", {}, stats["repair_calls"]
+    if "resume_compaction" in modules:
+        stats = modules["resume_compaction"].compaction_metrics.stats()
+        yield "recruiter_compaction_tokens_saved", {}, stats["tokens_saved"]
+        yield "recruiter_compaction_saved_ratio", {}, stats["saved_ratio"]
+    if "model_cascade" in modules:
+        for model, tier in modules["model_cascade"].cascade_metrics.stats().items():
+            labels = {"model": model}
+            yield "recruiter_cascade_calls", labels, tier["calls"]
+            yield "recruiter_cascade_escalation_ratio", labels, tier["escalation_rate"]
+            yield "recruiter_cascade_cost_usd", labels, tier["cost_usd"]
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " "))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def render_metrics(
+    gauges: Callable[[], Iterable[Tuple[str, dict, float]]] = _component_gauges
+) -> str:
+    """All metrics in the Prometheus text exposition format."""
+    counters, histograms = registry.snapshot()
+    lines = []
+    typed = set()
+
+    def declare(name: str, kind: str) -> None:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        declare(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), (counts, total) in sorted(histograms.items()):
+        declare(name, "histogram")
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), counts):
+            cumulative += count
+            bucket_labels = (*labels, ("le", str(bound)))
+            lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    try:
+        for name, labels, value in gauges():
+            declare(name, "gauge")
+            lines.append(f"{name}{_format_labels(_labels(labels))} {value}")
+    except Exception as e:
+        logger.error(f"Could not collect component metrics: {e}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``render_metrics`` over HTTP from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,9 @@
+import pytest
+
+import rate_limit
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limits(monkeypatch):
+    # Fake servers may reuse a port an earlier test's bucket is keyed on.
+    monkeypatch.setattr(rate_limit, "_buckets", {})
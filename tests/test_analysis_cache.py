@@ -0,0 +1,76 @@
+import pytest
+
+import tasks
+from analysis_cache import AnalysisCache, make_cache_key
+from fakes import FakeAnalyzer
+from tasks import analysis_cache_key, run_analysis
+
+ROLE = "Engineer"
+REQUIREMENTS = {"job_description": "Python and PyTorch.", "required_skills": []}
+KEY_ARGS = ("Resume text", ROLE, REQUIREMENTS, "OpenAI", "gpt-4o", "5")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnalysisCache(str(tmp_path / "analysis_cache.sqlite3"))
+
+
+def test_second_analysis_is_served_from_the_cache(cache):
+    analyzer = FakeAnalyzer(latency=0)
+    first = run_analysis("Resume text", REQUIREMENTS, ROLE, analyzer, cache)
+    assert run_analysis("Resume text", REQUIREMENTS, ROLE, analyzer, cache) == first
+    assert analyzer.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+@pytest.mark.parametrize(
+    "index, value",
+    [
+        (0, "Other resume"),
+        (1, "Designer"),
+        (2, {**REQUIREMENTS, "job_description": "Go and Kubernetes."}),
+        (3, "Claude"),
+        (4, "gpt-4o-mini"),
+        (5, "6"),
+    ],
+)
+def test_anything_that_changes_the_verdict_changes_the_key(index, value):
+    args = list(KEY_ARGS)
+    args[index] = value
+    assert make_cache_key(*args) != make_cache_key(*KEY_ARGS)
+
+
+def test_prompt_kinds_do_not_share_keys():
+    keys = {make_cache_key(*KEY_ARGS, kind) for kind in ("single", "multi_role")}
+    assert len(keys | {make_cache_key(*KEY_ARGS, "packed")}) == 3
+    assert make_cache_key(*KEY_ARGS) == make_cache_key(*KEY_ARGS, "single")
+
+
+def test_new_prompt_version_misses(cache, monkeypatch):
+    analyzer = FakeAnalyzer(latency=0)
+    run_analysis("Resume text", REQUIREMENTS, ROLE, analyzer, cache)
+    monkeypatch.setattr(tasks, "PROMPT_VERSION", "next")
+    run_analysis("Resume text", REQUIREMENTS, ROLE, analyzer, cache)
+    assert analyzer.calls == 2
+
+
+def test_invalidate_role_drops_its_entries(cache):
+    analyzer = FakeAnalyzer(latency=0)
+    cache.put(analysis_cache_key("A", REQUIREMENTS, ROLE, analyzer), ROLE, {})
+    cache.put(analysis_cache_key("B", REQUIREMENTS, ROLE, analyzer), ROLE, {})
+    cache.put(
+        analysis_cache_key("A", REQUIREMENTS, "Designer", analyzer), "Designer", {}
+    )
+    assert cache.invalidate_role(ROLE) == 2
+    assert cache.get(analysis_cache_key("A", REQUIREMENTS, ROLE, analyzer)) is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "analysis_cache.sqlite3"), max_entries=2)
+    cache.put("a", ROLE, {"n": 1})
+    cache.put("b", ROLE, {"n": 2})
+    cache.get("a")
+    cache.put("c", ROLE, {"n": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1} and cache.get("c") == {"n": 3}
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+import batch_api
+from batch_api import (
+    BatchJob,
+    chunk_requests,
+    fetch_batch_results,
+    submit_batch,
+    wait_for_batch,
+)
+from fakes import DEFAULT_VERDICT, FakeBatchServer
+
+ROLE = "Engineer"
+REQUIREMENTS = {"job_description": "Python and PyTorch.", "required_skills": []}
+RESUMES = [(f"candidate-{i}.pdf", f"Resume {i}: Python, PyTorch.") for i in range(5)]
+
+
+@pytest.fixture(autouse=True)
+def jobs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_api, "BATCH_JOBS_DIR", str(tmp_path))
+
+
+@pytest.fixture
+def server():
+    with FakeBatchServer(complete_after=0.1) as server:
+        yield server
+
+
+def base_url(server, provider: str) -> str:
+    return f"{server.base_url}/v1" if provider == "OpenAI" else server.base_url
+
+
+@pytest.mark.parametrize("provider", ["OpenAI", "Claude"])
+def test_submit_and_collect_round_trip(server, provider):
+    job = submit_batch(
+        RESUMES,
+        ROLE,
+        REQUIREMENTS,
+        provider,
+        "key",
+        base_url(server, provider),
+        errors={"broken.pdf": "No text could be extracted from the PDF"},
+    )
+    job = BatchJob.load(job.manifest_path)
+    assert wait_for_batch(job, "key", poll_interval=0.05, timeout=10)
+
+    records = {
+        record["candidate"]: record for record in fetch_batch_results(job, "key")
+    }
+    assert set(records) == {candidate for candidate, _ in RESUMES} | {"broken.pdf"}
+    for candidate, _ in RESUMES:
+        assert records[candidate]["error"] is None
+        assert records[candidate]["selected"] is DEFAULT_VERDICT["selected"]
+        assert records[candidate]["role"] == ROLE
+    assert records["broken.pdf"]["error"]
+
+
+@pytest.mark.parametrize("provider", ["OpenAI", "Claude"])
+def test_large_jobs_are_split_into_several_batches(server, provider, monkeypatch):
+    monkeypatch.setitem(batch_api.BATCH_LIMITS, provider, (2, 10**9))
+    job = submit_batch(
+        RESUMES, ROLE, REQUIREMENTS, provider, "key", base_url(server, provider)
+    )
+    assert len(job.batch_ids) == 3
+    assert BatchJob.load(job.manifest_path).batch_ids == job.batch_ids
+    wait_for_batch(job, "key", poll_interval=0.05, timeout=10)
+    records = list(fetch_batch_results(job, "key"))
+    assert sorted(record["candidate"] for record in records) == sorted(
+        candidate for candidate, _ in RESUMES
+    )
+    assert not any(record["error"] for record in records)
+
+
+def test_chunks_stay_under_the_size_limit():
+    requests = [{"custom_id": str(i), "body": "x" * 100} for i in range(10)]
+    size = len(json.dumps(requests[0])) + 1
+    chunks = list(chunk_requests(requests, max_requests=100, max_bytes=3 * size))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    with pytest.raises(ValueError):
+        list(chunk_requests(requests, max_requests=100, max_bytes=size - 1))
+
+
+def test_manifest_with_a_single_batch_id_still_loads(tmp_path):
+    path = tmp_path / "old.json"
+    path.write_text(
+        json.dumps({"model_provider": "OpenAI", "batch_id": "b", "role": ROLE})
+    )
+    assert BatchJob.load(str(path)).batch_ids == ["b"]
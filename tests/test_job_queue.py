@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+import job_queue
+from job_queue import JobQueue, run_job, work
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    # Retry failed jobs at once instead of after a backoff.
+    monkeypatch.setattr(job_queue, "backoff_delay", lambda *args, **kwargs: 0.0)
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_enqueue_is_idempotent(queue):
+    first = queue.enqueue("email", {"to": "a"}, "email:a")
+    assert queue.enqueue("email", {"to": "a"}, "email:a") == first
+    assert queue.stats() == {"pending": 1}
+
+
+def test_claimed_job_is_leased_until_it_expires(queue):
+    job_id = queue.enqueue("email", {}, "email:a")
+    job = queue.claim("w1", lease_seconds=0.05)
+    assert job["id"] == job_id and job["attempt"] == 1
+    assert queue.claim("w2") is None
+    time.sleep(0.1)
+    job = queue.claim("w2")
+    assert job["id"] == job_id and job["attempt"] == 2
+
+
+def test_failed_job_is_retried_then_dead_lettered_and_requeued(queue):
+    job_id = queue.enqueue("email", {}, "email:a", max_attempts=2)
+    queue.claim("w")
+    assert queue.fail(job_id, "timeout") == "pending"
+    assert queue.claim("w")["attempt"] == 2
+    assert queue.fail(job_id, "timeout") == "dead"
+    assert queue.claim("w") is None
+    assert [job["id"] for job in queue.dead_letters()] == [job_id]
+    assert queue.get(job_id)["last_error"] == "timeout"
+
+    assert queue.requeue(job_id)
+    assert queue.get(job_id)["attempts"] == 0
+    assert queue.claim("w")["id"] == job_id
+
+
+def test_lease_expired_on_last_attempt_is_dead_lettered(queue):
+    job_id = queue.enqueue("email", {}, "email:a", max_attempts=1)
+    queue.claim("w", lease_seconds=0.0)
+    time.sleep(0.01)
+    assert queue.claim("w") is None
+    assert queue.get(job_id)["status"] == "dead"
+
+
+def test_credentials_are_passed_to_the_handler_and_deleted_when_done(queue):
+    seen = []
+    handlers = {"email": lambda payload, queue: seen.append(payload["settings"])}
+    job_id = queue.enqueue(
+        "email",
+        {"settings": {"email_sender": "hr@example.com"}},
+        "email:a",
+        secrets={"email_passkey": "passkey"},
+    )
+    assert work(queue, handlers, max_jobs=1) == 1
+    assert seen == [{"email_sender": "hr@example.com", "email_passkey": "passkey"}]
+    assert queue.get(job_id)["status"] == "done"
+    assert queue.secrets(job_id) is None
+
+
+def test_job_without_its_credentials_is_dead_lettered_at_once(queue):
+    job_id = queue.enqueue(
+        "email", {"settings": {}}, "email:a", secrets={"email_passkey": "passkey"}
+    )
+    queue._conn.execute("DELETE FROM vault.job_secrets")
+    assert not run_job(queue, queue.claim("w"), {"email": lambda *args: None})
+    assert queue.get(job_id)["status"] == "dead"
+    assert not queue.requeue(job_id)
+
+    # Enqueueing it again with credentials revives it.
+    queue.enqueue(
+        "email", {"settings": {}}, "email:a", secrets={"email_passkey": "passkey"}
+    )
+    assert queue.get(job_id)["status"] == "pending"
+    assert queue.secrets(job_id) == {"email_passkey": "passkey"}
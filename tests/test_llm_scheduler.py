@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+from fakes import DEFAULT_VERDICT, FakeAnalyzer, FakeRateLimitError
+from llm_scheduler import (
+    ProviderLimits,
+    RateLimitScheduler,
+    analyze_resume_async,
+    analyze_resumes_async,
+)
+from structured_output import AnalysisParseError
+
+ROLE = "Engineer"
+REQUIREMENTS = {"job_description": "Python and PyTorch.", "required_skills": []}
+
+
+def unlimited() -> RateLimitScheduler:
+    return RateLimitScheduler(ProviderLimits(1e9, 1e12))
+
+
+class RateLimitedOnce(FakeAnalyzer):
+    """Answers with a 429 the first time, then normally."""
+
+    def _respond(self, message):
+        if not self.calls:
+            self.calls += 1
+            raise FakeRateLimitError(retry_after=0.2)
+        return super()._respond(message)
+
+
+def analyze(analyzer, scheduler=None, **kwargs) -> dict:
+    return asyncio.run(
+        analyze_resume_async(
+            "Resume text",
+            REQUIREMENTS,
+            ROLE,
+            analyzer,
+            scheduler or unlimited(),
+            **kwargs,
+        )
+    )
+
+
+def test_returns_the_parsed_verdict():
+    verdict = analyze(FakeAnalyzer(latency=0))
+    assert verdict["selected"] is DEFAULT_VERDICT["selected"]
+    assert verdict["feedback"] == DEFAULT_VERDICT["feedback"]
+
+
+def test_rate_limit_pauses_for_retry_after_then_retries():
+    analyzer = RateLimitedOnce(latency=0)
+    started = time.monotonic()
+    verdict = analyze(analyzer)
+    assert verdict["selected"] is True
+    assert analyzer.calls == 2
+    assert time.monotonic() - started >= 0.2
+
+
+def test_gives_up_after_max_retries():
+    analyzer = FakeAnalyzer(latency=0, rate_limit_rate=1.0, retry_after=0.01)
+    with pytest.raises(FakeRateLimitError):
+        analyze(analyzer, max_retries=2)
+    assert analyzer.calls == 3
+
+
+def test_unparseable_output_is_not_retried_as_a_new_analysis():
+    analyzer = FakeAnalyzer(latency=0, error_rate=1.0)
+    with pytest.raises(AnalysisParseError):
+        analyze(analyzer)
+    # One analysis and its repair calls, no retries of the analysis itself.
+    assert analyzer.calls == 3
+
+
+def test_scheduler_paces_requests():
+    # 20 requests per second with room for a burst of 2.
+    scheduler = RateLimitScheduler(ProviderLimits(1200, 1e12), burst_seconds=0.1)
+
+    async def run():
+        return await asyncio.gather(
+            *(
+                analyze_resume_async(
+                    "Resume text",
+                    REQUIREMENTS,
+                    ROLE,
+                    FakeAnalyzer(latency=0),
+                    scheduler,
+                )
+                for _ in range(6)
+            )
+        )
+
+    started = time.monotonic()
+    verdicts = asyncio.run(run())
+    assert len(verdicts) == 6
+    assert time.monotonic() - started >= 0.15
+
+
+def test_batch_reports_failures_per_candidate():
+    analyzers = iter([FakeAnalyzer(latency=0), FakeAnalyzer(latency=0, error_rate=1.0)])
+    records = asyncio.run(
+        analyze_resumes_async(
+            [("a.pdf", "Resume A"), ("b.pdf", "Resume B")],
+            REQUIREMENTS,
+            ROLE,
+            lambda: next(analyzers),
+            unlimited(),
+        )
+    )
+    assert [record["candidate"] for record in records] == ["a.pdf", "b.pdf"]
+    assert records[0]["error"] is None and records[0]["selected"] is True
+    assert records[1]["error"]
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from fakes import FakeSmtpServer
+from mailer import DEFAULT_MAX_ATTEMPTS, Mailer, Outbox, SmtpConfig
+
+SENDER = "recruiter@example.com"
+UNLIMITED = (1e9, 1e9)
+
+
+@pytest.fixture
+def server():
+    with FakeSmtpServer(seed=0) as server:
+        yield server
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return Outbox(str(tmp_path / "outbox.sqlite3"))
+
+
+def make_mailer(server, outbox, **kwargs) -> Mailer:
+    kwargs.setdefault("rate", UNLIMITED)
+    config = SmtpConfig(server.host, server.port, SENDER, "passkey", use_ssl=False)
+    return Mailer(config, outbox, **kwargs)
+
+
+def test_sequential_sends_reuse_one_connection(server, outbox):
+    mailer = make_mailer(server, outbox)
+    for i in range(10):
+        assert mailer.send(f"c{i}@example.com", "Interview", "Hi", "HR") == "sent"
+    mailer.close()
+    assert len(server.messages) == 10
+    assert server.connections == 1
+    assert server.logins == 1
+
+
+def test_flush_sends_over_at_most_pool_size_connections(server, outbox):
+    for i in range(20):
+        outbox.add(SENDER, "HR", f"c{i}@example.com", "Interview", "Hi")
+    mailer = make_mailer(server, outbox, pool_size=2)
+    assert mailer.flush() == (20, 0)
+    mailer.close()
+    assert len(server.messages) == 20
+    assert server.connections <= 2
+    assert outbox.stats() == {"sent": 20}
+
+
+def test_bucket_paces_sends(server, outbox):
+    # 20 messages per second with no burst beyond the first one.
+    mailer = make_mailer(server, outbox, rate=(20.0, 1.0))
+    started = time.monotonic()
+    for i in range(5):
+        mailer.send(f"c{i}@example.com", "Interview", "Hi", "HR")
+    mailer.close()
+    assert time.monotonic() - started >= 0.15
+
+
+def test_identical_message_is_sent_once(server, outbox):
+    mailer = make_mailer(server, outbox)
+    assert mailer.send("c@example.com", "Interview", "Hi", "HR") == "sent"
+    assert mailer.send("c@example.com", "Interview", "Hi", "HR") == "sent"
+    mailer.close()
+    assert len(server.messages) == 1
+
+
+def test_rejected_message_is_retried_until_it_fails_then_requeued(server, outbox):
+    server.fail_rate = 1.0
+    mailer = make_mailer(server, outbox)
+    assert mailer.send("c@example.com", "Interview", "Hi", "HR") == "pending"
+    for _ in range(DEFAULT_MAX_ATTEMPTS - 2):
+        assert mailer.flush() == (0, 1)
+    assert outbox.stats() == {"pending": 1}
+    assert mailer.flush() == (0, 1)
+    assert outbox.stats() == {"failed": 1}
+    assert mailer.flush() == (0, 0)
+
+    server.fail_rate = 0.0
+    assert mailer.send("c@example.com", "Interview", "Hi", "HR") == "sent"
+    mailer.close()
+    assert len(server.messages) == 1
+
+
+def test_mailers_for_the_same_server_share_one_bucket(server, outbox):
+    mailer = make_mailer(server, outbox, rate=(20.0, 1.0))
+    config = SmtpConfig(server.host, server.port, "other@example.com", "passkey")
+    other = Mailer(config, outbox, rate=UNLIMITED)
+    assert other.bucket is mailer.bucket
@@ -0,0 +1,55 @@
+import pytest
+
+from prefilter import PreFilter
+
+REQUIREMENTS = {
+    "job_description": """Required Skills:
+        - Python, PyTorch/TensorFlow
+        - Machine Learning algorithms and frameworks
+        - Deep Learning and Neural Networks
+""",
+}
+LISTED = "Skills: python, pytorch and machine learning"
+
+
+@pytest.fixture
+def pre_filter():
+    return PreFilter(REQUIREMENTS)
+
+
+def test_required_skills_come_from_the_bullets(pre_filter):
+    assert pre_filter.skills == [
+        "python",
+        "pytorch",
+        "tensorflow",
+        "machine learning",
+        "deep learning",
+    ]
+
+
+@pytest.mark.parametrize(
+    "variant", [f"{LISTED}.", f"{LISTED}-", f"{LISTED}.\nMore text."]
+)
+def test_trailing_punctuation_does_not_hide_a_skill(pre_filter, variant):
+    assert pre_filter.score(variant)[1] == ["python", "pytorch", "machine learning"]
+
+
+WEB_REQUIREMENTS = {
+    "job_description": """Required Skills:
+        - TypeScript
+        - AI agents
+        - Product design
+""",
+}
+
+
+def test_ambiguous_words_do_not_count_as_skills():
+    pre_filter = PreFilter(WEB_REQUIREMENTS)
+    resume = "JavaScript (JS) developer. Built the UI and TS tooling for sales agents."
+    assert pre_filter.score(resume + " Led system design.")[1] == []
+
+
+def test_specific_phrases_still_count():
+    pre_filter = PreFilter(WEB_REQUIREMENTS)
+    resume = "Built AI agents with LangChain in TypeScript; UI design in Figma."
+    assert pre_filter.score(resume)[1] == ["typescript", "ai agents", "product design"]
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from fakes import FakeZoomServer
+from zoom_client import MeetingRequest, ZoomClient
+
+UNLIMITED = (1e9, 1e9)
+
+
+class RateLimitedTwice(FakeZoomServer):
+    """Answers the first two meeting requests with a 429."""
+
+    limited = 0
+
+    def rate_limited(self) -> bool:
+        with self._lock:
+            self.limited += 1
+            return self.limited <= 2
+
+
+def make_client(server, account_id="account", **kwargs) -> ZoomClient:
+    kwargs.setdefault("meeting_create_rate", UNLIMITED)
+    return ZoomClient(
+        account_id,
+        "client",
+        "secret",
+        api_url=server.api_url,
+        token_url=server.token_url,
+        **kwargs,
+    )
+
+
+def meetings(count: int):
+    return [
+        MeetingRequest(f"Interview {i}", "2026-01-05T10:00:00") for i in range(count)
+    ]
+
+
+@pytest.fixture
+def server():
+    with FakeZoomServer(seed=0) as server:
+        yield server
+
+
+def test_create_meetings_in_order_with_one_token(server):
+    client = make_client(server)
+    created = client.create_meetings(meetings(10))
+    assert [meeting["topic"] for meeting in created] == [
+        f"Interview {i}" for i in range(10)
+    ]
+    assert len(server.meetings) == 10
+    assert server.token_requests == 1
+
+
+def test_rejected_token_is_refreshed_once(server):
+    client = make_client(server)
+    client.create_meeting(meetings(1)[0])
+    server.tokens.clear()
+    client.create_meeting(meetings(1)[0])
+    assert len(server.meetings) == 2
+    assert server.token_requests == 2
+
+
+def test_rate_limited_request_backs_off_and_retries():
+    with RateLimitedTwice() as server:
+        started = time.monotonic()
+        meeting = make_client(server).create_meeting(meetings(1)[0])
+        assert meeting["topic"] == "Interview 0"
+        assert server.limited == 3
+        # The fake asks for 0.05 seconds in Retry-After.
+        assert time.monotonic() - started >= 0.1
+
+
+def test_meeting_creation_is_paced_per_account(server):
+    # 20 meetings per second with no burst beyond the first one.
+    client = make_client(server, meeting_create_rate=(20.0, 1.0))
+    other = make_client(server, meeting_create_rate=UNLIMITED)
+    assert other.meeting_bucket is client.meeting_bucket
+    assert make_client(server, "other").meeting_bucket is not client.meeting_bucket
+
+    started = time.monotonic()
+    client.create_meetings(meetings(3))
+    for meeting in meetings(2):
+        other.create_meeting(meeting)
+    assert len(server.meetings) == 5
+    assert time.monotonic() - started >= 0.15
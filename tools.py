@@ -1,9 +1,13 @@
-import time
+import json
 import requests
 from phi.utils.log import logger
+from phi.tools.email import EmailTools
 from phi.tools.zoom import ZoomTool
 from typing import Optional
 
+from mailer import get_mailer
+from zoom_client import MeetingRequest, ZoomClient, meeting_summary
+
 
 class CustomZoomTool(ZoomTool):
     def __init__(
@@ -20,39 +24,81 @@ class CustomZoomTool(ZoomTool):
             client_secret=client_secret,
             name=name,
         )
-        self.token_url = "https://zoom.us/oauth/token"
-        self.access_token = None
-        self.token_expires_at = 0
+        # Tokens and connections are shared process-wide by the client.
+        self.client = ZoomClient(account_id, client_id, client_secret)
 
     def get_access_token(self) -> str:
-        if self.access_token and time.time() < self.token_expires_at:
-            return str(self.access_token)
-
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        data = {"grant_type": "account_credentials", "account_id": self.account_id}
-
         try:
-            response = requests.post(
-                self.token_url,
-                headers=headers,
-                data=data,
-                auth=(self.client_id, self.client_secret),
-            )
-            response.raise_for_status()
-
-            token_info = response.json()
-            self.access_token = token_info["access_token"]
-            expires_in = token_info["expires_in"]
-            self.token_expires_at = time.time() + expires_in - 60
-
-            self._set_parent_token(str(self.access_token))
-            return str(self.access_token)
-
-        except requests.RequestException as e:
+            token = self.client.access_token()
+        except (requests.RequestException, KeyError, ValueError) as e:
             logger.error(f"Error fetching access token: {e}")
             return ""
+        self._set_parent_token(token)
+        return token
 
     def _set_parent_token(self, token: str) -> None:
         """Helper method to set the token in the parent ZoomTool class"""
         if token:
             self._ZoomTool__access_token = token
+
+    def schedule_meeting(
+        self, topic: str, start_time: str, duration: int, timezone: str = "UTC"
+    ) -> str:
+        """
+        Schedule a new Zoom meeting.
+
+        Args:
+            topic (str): The topic or title of the meeting.
+            start_time (str): The start time of the meeting in ISO 8601 format.
+            duration (int): The duration of the meeting in minutes.
+            timezone (str): The timezone for the meeting (e.g., "America/New_York", "Asia/Tokyo").
+
+        Returns:
+            A JSON-formatted string containing the response from Zoom API with the scheduled meeting details,
+            or an error message if the scheduling fails.
+        """
+        try:
+            meeting_info = self.client.create_meeting(
+                MeetingRequest(topic, start_time, duration, timezone)
+            )
+            return json.dumps(meeting_summary(meeting_info), indent=2)
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logger.error(f"Error scheduling meeting: {e}")
+            return json.dumps({"error": str(e)})
+
+
+class PooledEmailTools(EmailTools):
+    """``EmailTools`` that sends through the pooled, rate-limited ``Mailer``
+    instead of logging in to the SMTP server for every message.
+    """
+
+    def email_user(self, subject: str, body: str) -> str:
+        """Emails the user with the given subject and body.
+
+        :param subject: The subject of the email.
+        :param body: The body of the email.
+        :return: "success" if the email was sent successfully, "error: [error message]" otherwise.
+        """
+        if not self.receiver_email:
+            return "error: No receiver email provided"
+        if not self.sender_name:
+            return "error: No sender name provided"
+        if not self.sender_email:
+            return "error: No sender email provided"
+        if not self.sender_passkey:
+            return "error: No sender passkey provided"
+
+        try:
+            status = get_mailer(self.sender_email, self.sender_passkey).send(
+                self.receiver_email, subject, body, self.sender_name
+            )
+        except Exception as e:
+            logger.error(f"Error sending email: {e}")
+            return f"error: {e}"
+        if status == "pending":
+            return "error: email could not be delivered yet; it will be retried"
+        if status == "failed":
+            return "error: email could not be delivered and will not be retried"
+        if status == "sending":
+            return "email is already being sent"
+        return "email sent successfully"
@@ -0,0 +1,124 @@
+"""Uploaded resumes, held once and shared by every consumer.
+
+Streamlit keeps an upload's bytes in memory, and ``UploadedFile.getvalue()``
+returns that same object rather than a copy. ``UploadStore`` keeps a
+reference to it per session, keyed by SHA-256. The PDF viewer, the download
+button and text extraction all read the one buffer, so an upload is no
+longer copied and written to a temporary file on every rerun. Sessions that
+upload the same file share one buffer.
+
+A session's entry is released when it starts a new application or uploads
+another file. Beyond ``MAX_UPLOAD_BYTES``, the least recently used sessions
+are evicted, which covers sessions that were closed without either.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+MAX_UPLOAD_BYTES = 256 * 2**20
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    file_id: str
+    name: str
+    digest: str
+    data: bytes
+
+
+class UploadStore:
+    def __init__(self, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, StoredUpload]" = OrderedDict()
+        # One buffer per content hash, with the number of sessions holding it.
+        self._buffers: Dict[str, bytes] = {}
+        self._references: Dict[str, int] = {}
+
+    def get(self, session_id: str) -> Optional[StoredUpload]:
+        with self._lock:
+            upload = self._sessions.get(session_id)
+            if upload is not None:
+                self._sessions.move_to_end(session_id)
+            return upload
+
+    def put(self, session_id: str, uploaded_file) -> StoredUpload:
+        """Hold ``uploaded_file`` as the session's upload, unless it already is."""
+        current = self.get(session_id)
+        if current is not None and current.file_id == uploaded_file.file_id:
+            return current
+        data = uploaded_file.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._release(session_id)
+            data = self._buffers.setdefault(digest, data)
+            self._references[digest] = self._references.get(digest, 0) + 1
+            upload = self._sessions[session_id] = StoredUpload(
+                uploaded_file.file_id, uploaded_file.name, digest, data
+            )
+            self._evict()
+        return upload
+
+    def evict(self, session_id: str) -> None:
+        with self._lock:
+            self._release(session_id)
+
+    def _release(self, session_id: str) -> None:
+        upload = self._sessions.pop(session_id, None)
+        if upload is None:
+            return
+        self._references[upload.digest] -= 1
+        if not self._references[upload.digest]:
+            del self._references[upload.digest]
+            del self._buffers[upload.digest]
+
+    def _evict(self) -> None:
+        # Never evict the most recent upload, however large.
+        while len(self._sessions) > 1 and self._held_bytes() > self.max_bytes:
+            self._release(next(iter(self._sessions)))
+
+    def _held_bytes(self) -> int:
+        return sum(len(data) for data in self._buffers.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "buffers": len(self._buffers),
+                "bytes": self._held_bytes(),
+            }
+
+
+_store: Optional[UploadStore] = None
+_store_lock = threading.Lock()
+
+
+def get_upload_store() -> UploadStore:
+    """Return the process-wide upload store, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UploadStore()
+        return _store
+
+
+def current_session_id() -> str:
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        # Outside a script run (bare mode); there is only one session.
+        return "local"
+    return ctx.session_id
+
+
+def session_upload(uploaded_file) -> StoredUpload:
+    """The current session's upload, storing ``uploaded_file`` if it is new."""
+    return get_upload_store().put(current_session_id(), uploaded_file)
+
+
+def evict_session_upload() -> None:
+    get_upload_store().evict(current_session_id())
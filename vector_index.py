@@ -0,0 +1,224 @@
+"""Local similarity index for ranking a candidate pool against a role.
+
+Resumes are embedded as signed hashed-feature vectors (word unigrams and
+bigrams, sublinear term frequency, L2-normalized) and stored in a
+memory-mapped float32 matrix, so reopening the index does not rebuild it.
+Queries are weighted by inverse document frequency, tracked per hash bucket as
+documents are added, and ranked with a single matrix-vector product. Entries
+are keyed by candidate id and a hash of the resume text, so re-adding the same
+candidate's resume is a no-op, while another candidate with the same text or
+another resume under the same id are both kept.
+
+Usage:
+    python vector_index.py --index data/resume_index --role "Senior AI ML Engineer"
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from tasks import load_job_descriptions
+
+RESUME_INDEX_DIR = "data/resume_index"
+DEFAULT_DIMENSIONS = 1024
+INITIAL_CAPACITY = 1024
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+
+@lru_cache(maxsize=200_000)
+def _bucket(feature: str, dimensions: int) -> Tuple[int, float]:
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dimensions, 1.0 if h & 0x80000000 else -1.0
+
+
+def content_key(text: str) -> str:
+    """A digest of a resume's text, which with the candidate id keys an entry."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def embed(text: str, dimensions: int = DEFAULT_DIMENSIONS) -> np.ndarray:
+    """Hash ``text`` into an L2-normalized ``dimensions``-long float32 vector."""
+    words = _TOKEN_RE.findall(text.lower())
+    counts = {}
+    for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        counts[feature] = counts.get(feature, 0) + 1
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for feature, count in counts.items():
+        index, sign = _bucket(feature, dimensions)
+        vector[index] += sign * (1.0 + math.log(count))
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class VectorIndex:
+    """Append-only, memory-mapped index of resume vectors.
+
+    The directory holds ``vectors.f32`` (the matrix), ``doc_freq.npy`` (per
+    bucket document frequencies), ``ids.txt`` (one JSON-encoded
+    ``[candidate id, content key]`` per row) and ``meta.json`` (dimensions,
+    row count and capacity).
+    """
+
+    def __init__(
+        self, directory: str = RESUME_INDEX_DIR, dimensions: Optional[int] = None
+    ):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if dimensions is not None and dimensions != meta["dimensions"]:
+                raise ValueError(
+                    f"Index at {directory} has {meta['dimensions']} dimensions"
+                )
+            self.dimensions = meta["dimensions"]
+            self.count = meta["count"]
+            self.capacity = meta["capacity"]
+            self.doc_freq = np.load(os.path.join(directory, "doc_freq.npy"))
+            with open(self._ids_path, "r") as f:
+                lines = f.readlines()
+            if len(lines) > self.count:
+                # A write was interrupted before meta.json was updated.
+                with open(self._ids_path, "w") as f:
+                    f.writelines(lines[: self.count])
+            keys = [tuple(json.loads(line)) for line in lines[: self.count]]
+            self.ids = [candidate_id for candidate_id, _ in keys]
+            self._vectors = self._open_vectors("r+")
+        else:
+            self.dimensions = dimensions or DEFAULT_DIMENSIONS
+            self.count = 0
+            self.capacity = INITIAL_CAPACITY
+            self.doc_freq = np.zeros(self.dimensions, dtype=np.float32)
+            self.ids = []
+            keys = []
+            open(self._ids_path, "w").close()
+            self._vectors = self._open_vectors("w+")
+            self._save_meta()
+        self._keys = set(keys)
+
+    @property
+    def _ids_path(self) -> str:
+        return os.path.join(self.directory, "ids.txt")
+
+    def _open_vectors(self, mode: str) -> np.memmap:
+        return np.memmap(
+            os.path.join(self.directory, "vectors.f32"),
+            dtype=np.float32,
+            mode=mode,
+            shape=(self.capacity, self.dimensions),
+        )
+
+    def _save_meta(self) -> None:
+        tmp_path = os.path.join(self.directory, "doc_freq.npy.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, self.doc_freq)
+        os.replace(tmp_path, os.path.join(self.directory, "doc_freq.npy"))
+        tmp_path = os.path.join(self.directory, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "dimensions": self.dimensions,
+                    "count": self.count,
+                    "capacity": self.capacity,
+                },
+                f,
+            )
+        os.replace(tmp_path, os.path.join(self.directory, "meta.json"))
+
+    def _grow(self, needed: int) -> None:
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self._vectors.flush()
+        del self._vectors
+        # Extending the file keeps existing rows in place.
+        with open(os.path.join(self.directory, "vectors.f32"), "r+b") as f:
+            f.truncate(capacity * self.dimensions * 4)
+        self.capacity = capacity
+        self._vectors = self._open_vectors("r+")
+
+    def add(self, candidate_id: str, text: str) -> None:
+        self.add_many([(candidate_id, text)])
+
+    def add_many(self, documents: Iterable[Tuple[str, str]]) -> int:
+        """Embed and append ``(candidate_id, text)`` pairs, returning how many
+        were added. Resumes already indexed for the same candidate are skipped.
+        """
+        new = {}
+        for candidate_id, text in documents:
+            key = (candidate_id, content_key(text))
+            if key not in self._keys and key not in new:
+                new[key] = embed(text, self.dimensions)
+        with self._lock:
+            # Another thread may have added some of them while they were embedded.
+            keys = [key for key in new if key not in self._keys]
+            if not keys:
+                return 0
+            ids = [candidate_id for candidate_id, _ in keys]
+            matrix = np.vstack([new[key] for key in keys])
+            if self.count + len(ids) > self.capacity:
+                self._grow(self.count + len(ids))
+            self._vectors[self.count : self.count + len(ids)] = matrix
+            self._vectors.flush()
+            self.doc_freq += (matrix != 0).sum(axis=0)
+            with open(self._ids_path, "a") as f:
+                f.writelines(json.dumps(list(key)) + "\n" for key in keys)
+            self.ids.extend(ids)
+            self._keys.update(keys)
+            self.count += len(ids)
+            self._save_meta()
+        return len(ids)
+
+    def top_k(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Return the ``k`` most similar ``(candidate_id, score)`` pairs."""
+        if not self.count:
+            return []
+        idf = np.log((1 + self.count) / (1 + self.doc_freq)) + 1
+        q = embed(query, self.dimensions) * idf
+        scores = self._vectors[: self.count] @ q
+        k = min(k, self.count)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.ids[i], float(scores[i])) for i in best]
+
+    def rank_for_role(self, role_requirements: dict, k: int = 10):
+        query = "\n".join(
+            [
+                role_requirements["job_description"],
+                role_requirements.get("additional_instructions", ""),
+            ]
+        )
+        return self.top_k(query, k)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rank indexed resumes for a role.")
+    parser.add_argument("--index", default=RESUME_INDEX_DIR)
+    parser.add_argument("--role", required=True)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    index = VectorIndex(args.index)
+    role_requirements = load_job_descriptions()[args.role]
+    for rank, (candidate_id, score) in enumerate(
+        index.rank_for_role(role_requirements, args.top), start=1
+    ):
+        print(f"{rank:>3}. {score:.3f}  {candidate_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Direct Zoom API client with a shared token cache and pooled connections.
+
+Server-to-server OAuth tokens live for an hour, and are cached process-wide
+per account and client. When a token expires, one thread refreshes it
+while the others wait for the result (single flight), instead of every
+caller requesting its own. All requests share a pooled ``requests.Session``
+with timeouts. ``create_meetings`` books many interviews concurrently
+without going through the LLM. Every meeting creation is paced by a token
+bucket shared by every client of the same account.
+
+Set ``ZOOM_API_URL`` and ``ZOOM_TOKEN_URL`` to point at ``fakes.FakeZoomServer``
+for local testing.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from phi.utils.log import logger
+
+from rate_limit import TokenBucket, backoff_delay, shared_bucket
+from telemetry import timed_call
+
+ZOOM_API_URL = "https://api.zoom.us/v2"
+ZOOM_TOKEN_URL = "https://zoom.us/oauth/token"
+# (connect, read) seconds.
+DEFAULT_TIMEOUT = (5.0, 30.0)
+# Refresh tokens this long before Zoom expires them.
+TOKEN_EXPIRY_MARGIN = 60.0
+# Zoom's "Medium" rate-limit category, which meeting creation belongs to.
+MEETING_CREATE_RATE = (20.0, 20.0)
+MAX_RETRIES = 4
+
+
+class ZoomTokenCache:
+    """Process-wide access tokens with single-flight refresh."""
+
+    def __init__(self):
+        self._tokens: Dict[tuple, Tuple[str, float]] = {}
+        self._refresh_locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def _fresh(self, key: tuple) -> Optional[str]:
+        entry = self._tokens.get(key)
+        if entry is not None and time.time() < entry[1]:
+            return entry[0]
+        return None
+
+    def get(self, key: tuple, fetch: Callable[[], Tuple[str, float]]) -> str:
+        """Return the cached token for ``key``, calling ``fetch`` (which returns
+        the token and its lifetime in seconds) at most once per expiry.
+        """
+        token = self._fresh(key)
+        if token is not None:
+            return token
+        with self._lock:
+            refresh_lock = self._refresh_locks.setdefault(key, threading.Lock())
+        with refresh_lock:
+            token = self._fresh(key)
+            if token is not None:
+                return token
+            token, expires_in = fetch()
+            with self._lock:
+                self._tokens[key] = (
+                    token,
+                    time.time() + expires_in - TOKEN_EXPIRY_MARGIN,
+                )
+                self.fetches += 1
+            return token
+
+    def invalidate(self, key: tuple, token: str) -> None:
+        """Drop ``token`` after Zoom rejected it, unless it was already replaced."""
+        with self._lock:
+            if self._tokens.get(key, (None,))[0] == token:
+                del self._tokens[key]
+
+
+token_cache = ZoomTokenCache()
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled HTTP session used for Zoom calls."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=32,
+                # Only connection failures are retried here; HTTP statuses are
+                # handled by ZoomClient, which knows what is safe to repeat.
+                max_retries=Retry(
+                    total=3, connect=3, read=0, status=0, backoff_factor=0.2
+                ),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def meeting_bucket(key: tuple, rate: Tuple[float, float]) -> TokenBucket:
+    """Return the process-wide meeting-create bucket for an account.
+
+    Zoom's limit is per account, so every client of the account shares one
+    bucket; ``rate`` only applies when the bucket is first created.
+    """
+    return shared_bucket(("zoom", "create_meeting", *key), *rate)
+
+
+@dataclass
+class MeetingRequest:
+    topic: str
+    start_time: Union[datetime, str]
+    duration: int = 60
+    timezone: str = "UTC"
+    agenda: str = ""
+    user_id: str = "me"
+    settings: dict = field(default_factory=dict)
+
+    def body(self) -> dict:
+        start_time = self.start_time
+        if isinstance(start_time, datetime):
+            # Local wall-clock time; Zoom interprets it in ``timezone``.
+            start_time = start_time.strftime("%Y-%m-%dT%H:%M:%S")
+        return {
+            "topic": self.topic,
+            "type": 2,
+            "start_time": start_time,
+            "duration": self.duration,
+            "timezone": self.timezone,
+            "agenda": self.agenda,
+            "settings": {
+                "host_video": True,
+                "participant_video": True,
+                "join_before_host": False,
+                "mute_upon_entry": False,
+                "watermark": True,
+                "audio": "voip",
+                "auto_recording": "none",
+                **self.settings,
+            },
+        }
+
+
+class ZoomClient:
+    def __init__(
+        self,
+        account_id: str,
+        client_id: str,
+        client_secret: str,
+        api_url: Optional[str] = None,
+        token_url: Optional[str] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        meeting_create_rate: Tuple[float, float] = MEETING_CREATE_RATE,
+    ):
+        self.account_id = account_id
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_url = (api_url or os.environ.get("ZOOM_API_URL", ZOOM_API_URL)).rstrip(
+            "/"
+        )
+        self.token_url = token_url or os.environ.get("ZOOM_TOKEN_URL", ZOOM_TOKEN_URL)
+        self.timeout = timeout
+        self.session = get_session()
+        secret_digest = hashlib.sha256((client_secret or "").encode()).hexdigest()
+        self._token_key = (self.token_url, account_id, client_id, secret_digest)
+        # Zoom limits meeting creation per account, across all its clients.
+        self.meeting_bucket = meeting_bucket(
+            (self.api_url, account_id), meeting_create_rate
+        )
+
+    def _fetch_token(self) -> Tuple[str, float]:
+        with timed_call("zoom", "token"):
+            response = self.session.post(
+                self.token_url,
+                data={
+                    "grant_type": "account_credentials",
+                    "account_id": self.account_id,
+                },
+                auth=(self.client_id, self.client_secret),
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+        token_info = response.json()
+        return token_info["access_token"], float(token_info["expires_in"])
+
+    def access_token(self) -> str:
+        return token_cache.get(self._token_key, self._fetch_token)
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Call the API, refreshing a rejected token once and backing off on 429."""
+        refreshed = False
+        for attempt in range(MAX_RETRIES + 1):
+            token = self.access_token()
+            response = self.session.request(
+                method,
+                f"{self.api_url}{path}",
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=self.timeout,
+                **kwargs,
+            )
+            if response.status_code == 401 and not refreshed:
+                token_cache.invalidate(self._token_key, token)
+                refreshed = True
+                continue
+            if response.status_code == 429 and attempt < MAX_RETRIES:
+                retry_after = response.headers.get("Retry-After")
+                time.sleep(
+                    float(retry_after) if retry_after else backoff_delay(attempt)
+                )
+                continue
+            response.raise_for_status()
+            return response
+        response.raise_for_status()
+        return response
+
+    def create_meeting(self, meeting: MeetingRequest) -> dict:
+        self.meeting_bucket.wait()
+        with timed_call("zoom", "create_meeting"):
+            response = self.request(
+                "POST", f"/users/{meeting.user_id}/meetings", json=meeting.body()
+            )
+        meeting_info = response.json()
+        logger.info(f"Meeting scheduled successfully. ID: {meeting_info['id']}")
+        return meeting_info
+
+    def create_meetings(
+        self, meetings: Iterable[MeetingRequest], concurrency: int = 8
+    ) -> List[Union[dict, Exception]]:
+        """Create many meetings concurrently, paced to Zoom's rate limit.
+
+        Returns one entry per request, in order: the meeting, or the
+        exception that prevented it from being created.
+        """
+
+        def create(meeting: MeetingRequest) -> Union[dict, Exception]:
+            try:
+                return self.create_meeting(meeting)
+            except (requests.RequestException, KeyError, ValueError) as e:
+                logger.error(f"Error scheduling meeting '{meeting.topic}': {e}")
+                return e
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(create, meetings))
+
+
+def meeting_summary(meeting_info: dict) -> dict:
+    """The fields shown to candidates, as ``ZoomTool.schedule_meeting`` reports them."""
+    return {
+        "message": "Meeting scheduled successfully!",
+        "meeting_id": meeting_info["id"],
+        "topic": meeting_info["topic"],
+        "start_time": meeting_info["start_time"],
+        "duration": meeting_info["duration"],
+        "join_url": meeting_info["join_url"],
+    }